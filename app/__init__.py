@@ -5,8 +5,10 @@ from app.config import Config
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession: SELECT chỉ đọc có thể đi replica (bind "replica"), còn lại primary
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 
@@ -14,20 +16,57 @@ def create_app():
     app = Flask(__name__, static_folder='static', static_url_path='/static')
     app.config.from_object(Config)
 
+    from app.utils.serialization import FastJSONProvider
+    app.json = FastJSONProvider(
+        app,
+        encoder=app.config.get('JSON_ENCODER', 'auto'),
+        msgpack_enabled=app.config.get('MSGPACK_ENABLED', True),
+    )
+
     # Initialize JWTManager
 
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    from app.services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+
+    from app.services.token_blocklist import token_blocklist
+    token_blocklist.init_app(app, jwt)
+
+    from app.utils.rate_limiter import rate_limiter
+    rate_limiter.init_app(app)
+
+    from app.services.bestseller_tracker import bestsellers
+    bestsellers.init_app(app)
+
+    from app.services.view_counter import view_counter
+    view_counter.init_app(app)
+
+    from app.services.catalog_engine import catalog
+    catalog.init_app(app)
+
+    from app.services.category_stats import category_stats
+    category_stats.init_app(app)
+
+    from app.services.catalog_version import catalog_version
+    catalog_version.init_app(app)
+
+    from app.utils.compression import compressor
+    compressor.init_app(app)
+
+    from app.utils.db_routing import db_router
+    db_router.init_app(app)
+
     # Import models so Flask-Migrate can detect them
-    from app.models import user, product, order, category, inventory, inventory_log
+    from app.models import user, product, order, category, inventory, inventory_log, scheduler_lease, job_run, revoked_token, dashboard_counter, sales_rollup, product_replenishment, product_pair, job_cursor, product_stats, category_closure
 
     cors_config = {
         "origins": ["http://localhost:5000", "http://127.0.0.1:5000"],
         "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["X-Total-Count", "X-Page", "X-Per-Page"],
+        "expose_headers": ["X-Total-Count", "X-Page", "X-Per-Page", "ETag"],
         "credentials": True
     }
     CORS(app, resources={r"/api/*": cors_config})
@@ -50,4 +89,7 @@ def create_app():
     from app.routes.api import api_bp
     app.register_blueprint(api_bp)
 
+    from app.cli import register_cli
+    register_cli(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,107 @@
+# app/cli.py
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+
+from app import db
+
+sales_cli = AppGroup('sales', help='Sales rollup maintenance.')
+inventory_cli = AppGroup('inventory', help='Inventory planning.')
+catalog_cli = AppGroup('catalog', help='Catalog maintenance.')
+
+
+@sales_cli.command('backfill')
+@click.option('--since', help='Ngày bắt đầu YYYY-MM-DD (mặc định: order đầu tiên).')
+@click.option('--until', help='Ngày kết thúc YYYY-MM-DD, tính cả ngày đó (mặc định: hôm nay).')
+def backfill_sales(since, until):
+    """Tính lại sales_daily / sales_hourly từ orders + order_items."""
+    from app.models.order import Order
+    from app.repositories import SalesRollupRepository
+
+    if since:
+        start = datetime.strptime(since, '%Y-%m-%d')
+    else:
+        first = db.session.query(func.min(func.coalesce(Order.paid_at, Order.created_at))).scalar()
+        if first is None:
+            click.echo('No orders to backfill.')
+            return
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+        start = datetime.combine(first.date(), datetime.min.time())
+
+    end_day = datetime.strptime(until, '%Y-%m-%d') if until else datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    end = end_day + timedelta(days=1)
+
+    lines = SalesRollupRepository().rebuild(start, end)
+    click.echo(f'Backfilled {start.date()} -> {end_day.date()}: {lines} order lines.')
+
+
+@inventory_cli.command('replenish')
+def compute_replenishment():
+    """Tính velocity, forecast, safety stock và reorder point cho toàn bộ catalog."""
+    import time
+    from flask import current_app
+    from app.services.replenishment_service import ReplenishmentService
+
+    t0 = time.perf_counter()
+    processed = ReplenishmentService.from_config(current_app.config).run()
+    click.echo(f'Computed replenishment for {processed} products in {time.perf_counter() - t0:.1f}s.')
+
+
+@sales_cli.command('related')
+@click.option('--rebuild', is_flag=True, help='Tính lại toàn bộ thay vì chỉ order mới.')
+def update_related(rebuild):
+    """Cập nhật bảng "frequently bought together" từ order đã thanh toán."""
+    from flask import current_app
+    from app.services.recommendation_service import RecommendationService
+
+    service = RecommendationService.from_config(current_app.config)
+    processed = service.rebuild() if rebuild else service.update()
+    click.echo(f'Processed {processed} orders.')
+
+
+@catalog_cli.command('rebuild-categories')
+def rebuild_categories():
+    """Dựng lại closure table của cây category từ parent_id."""
+    from app.repositories import CategoryRepository
+
+    rows = CategoryRepository().rebuild_closure()
+    click.echo(f'Rebuilt category closure: {rows} rows.')
+
+
+@catalog_cli.command('reconcile-counts')
+def reconcile_category_counts():
+    """Tính lại product_count / in_stock_count của mọi category."""
+    from app.services.category_stats import reconcile_category_counts as reconcile
+
+    click.echo(f'Fixed counters of {reconcile()} categories.')
+
+
+@catalog_cli.command('export')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Nén gzip (mặc định bật nếu OUTPUT kết thúc bằng .gz).')
+@click.option('--since', help='Chỉ sản phẩm thay đổi từ mốc này (ISO 8601, cursor của lần export trước).')
+def export_catalog(output, fmt, compress, since):
+    """Export catalog (kèm tồn kho, tên category) ra file, stream theo batch."""
+    import time
+    from app.services.catalog_export import CatalogExportService, parse_since
+
+    try:
+        updated_since = parse_since(since)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--since')
+
+    t0 = time.perf_counter()
+    with open(output, 'wb') as f:
+        cursor = CatalogExportService().write(f, fmt, updated_since, compress or output.endswith('.gz'))
+    click.echo(f'Exported catalog to {output} in {time.perf_counter() - t0:.1f}s.')
+    click.echo(f'Next cursor: --since {cursor.isoformat()}')
+
+
+def register_cli(app):
+    app.cli.add_command(sales_cli)
+    app.cli.add_command(inventory_cli)
+    app.cli.add_command(catalog_cli)
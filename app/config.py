@@ -23,5 +23,97 @@ class Config:
     DB_PASSWORD = os.environ.get('DB_PASSWORD')
     DB_NAME = os.environ.get('DB_NAME')
     
-    SQLALCHEMY_DATABASE_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replica (tuỳ chọn): method / route chỉ đọc query replica; ghi + transaction luôn primary.
+    # Client / user vừa ghi đọc primary thêm READ_YOUR_WRITES_SECONDS giây (bù replication lag)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+
+    # Scheduler leader election (db lease row | file lock cho single host)
+    SCHEDULER_LEADER_BACKEND = os.environ.get('SCHEDULER_LEADER_BACKEND', 'db')
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', 30))
+    SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE', '/tmp/smartshop-scheduler.lock')
+    # Leader quét order PENDING quá hạn mỗi N giây (order của worker đã chết / bị recycle)
+    ORDER_EXPIRY_SWEEP_SECONDS = int(os.environ.get('ORDER_EXPIRY_SWEEP_SECONDS', 30))
+
+    # Password hashing (process pool, 429 khi hàng đợi đầy)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Token revocation: mỗi worker đồng bộ blocklist từ DB theo chu kỳ này (giây)
+    TOKEN_BLOCKLIST_REFRESH_SECONDS = int(os.environ.get('TOKEN_BLOCKLIST_REFRESH_SECONDS', 5))
+    # Mỗi lần refresh đọc lại các revocation trong N giây trước lần refresh trước (commit trễ / lệch clock)
+    TOKEN_BLOCKLIST_OVERLAP_SECONDS = int(os.environ.get('TOKEN_BLOCKLIST_OVERLAP_SECONDS', 60))
+
+    # Response encoder: auto (orjson nếu đã cài) | orjson | stdlib;
+    # MessagePack khi client gửi Accept: application/msgpack (cần package msgpack)
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+    MSGPACK_ENABLED = os.environ.get('MSGPACK_ENABLED', 'true').lower() == 'true'
+
+    # Nén response (br nếu đã cài brotli, không thì gzip) khi body >= COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # ETag / 304 cho catalog GET: version đọc từ DB tối đa mỗi N giây ở mỗi worker (0 = mỗi request)
+    CATALOG_ETAG_ENABLED = os.environ.get('CATALOG_ETAG_ENABLED', 'true').lower() == 'true'
+    CATALOG_VERSION_TTL_SECONDS = float(os.environ.get('CATALOG_VERSION_TTL_SECONDS', 1))
+
+    # Catalog export delta: cursor trả về lùi lại N giây so với giờ bắt đầu export
+    # (>= transaction ghi dài nhất + replication lag), các dòng trong khoảng chồng lấn được export lại
+    CATALOG_EXPORT_LOOKBACK_SECONDS = int(os.environ.get('CATALOG_EXPORT_LOOKBACK_SECONDS', 300))
+
+    # Dashboard counters: chu kỳ job reconcile (phút) để sửa drift
+    DASHBOARD_RECONCILE_MINUTES = int(os.environ.get('DASHBOARD_RECONCILE_MINUTES', 15))
+
+    # Số sản phẩm theo category: chu kỳ job reconcile (phút), TTL cache listing ở mỗi worker (giây)
+    CATEGORY_COUNTS_RECONCILE_MINUTES = int(os.environ.get('CATEGORY_COUNTS_RECONCILE_MINUTES', 60))
+    CATEGORY_LISTING_TTL_SECONDS = int(os.environ.get('CATEGORY_LISTING_TTL_SECONDS', 30))
+
+    # Replenishment: lịch sử bán, lead time nhà cung cấp, chu kỳ đặt hàng (ngày), z của service level
+    REPLENISHMENT_HISTORY_DAYS = int(os.environ.get('REPLENISHMENT_HISTORY_DAYS', 365))
+    REPLENISHMENT_LEAD_TIME_DAYS = int(os.environ.get('REPLENISHMENT_LEAD_TIME_DAYS', 7))
+    REPLENISHMENT_REVIEW_DAYS = int(os.environ.get('REPLENISHMENT_REVIEW_DAYS', 14))
+    REPLENISHMENT_SERVICE_Z = float(os.environ.get('REPLENISHMENT_SERVICE_Z', 1.65))  # ~95%
+    REPLENISHMENT_ALPHA = float(os.environ.get('REPLENISHMENT_ALPHA', 0.3))
+
+    # Related products ("frequently bought together"): số hàng xóm, công thức score (cosine | lift),
+    # số order tối thiểu mua cùng nhau, chu kỳ job incremental (phút)
+    RELATED_PRODUCTS_K = int(os.environ.get('RELATED_PRODUCTS_K', 10))
+    RELATED_PRODUCTS_SCORE = os.environ.get('RELATED_PRODUCTS_SCORE', 'cosine')
+    RELATED_PRODUCTS_MIN_COUNT = int(os.environ.get('RELATED_PRODUCTS_MIN_COUNT', 2))
+    RELATED_PRODUCTS_UPDATE_MINUTES = int(os.environ.get('RELATED_PRODUCTS_UPDATE_MINUTES', 30))
+
+    # Bestseller leaderboard: chu kỳ (giây) mỗi worker đồng bộ lại các giờ gần nhất từ sales_hourly
+    BESTSELLER_REFRESH_SECONDS = int(os.environ.get('BESTSELLER_REFRESH_SECONDS', 60))
+
+    # Product view counters: gom trong bộ nhớ, flush vào product_stats mỗi N giây
+    VIEW_COUNTER_ENABLED = os.environ.get('VIEW_COUNTER_ENABLED', 'true').lower() == 'true'
+    VIEW_COUNTER_FLUSH_SECONDS = int(os.environ.get('VIEW_COUNTER_FLUSH_SECONDS', 10))
+    # Flush lỗi liên tục: giữ lại delta của tối đa N product, vượt quá thì bỏ
+    VIEW_COUNTER_MAX_PENDING = int(os.environ.get('VIEW_COUNTER_MAX_PENDING', 100_000))
+
+    # Catalog engine: listing / đếm tồn kho bằng NumPy trong bộ nhớ thay cho ORM
+    CATALOG_ENGINE_ENABLED = os.environ.get('CATALOG_ENGINE_ENABLED', 'false').lower() == 'true'
+    CATALOG_ENGINE_RELOAD_SECONDS = int(os.environ.get('CATALOG_ENGINE_RELOAD_SECONDS', 300))
+    # Mốc dưới của các khoảng giá cho facet price (khoảng cuối là "1000+")
+    CATALOG_PRICE_BANDS = [float(x) for x in os.environ.get('CATALOG_PRICE_BANDS', '0,50,100,200,500,1000').split(',')]
+    # Fuzzy search (trigram): số phép sửa tối đa cho mỗi từ của query (từ <= 5 ký tự: 1)
+    FUZZY_SEARCH_MAX_EDITS = int(os.environ.get('FUZZY_SEARCH_MAX_EDITS', 2))
+
+    # Rate limiting: rate theo tên endpoint (hoặc tên blueprint), dạng "N/second|minute|hour|day"
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMITS = {
+        "auth.login": "10/minute",
+        "auth.register": "5/minute",
+        "api.api_order.create_order": "30/minute",
+    }
+    RATE_LIMIT_SLOTS = 1 << 20
+    # vd /dev/shm/smartshop-ratelimit để các worker trên cùng host dùng chung bộ đếm
+    RATE_LIMIT_SHARED_PATH = os.environ.get('RATE_LIMIT_SHARED_PATH')
@@ -5,9 +5,12 @@ def setup_logger(name="app", log_file="app/logs/app.log", level=logging.INFO):
     """
     Thiết lập logger chung cho app:
     - name: tên logger
-    - log_file: file log (relative path)
+    - log_file: file log (relative path); env LOG_DIR đổi thư mục chứa file (test, container)
     - level: mức log
     """
+    if os.environ.get('LOG_DIR'):
+        log_file = os.path.join(os.environ['LOG_DIR'], os.path.basename(log_file))
+
     # Tạo folder logs nếu chưa có
     if os.path.dirname(log_file) and not os.path.exists(os.path.dirname(log_file)):
         os.makedirs(os.path.dirname(log_file))
@@ -6,19 +6,41 @@ db = SQLAlchemy()
 # Import từng model
 from .user import User
 from .category import Category
+from .category_closure import CategoryClosure
 from .inventory import Inventory
 from .product import Product
 from .order import Order, OrderItem
 from .inventory_log import InventoryLog
+from .scheduler_lease import SchedulerLease
+from .job_run import JobRun
+from .revoked_token import RevokedToken
+from .dashboard_counter import DashboardCounter
+from .sales_rollup import SalesDaily, SalesHourly
+from .product_replenishment import ProductReplenishment
+from .product_pair import ProductPairCount, RelatedProduct
+from .job_cursor import JobCursor
+from .product_stats import ProductStats
 
 # Export để có thể import từ app.models
 __all__ = [
     "User",
     "Category",
+    "CategoryClosure",
     "Product",
     "Inventory",
     "Order",
     "OrderItem",
     "InventoryLog",
+    "SchedulerLease",
+    "JobRun",
+    "RevokedToken",
+    "DashboardCounter",
+    "SalesDaily",
+    "SalesHourly",
+    "ProductReplenishment",
+    "ProductPairCount",
+    "RelatedProduct",
+    "JobCursor",
+    "ProductStats",
     "db"  # nếu bạn muốn export db
 ]
\ No newline at end of file
@@ -6,6 +6,12 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
+    # Cây category: Electronics > Laptops > Gaming; quan hệ tổ tiên / con cháu nằm ở category_closure
+    parent_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True, index=True)
+    # Denormalized: cập nhật trong cùng transaction khi tạo / xoá / đổi category sản phẩm
+    # và khi tồn kho qua mốc 0 (app/services/category_stats.py), job reconcile sửa drift
+    product_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    in_stock_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     products = db.relationship("Product", backref="category", lazy="dynamic", cascade="all,delete")
 
@@ -44,6 +50,9 @@ class Category(db.Model):
             "id": self.id,
             "name": self.name,
             "description": self.description,
+            "parent_id": self.parent_id,
+            "product_count": self.product_count or 0,
+            "in_stock_count": self.in_stock_count or 0,
         }
     def __repr__(self):
         return f"<Category {self.name}>"
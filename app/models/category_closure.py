@@ -0,0 +1,19 @@
+from app import db
+
+class CategoryClosure(db.Model):
+    """
+    Closure table của cây category: mỗi cặp (tổ tiên, con cháu) 1 dòng, kể cả (X, X) depth 0.
+    Sản phẩm của cả cây con X = JOIN product.category_id = descendant_id WHERE ancestor_id = X.
+    """
+    __tablename__ = "category_closure"
+    ancestor_id = db.Column(db.Integer, db.ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    depth = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Tra tổ tiên của 1 node (breadcrumb, move) không phải quét theo ancestor
+        db.Index("ix_category_closure_descendant", "descendant_id", "ancestor_id", "depth"),
+    )
+
+    def __repr__(self):
+        return f"<CategoryClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>"
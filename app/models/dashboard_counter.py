@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class DashboardCounter(db.Model):
+    """
+    Bộ đếm cho admin dashboard, được cập nhật incremental trong cùng transaction
+    với các write path (product / order / user). Tên counter:
+    - products, users, orders
+    - orders:<status>, revenue:<status>
+    - orders:day:<YYYY-MM-DD>
+    - catalog:version (ETag của listing catalog, +1 khi sản phẩm / category đổi hoặc còn hàng <-> hết hàng)
+
+    Mỗi counter chia thành nhiều row (slot): mỗi lần cộng chọn ngẫu nhiên 1 slot nên các
+    transaction checkout đồng thời hiếm khi chờ lock của cùng 1 row; đọc = SUM theo name.
+    """
+    __tablename__ = "dashboard_counters"
+    name = db.Column(db.String(64), primary_key=True)
+    slot = db.Column(db.SmallInteger, primary_key=True, autoincrement=False, default=0, server_default="0")
+    value = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DashboardCounter {self.name}[{self.slot}]={self.value}>"
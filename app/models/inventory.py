@@ -12,6 +12,8 @@ class Inventory(db.Model):
     )
     reserved_quantity = db.Column(db.Integer, nullable=False, default=0)
     quantity = db.Column(db.Integer, nullable=False, default=0)
+    # Tồn kho đổi cũng tính là sản phẩm thay đổi trong export feed
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now(), index=True)
 
     # Quan hệ
     product = db.relationship("Product", back_populates="inventory")
@@ -0,0 +1,14 @@
+from app import db
+from datetime import datetime
+
+class JobCursor(db.Model):
+    """Watermark của các job incremental (vị trí đã xử lý tới)."""
+    __tablename__ = "job_cursors"
+    name = db.Column(db.String(64), primary_key=True)
+    position_at = db.Column(db.DateTime, nullable=True)
+    position_id = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JobCursor {self.name} @ {self.position_at}/{self.position_id}>"
@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+class JobRun(db.Model):
+    """Metrics của mỗi lần chạy scheduled job (kể cả lần bị missed)."""
+    __tablename__ = "job_runs"
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(64), nullable=False)
+    owner = db.Column(db.String(128), nullable=False)
+    status = db.Column(db.String(16), nullable=False)  # success | error | missed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False, default=0)
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(500), nullable=True)
+
+    __table_args__ = (db.Index('idx_job_runs_job_time', 'job_id', 'started_at'),)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job_id": self.job_id,
+            "owner": self.owner,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "rows_processed": self.rows_processed,
+            "error": self.error,
+        }
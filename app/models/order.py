@@ -13,6 +13,14 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"    # Đã hủy
     FAILED = "failed"          # Thanh toán thất bại
 
+# Trạng thái đã thanh toán -> được tính vào doanh thu
+REVENUE_STATUSES = (
+    OrderStatus.PAID.value,
+    OrderStatus.CONFIRMED.value,
+    OrderStatus.SHIPPED.value,
+    OrderStatus.DELIVERED.value,
+)
+
 class Order(db.Model):
     __tablename__ = "orders"
     id = db.Column(db.Integer, primary_key=True)
@@ -20,6 +28,7 @@ class Order(db.Model):
     total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
     status = db.Column(db.String(32), default=OrderStatus.PENDING.value, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    paid_at = db.Column(db.DateTime, nullable=True, index=True)
 
     items = db.relationship('OrderItem', backref='order', cascade="all, delete-orphan", lazy=True)
 
@@ -43,5 +52,6 @@ class Order(db.Model):
             "total_amount": float(self.total_amount),
             "status": self.status,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "paid_at": self.paid_at.isoformat() if self.paid_at else None,
             "items": [item.to_dict() for item in self.items]
         }
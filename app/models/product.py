@@ -9,6 +9,8 @@ class Product(db.Model):
     price = db.Column(db.Numeric(10,2), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # Mốc thay đổi cho export feed (?updated_since=)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now(), index=True)
 
     inventory = db.relationship("Inventory", uselist=False, back_populates="product", cascade="all, delete-orphan")
 
@@ -16,6 +18,29 @@ class Product(db.Model):
         db.Index('ix_products_name_price', "name", "price"),
     )
 
+    # Sparse fieldset (?fields=name,price): cột của products + field tồn kho lấy từ inventory
+    COLUMN_FIELDS = ("id", "sku", "name", "description", "price", "category_id", "created_at")
+    STOCK_FIELDS = ("stock", "available_stock", "reserved_stock")
+    FIELDS = COLUMN_FIELDS + STOCK_FIELDS
+
+    @classmethod
+    def parse_fields(cls, raw):
+        """
+        "name,price" -> ("id", "name", "price") (luôn gồm id); None nếu không truyền.
+        Raise ValueError nếu có field không hỗ trợ.
+        """
+        if raw is None or not raw.strip():
+            return None
+        fields = ["id"]
+        for field in (f.strip() for f in raw.split(",")):
+            if not field:
+                continue
+            if field not in cls.FIELDS:
+                raise ValueError(f"Unknown field '{field}'. Allowed: {', '.join(cls.FIELDS)}")
+            if field not in fields:
+                fields.append(field)
+        return tuple(fields)
+
     @property
     def stock(self):
         """Shortcut để lấy stock từ Inventory."""
@@ -57,8 +82,13 @@ class Product(db.Model):
         if not self.sku or len(self.sku) < 3:
             raise ValueError("SKU must be at least 3 characters")
     
-    def to_dict(self, include_stock=False):
-        """Convert to dictionary for API response."""
+    def to_dict(self, include_stock=False, fields=None):
+        """
+        Convert to dictionary for API response.
+        - fields: chỉ trả các key này (chỉ đọc các thuộc tính tương ứng, khớp với query load_only)
+        """
+        if fields is not None:
+            return self._to_partial_dict(fields)
         data = {
             "id": self.id,
             "sku": self.sku,
@@ -76,6 +106,23 @@ class Product(db.Model):
         
         return data
 
+    def _to_partial_dict(self, fields):
+        data = {}
+        for field in fields:
+            if field == "price":
+                data[field] = float(self.price)
+            elif field == "created_at":
+                data[field] = self.created_at.isoformat() if self.created_at else None
+            elif field == "stock":
+                data[field] = self.stock
+            elif field == "available_stock":
+                data[field] = self.available_stock
+            elif field == "reserved_stock":
+                data[field] = self.inventory.reserved_quantity if self.inventory else 0
+            else:
+                data[field] = getattr(self, field)
+        return data
+
     def to_summary(self):
         """Lightweight dict cho list views."""
         return {
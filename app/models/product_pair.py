@@ -0,0 +1,25 @@
+from app import db
+
+class ProductPairCount(db.Model):
+    """
+    Ma trận co-occurrence (thưa, tam giác trên) giữa các sản phẩm trong order đã thanh toán.
+    product_a < product_b: số order chứa cả 2; product_a == product_b: số order chứa sản phẩm đó.
+    """
+    __tablename__ = "product_pair_counts"
+    product_a = db.Column(db.Integer, primary_key=True)
+    product_b = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_product_pair_counts_b', "product_b"),
+    )
+
+
+class RelatedProduct(db.Model):
+    """Top-k sản phẩm hay được mua cùng, đã tính sẵn (rank 0 = liên quan nhất)."""
+    __tablename__ = "related_products"
+    product_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.SmallInteger, primary_key=True)
+    related_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    pair_count = db.Column(db.Integer, nullable=False)
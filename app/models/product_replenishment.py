@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime
+
+class ProductReplenishment(db.Model):
+    """
+    Kết quả tính replenishment cho từng sản phẩm (ghi lại toàn bộ mỗi lần job chạy).
+    Đơn vị: units / ngày cho velocity, forecast, demand_std.
+    """
+    __tablename__ = "product_replenishment"
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    velocity = db.Column(db.Float, nullable=False, default=0)
+    forecast = db.Column(db.Float, nullable=False, default=0)
+    demand_std = db.Column(db.Float, nullable=False, default=0)
+    safety_stock = db.Column(db.Float, nullable=False, default=0)
+    reorder_point = db.Column(db.Float, nullable=False, default=0)
+    reorder_quantity = db.Column(db.Integer, nullable=False, default=0)
+    available = db.Column(db.Integer, nullable=False, default=0)
+    days_of_cover = db.Column(db.Float, nullable=True)  # NULL = không có nhu cầu
+    needs_reorder = db.Column(db.Boolean, nullable=False, default=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_product_replenishment_reorder_cover', "needs_reorder", "days_of_cover"),
+    )
+
+    def to_dict(self):
+        return {
+            "product_id": self.product_id,
+            "velocity": round(self.velocity, 3),
+            "forecast": round(self.forecast, 3),
+            "demand_std": round(self.demand_std, 3),
+            "safety_stock": round(self.safety_stock, 2),
+            "reorder_point": round(self.reorder_point, 2),
+            "reorder_quantity": self.reorder_quantity,
+            "available": self.available,
+            "days_of_cover": round(self.days_of_cover, 1) if self.days_of_cover is not None else None,
+            "needs_reorder": self.needs_reorder,
+            "computed_at": self.computed_at.isoformat() if self.computed_at else None,
+        }
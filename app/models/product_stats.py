@@ -0,0 +1,12 @@
+from app import db
+from datetime import datetime
+
+class ProductStats(db.Model):
+    """Số liệu merchandising theo sản phẩm, ghi theo batch (không ghi mỗi request)."""
+    __tablename__ = "product_stats"
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    views = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ProductStats {self.product_id} views={self.views}>"
@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """JWT đã bị thu hồi (logout). Row được xoá khi token hết hạn tự nhiên."""
+    __tablename__ = "revoked_tokens"
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    token_type = db.Column(db.String(16), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti} ({self.token_type})>"
@@ -0,0 +1,39 @@
+from app import db
+
+class SalesDaily(db.Model):
+    """
+    Fact table doanh số theo ngày x sản phẩm (chỉ order đã thanh toán).
+    category_id được denormalize để group theo category không cần join products.
+    """
+    __tablename__ = "sales_daily"
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sales_daily_category_day', "category_id", "day"),
+        db.Index('ix_sales_daily_product_day', "product_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<SalesDaily {self.day} product={self.product_id} units={self.units}>"
+
+
+class SalesHourly(db.Model):
+    """Như SalesDaily nhưng theo giờ (hour = datetime đã cắt phút/giây, UTC)."""
+    __tablename__ = "sales_hourly"
+    hour = db.Column(db.DateTime, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sales_hourly_category_hour', "category_id", "hour"),
+        db.Index('ix_sales_hourly_product_hour', "product_id", "hour"),
+    )
+
+    def __repr__(self):
+        return f"<SalesHourly {self.hour} product={self.product_id} units={self.units}>"
@@ -0,0 +1,12 @@
+from app import db
+
+class SchedulerLease(db.Model):
+    """Lease row cho leader election: process giữ lease còn hạn là leader."""
+    __tablename__ = "scheduler_leases"
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    heartbeat_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SchedulerLease {self.name} owner={self.owner}>"
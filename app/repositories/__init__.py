@@ -4,9 +4,23 @@ from .base_repository import BaseRepository
 from .product_repository import ProductRepository
 from .inventory_repository import InventoryRepository
 from .order_repository import OrderRepository
+from .user_repository import UserRepository
+from .counter_repository import CounterRepository
+from .sales_rollup_repository import SalesRollupRepository
+from .replenishment_repository import ReplenishmentRepository
+from .recommendation_repository import RecommendationRepository
+from .product_stats_repository import ProductStatsRepository
+from .category_repository import CategoryRepository
 
 __all__ = [
     "ProductRepository",
     "InventoryRepository",
-    "OrderRepository"
+    "OrderRepository",
+    "UserRepository",
+    "CounterRepository",
+    "SalesRollupRepository",
+    "ReplenishmentRepository",
+    "RecommendationRepository",
+    "ProductStatsRepository",
+    "CategoryRepository"
 ]
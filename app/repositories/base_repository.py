@@ -1,5 +1,14 @@
 # repositories/base_repository.py
+from sqlalchemy import func, text
+
 from app import db
+from app.utils.cache import TTLCache
+
+# Cache COUNT(*) cho các trang danh sách admin (key = bảng + bộ lọc)
+_count_cache = TTLCache(maxsize=1024, ttl=30)
+
+# Bảng lớn hơn ngưỡng này thì dùng số row ước lượng từ thống kê của MySQL
+APPROX_COUNT_THRESHOLD = 100_000
 
 class BaseRepository:
     def __init__(self, model, session=None):
@@ -34,3 +43,88 @@ class BaseRepository:
         self.session.delete(instance)
         self.session.commit()
         return True
+
+    # ========================================
+    # ✅ PAGINATION + COUNT CACHING
+    # ========================================
+
+    def paginate_rows(self, query, page, per_page, filters=None):
+        """
+        LIMIT/OFFSET trên query đã project cột.
+        Returns: (rows, total_count, total_pages) — total_count được cache ngắn hạn.
+        """
+        page, per_page = max(1, page), max(1, per_page)
+        total = self.cached_count(query, filters or {})
+        rows = query.offset((page - 1) * per_page).limit(per_page).all()
+        total_pages = (total + per_page - 1) // per_page
+        return rows, total, total_pages
+
+    def cached_count(self, query, filters):
+        key = (self.model.__tablename__, tuple(sorted((k, v) for k, v in filters.items() if v not in (None, ''))))
+        if not key[1]:
+            return _count_cache.get_or_set(key, self.estimated_count)
+        return _count_cache.get_or_set(
+            key,
+            lambda: query.order_by(None).with_entities(func.count(self._pk())).scalar() or 0
+        )
+
+    def _pk(self):
+        return self.model.__mapper__.primary_key[0]
+
+    def estimated_count(self):
+        """
+        Tổng số row không filter. Với MySQL và bảng lớn, đọc TABLE_ROWS
+        từ information_schema thay vì COUNT(*) (không scan bảng, sai số vài %).
+        """
+        if self.session.get_bind().dialect.name == 'mysql':
+            estimate = self.session.execute(
+                text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+                ),
+                {"table": self.model.__tablename__}
+            ).scalar()
+            if estimate and estimate > APPROX_COUNT_THRESHOLD:
+                return int(estimate)
+        return self.session.query(func.count(self._pk())).scalar() or 0
+
+    # ========================================
+    # ✅ UPSERT
+    # ========================================
+
+    def upsert_increment(self, rows, key_columns, increment_columns, model=None, replace_columns=()):
+        """
+        INSERT ... ON DUPLICATE KEY UPDATE col = col + VALUES(col) (MySQL)
+        hoặc ON CONFLICT DO UPDATE (SQLite / PostgreSQL), 1 statement cho cả batch.
+        - rows: list dict gồm key_columns + increment_columns (+ cột khác chỉ ghi khi insert)
+        - replace_columns: cột bị ghi đè bằng giá trị mới khi trùng key (vd updated_at)
+        Không commit; caller quyết định transaction.
+        """
+        if not rows:
+            return 0
+        table = (model or self.model).__table__
+        dialect = self.session.get_bind().dialect.name
+
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(rows)
+            stmt = stmt.on_duplicate_key_update({
+                **{col: table.c[col] + stmt.inserted[col] for col in increment_columns},
+                **{col: stmt.inserted[col] for col in replace_columns},
+            })
+        else:
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={
+                    **{col: table.c[col] + stmt.excluded[col] for col in increment_columns},
+                    **{col: stmt.excluded[col] for col in replace_columns},
+                },
+            )
+
+        self.session.execute(stmt)
+        return len(rows)
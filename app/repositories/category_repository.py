@@ -0,0 +1,253 @@
+# app/repositories/category_repository.py
+from sqlalchemy import case, func, insert, update
+
+from .base_repository import BaseRepository
+from app.models.category import Category
+from app.models.category_closure import CategoryClosure
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.services.category_tree import build_tree, closure_rows, move_rows
+from app.utils.cache import TTLCache
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# category_id -> tuple id của cả cây con (gồm chính nó). Xoá ngay trong process khi cây đổi,
+# worker khác thấy thay đổi sau tối đa ttl giây.
+_subtree_cache = TTLCache(maxsize=4096, ttl=60)
+
+
+class CategoryRepository(BaseRepository):
+    """
+    ✅ Category dạng cây, quan hệ tổ tiên / con cháu lưu ở closure table.
+    - Tạo: thêm (X, X, 0) + (tổ tiên của cha, X, depth + 1)
+    - Move: xoá liên kết giữa cây con và tổ tiên cũ bên ngoài, thêm tích chéo với tổ tiên mới
+    - Cây con của 1 category: 1 lookup theo ancestor_id (PK), cache trong bộ nhớ
+    """
+
+    def __init__(self, session=None):
+        super().__init__(Category, session)
+
+    def get_by_name(self, name):
+        return self.session.query(Category).filter_by(name=name).first()
+
+    # ========================================
+    # ✅ TREE QUERIES
+    # ========================================
+
+    def get_subtree_ids(self, category_id):
+        """Id của category và mọi con cháu (tuple, cache trong bộ nhớ)."""
+        return _subtree_cache.get_or_set(category_id, lambda: self._load_subtree_ids(category_id))
+
+    def _load_subtree_ids(self, category_id):
+        rows = (
+            self.session.query(CategoryClosure.descendant_id)
+            .filter(CategoryClosure.ancestor_id == category_id)
+            .all()
+        )
+        if rows:
+            return tuple(sorted(row[0] for row in rows))
+        # Category tạo trước khi có closure (chưa chạy `flask catalog rebuild-categories`):
+        # tính cây con từ parent_id (bảng categories nhỏ) để không trả về trang rỗng
+        parents = dict(self.session.query(Category.id, Category.parent_id).all())
+        if category_id in parents:
+            logger.warning(f"Category {category_id} has no closure rows; run `flask catalog rebuild-categories`")
+        subtree = {descendant for ancestor, descendant, _ in closure_rows(parents) if ancestor == category_id}
+        return tuple(sorted(subtree)) or (category_id,)
+
+    def get_ancestors(self, category_id):
+        """Breadcrumb từ gốc xuống category (không gồm chính nó)."""
+        return (
+            self.session.query(Category)
+            .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+            .filter(CategoryClosure.descendant_id == category_id, CategoryClosure.depth > 0)
+            .order_by(CategoryClosure.depth.desc())
+            .all()
+        )
+
+    def get_children(self, category_id):
+        return self.session.query(Category).filter_by(parent_id=category_id).order_by(Category.name).all()
+
+    def get_tree(self):
+        """Toàn bộ cây category (list node gốc, mỗi node có children)."""
+        rows = self.session.query(Category.id, Category.name, Category.parent_id).all()
+        return build_tree([{"id": r.id, "name": r.name, "parent_id": r.parent_id} for r in rows])
+
+    # ========================================
+    # ✅ COUNTS (product_count / in_stock_count)
+    # ========================================
+
+    def get_listing_rows(self):
+        """Toàn bộ category kèm số đếm, sort theo name (nguồn của cache listing)."""
+        rows = (
+            self.session.query(
+                Category.id, Category.name, Category.parent_id,
+                Category.product_count, Category.in_stock_count,
+            )
+            .order_by(Category.name, Category.id)
+            .all()
+        )
+        return [
+            {"id": r.id, "name": r.name, "parent_id": r.parent_id,
+             "product_count": r.product_count or 0, "in_stock_count": r.in_stock_count or 0}
+            for r in rows
+        ]
+
+    def has_products(self, category_id):
+        category = self.get_by_id(category_id)
+        if category is not None and category.product_count:
+            return True
+        # Counter có thể lệch tới lần reconcile sau; xoá category sẽ cascade xoá sản phẩm nên kiểm tra thật
+        return self.session.query(Product.id).filter(Product.category_id == category_id).first() is not None
+
+    def adjust_counts(self, deltas, connection=None):
+        """
+        deltas: {category_id: (product_delta, in_stock_delta)} -> UPDATE x = x + delta (atomic).
+        connection: dùng khi gọi trong flush event.
+        """
+        execute = (connection or self.session).execute
+        for category_id, (products, in_stock) in sorted(deltas.items()):
+            execute(
+                update(Category.__table__)
+                .where(Category.__table__.c.id == category_id)
+                .values(
+                    product_count=Category.__table__.c.product_count + products,
+                    in_stock_count=Category.__table__.c.in_stock_count + in_stock,
+                )
+            )
+
+    def count_products(self, product_ids):
+        """Số đếm của các sản phẩm theo category (trước khi xoá hàng loạt): {category_id: (products, in_stock)}."""
+        return self._actual_counts(Product.id.in_(list(product_ids)))
+
+    def _actual_counts(self, *criteria):
+        rows = (
+            self.session.query(
+                Product.category_id,
+                func.count(Product.id),
+                func.sum(case((Inventory.quantity > 0, 1), else_=0)),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .filter(*criteria)
+            .group_by(Product.category_id)
+            .all()
+        )
+        return {category_id: (int(count), int(in_stock or 0)) for category_id, count, in_stock in rows}
+
+    def reconcile_counts(self):
+        """
+        Tính lại số đếm từ products + inventory, chỉ sửa category bị lệch. Return: số category đã sửa.
+        Lock các row category (FOR UPDATE, theo id) trước khi đếm: transaction đang cộng / trừ counter
+        (flush hook) phải commit xong trước, transaction tới sau chờ reconcile commit -> không mất cập nhật.
+        Ghi bằng x = x + (đúng - đang thấy) thay vì ghi đè.
+        """
+        seen = self.session.query(
+            Category.id, Category.product_count, Category.in_stock_count
+        ).order_by(Category.id).with_for_update().all()
+        actual = self._actual_counts()
+        deltas = {}
+        for category_id, products, in_stock in seen:
+            expected = actual.get(category_id, (0, 0))
+            delta = (expected[0] - (products or 0), expected[1] - (in_stock or 0))
+            if delta != (0, 0):
+                deltas[category_id] = delta
+        if deltas:
+            self.adjust_counts(deltas)
+        self.session.commit()
+        return len(deltas)
+
+    # ========================================
+    # ✅ WRITE
+    # ========================================
+
+    def create_category(self, name, description=None, parent_id=None):
+        if parent_id is not None and self.get_by_id(parent_id) is None:
+            raise ValueError("Parent category not found")
+        category = Category(name=name, description=description, parent_id=parent_id)
+        self.session.add(category)
+        self.session.flush()
+
+        rows = [(category.id, category.id, 0)]
+        if parent_id is not None:
+            rows += move_rows(self._ancestors_with_depth(parent_id), [(category.id, 0)])
+        self._insert_rows(rows)
+        self.session.commit()
+        _subtree_cache.clear()
+        return category
+
+    def move(self, category_id, new_parent_id):
+        """Đổi cha của category (None = thành gốc), cập nhật closure cho cả cây con."""
+        category = self.get_by_id(category_id)
+        if category is None:
+            raise ValueError("Category not found")
+        if new_parent_id == category.parent_id:
+            return category
+        if new_parent_id is not None and self.get_by_id(new_parent_id) is None:
+            raise ValueError("Parent category not found")
+
+        subtree = (
+            self.session.query(CategoryClosure.descendant_id, CategoryClosure.depth)
+            .filter(CategoryClosure.ancestor_id == category_id)
+            .all()
+        ) or [(category_id, 0)]
+        subtree_ids = [row[0] for row in subtree]
+        if new_parent_id in subtree_ids:
+            raise ValueError("Cannot move a category under itself or its descendants")
+
+        # Chỉ bỏ liên kết từ tổ tiên cũ (ngoài cây con) tới các node trong cây con
+        (
+            self.session.query(CategoryClosure)
+            .filter(
+                CategoryClosure.descendant_id.in_(subtree_ids),
+                CategoryClosure.ancestor_id.notin_(subtree_ids),
+            )
+            .delete(synchronize_session=False)
+        )
+        if new_parent_id is not None:
+            self._insert_rows(move_rows(self._ancestors_with_depth(new_parent_id), [tuple(r) for r in subtree]))
+
+        category.parent_id = new_parent_id
+        self.session.commit()
+        _subtree_cache.clear()
+        return category
+
+    def delete_category(self, category_id):
+        """Chỉ xoá được category lá; closure của nó bị xoá cùng."""
+        category = self.get_by_id(category_id)
+        if category is None:
+            return False
+        if self.session.query(Category.id).filter_by(parent_id=category_id).first():
+            raise ValueError("Cannot delete category with child categories")
+        self.session.query(CategoryClosure).filter(
+            (CategoryClosure.descendant_id == category_id) | (CategoryClosure.ancestor_id == category_id)
+        ).delete(synchronize_session=False)
+        self.session.delete(category)
+        self.session.commit()
+        _subtree_cache.clear()
+        return True
+
+    def rebuild_closure(self):
+        """Dựng lại closure từ parent_id (backfill category cũ / sửa lệch). Return: số dòng."""
+        parents = dict(self.session.query(Category.id, Category.parent_id).all())
+        rows = closure_rows(parents)
+        self.session.query(CategoryClosure).delete(synchronize_session=False)
+        self._insert_rows(rows)
+        self.session.commit()
+        _subtree_cache.clear()
+        return len(rows)
+
+    def _ancestors_with_depth(self, category_id):
+        rows = (
+            self.session.query(CategoryClosure.ancestor_id, CategoryClosure.depth)
+            .filter(CategoryClosure.descendant_id == category_id)
+            .all()
+        )
+        return [tuple(row) for row in rows] or [(category_id, 0)]
+
+    def _insert_rows(self, rows):
+        if rows:
+            self.session.execute(
+                insert(CategoryClosure),
+                [{"ancestor_id": a, "descendant_id": d, "depth": depth} for a, d, depth in rows],
+            )
@@ -0,0 +1,96 @@
+# app/repositories/counter_repository.py
+import random
+from datetime import datetime
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from .base_repository import BaseRepository
+from app.models.dashboard_counter import DashboardCounter
+
+# Số row (slot) của mỗi counter: N checkout đồng thời chia lock ra COUNTER_SHARDS row thay vì 1
+COUNTER_SHARDS = 16
+
+class CounterRepository(BaseRepository):
+    """
+    ✅ Bộ đếm dashboard. Các method chỉ flush, commit do caller quyết định
+    để counter luôn đi cùng transaction với dữ liệu gốc.
+    - increment(): cộng vào 1 slot ngẫu nhiên của counter
+    - get_values(): SUM các slot theo name
+    """
+
+    def __init__(self, session=None, shards=COUNTER_SHARDS):
+        super().__init__(DashboardCounter, session)
+        self.shards = shards
+
+    def increment(self, name, delta=1, slot=None):
+        """UPDATE value = value + delta (atomic) trên 1 slot; tạo row nếu chưa có."""
+        if not delta:
+            return
+        if slot is None:
+            slot = random.randrange(self.shards)
+        stmt = (
+            update(DashboardCounter)
+            .where(DashboardCounter.name == name, DashboardCounter.slot == slot)
+            .values(value=DashboardCounter.value + delta, updated_at=datetime.utcnow())
+        )
+        if self.session.execute(stmt).rowcount:
+            return
+
+        try:
+            with self.session.begin_nested():
+                self.session.add(DashboardCounter(name=name, slot=slot, value=delta))
+        except IntegrityError:
+            # Process khác vừa tạo row -> cộng dồn vào row đó
+            self.session.execute(stmt)
+
+    def increment_many(self, deltas):
+        for name, delta in deltas.items():
+            self.increment(name, delta)
+
+    def get_values(self, names=None):
+        """Return: {name: tổng các slot} (mặc định tất cả counter)."""
+        query = self.session.query(DashboardCounter.name, func.sum(DashboardCounter.value)).group_by(DashboardCounter.name)
+        if names is not None:
+            query = query.filter(DashboardCounter.name.in_(list(names)))
+        return {name: value for name, value in query.all()}
+
+    def lock(self, name):
+        """
+        SELECT ... FOR UPDATE trên row slot 0 của `name` (tạo nếu chưa có), giữ tới hết transaction.
+        Dùng làm mutex giữa các process (vd: chỉ 1 reconcile chạy cùng lúc).
+        """
+        query = self.session.query(DashboardCounter).filter_by(name=name, slot=0).with_for_update()
+        if query.first() is None:
+            try:
+                with self.session.begin_nested():
+                    self.session.add(DashboardCounter(name=name, slot=0, value=0))
+            except IntegrityError:
+                pass
+            query.first()
+
+    # ========================================
+    # ✅ ORDER HELPERS
+    # ========================================
+
+    @staticmethod
+    def day_key(day=None):
+        return f"orders:day:{(day or datetime.utcnow()).strftime('%Y-%m-%d')}"
+
+    def record_order_created(self, status, total_amount, created_at=None):
+        self.increment_many({
+            "orders": 1,
+            f"orders:{status}": 1,
+            f"revenue:{status}": total_amount,
+            self.day_key(created_at): 1,
+        })
+
+    def record_order_status_change(self, old_status, new_status, total_amount):
+        if old_status == new_status:
+            return
+        self.increment_many({
+            f"orders:{old_status}": -1,
+            f"revenue:{old_status}": -total_amount,
+            f"orders:{new_status}": 1,
+            f"revenue:{new_status}": total_amount,
+        })
@@ -1,6 +1,11 @@
 # app/repositories/order_repository.py
+from datetime import datetime
+
 from .base_repository import BaseRepository
-from app.models.order import Order, OrderItem
+from .counter_repository import CounterRepository
+from .sales_rollup_repository import SalesRollupRepository
+from app.models.order import Order, OrderItem, OrderStatus, REVENUE_STATUSES
+from app.models.user import User
 
 class OrderRepository(BaseRepository):
     def __init__(self, session=None):
@@ -28,6 +33,13 @@ class OrderRepository(BaseRepository):
         order = self.get_order_with_items(order_id)
         if not order:
             raise ValueError(f"Order {order_id} not found")
+        CounterRepository(self.session).record_order_status_change(order.status, status, order.total_amount)
+        if status == OrderStatus.PAID.value and order.paid_at is None:
+            order.paid_at = datetime.utcnow()
+        was_paid, now_paid = order.status in REVENUE_STATUSES, status in REVENUE_STATUSES
+        if now_paid != was_paid:
+            # Vào / rời nhóm trạng thái tính doanh thu (thanh toán, huỷ / hoàn tiền đơn đã trả)
+            SalesRollupRepository(self.session).record_order(order, sign=1 if now_paid else -1)
         order.status = status
         self.session.flush()
         return order
@@ -37,7 +49,47 @@ class OrderRepository(BaseRepository):
 
     def get_order_with_items(self, order_id):
         return self.session.query(Order).filter_by(id=order_id).first()
+
+    def get_order_for_update(self, order_id):
+        """Lock row order (SELECT FOR UPDATE) để 2 process không cùng xử lý 1 order."""
+        return self.session.query(Order).filter_by(id=order_id).with_for_update().first()
     
     def get_pending_orders(self):
         """Lấy tất cả order có status PENDING"""
-        return self.session.query(Order).filter(Order.status == "PENDING").all()
+        return self.session.query(Order).filter(Order.status == OrderStatus.PENDING.value).all()
+
+    def get_overdue_pending_ids(self, cutoff, limit=500):
+        """Id các order PENDING tạo trước cutoff (cũ nhất trước) — job quét order quá hạn."""
+        rows = (
+            self.session.query(Order.id)
+            .filter(Order.status == OrderStatus.PENDING.value, Order.created_at < cutoff)
+            .order_by(Order.created_at)
+            .limit(limit)
+            .all()
+        )
+        return [row.id for row in rows]
+
+    ADMIN_SORTABLE = {"id", "created_at", "total_amount", "status"}
+
+    def get_admin_page(self, page=1, per_page=15, sort='id', desc=True, status=None, user_id=None):
+        """
+        Trang danh sách order cho admin (kèm username), chỉ project cột hiển thị.
+        Returns: (rows, total_count, total_pages)
+        """
+        query = (
+            self.session.query(
+                Order.id, Order.user_id, User.username, Order.total_amount,
+                Order.status, Order.created_at,
+            )
+            .outerjoin(User, User.id == Order.user_id)
+        )
+
+        if status:
+            query = query.filter(Order.status == status)
+        if user_id:
+            query = query.filter(Order.user_id == user_id)
+
+        column = getattr(Order, sort if sort in self.ADMIN_SORTABLE else 'id')
+        query = query.order_by(column.desc() if desc else column, Order.id.desc() if desc else Order.id)
+
+        return self.paginate_rows(query, page, per_page, {"status": status, "user_id": user_id})
@@ -1,8 +1,12 @@
 # app/repositories/product_repository.py
 from .base_repository import BaseRepository
+from .counter_repository import CounterRepository
+from .category_repository import CategoryRepository
 from app.models.product import Product
 from app.models.inventory import Inventory
+from app.models.category import Category
 from app import db
+from sqlalchemy.orm import joinedload, load_only
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,10 +43,10 @@ class ProductRepository(BaseRepository):
             logger.warning(f"Invalid order_by column: {order_by}, using default 'id'")
             return self.session.query(self.model).order_by(self.model.id.desc()).all()
 
-    def get_all_with_inventory(self, order_by='id', desc=True):
-        """Get all products (inventory sẽ lazy load khi cần)."""
+    def get_all_with_inventory(self, order_by='id', desc=True, fields=None):
+        """Get all products kèm inventory (JOIN cùng query), fields: sparse fieldset."""
         column = getattr(self.model, order_by, self.model.id)
-        query = self.session.query(self.model)
+        query = self._load_fields(self.session.query(self.model), fields, with_inventory=True)
         
         if desc:
             query = query.order_by(column.desc())
@@ -55,9 +59,114 @@ class ProductRepository(BaseRepository):
         """Get product by SKU."""
         return self.session.query(self.model).filter_by(sku=sku).first()
 
-    def get_by_id_with_inventory(self, product_id):
-        """Get product (inventory sẽ lazy load khi access product.inventory)."""
-        return self.session.query(self.model).filter_by(id=product_id).first()
+    def get_by_id_with_inventory(self, product_id, fields=None):
+        """Get product kèm inventory (JOIN cùng query), fields: sparse fieldset."""
+        query = self._load_fields(self.session.query(self.model), fields, with_inventory=True)
+        return query.filter(self.model.id == product_id).first()
+
+    def get_by_ids(self, product_ids, fields=None, with_inventory=False):
+        """Lấy nhiều product theo id trong 1 query, giữ nguyên thứ tự của product_ids."""
+        if not product_ids:
+            return []
+        query = self._load_fields(self.session.query(self.model), fields, with_inventory)
+        products = query.filter(self.model.id.in_(product_ids)).all()
+        by_id = {p.id: p for p in products}
+        return [by_id[pid] for pid in product_ids if pid in by_id]
+
+    def get_rows(self, fields=None, product_ids=None, category_id=None, order_by='id', desc=True):
+        """
+        Dict theo field trực tiếp từ row tuple (không dựng ORM object / to_dict) cho list view lớn.
+        - fields: mặc định Product.FIELDS (= to_dict(include_stock=True)); giá trị giữ nguyên kiểu DB
+          (Decimal, datetime) để JSON provider encode
+        - product_ids: giữ thứ tự của list; category_id: gồm cả category con cháu
+        """
+        fields = fields or Product.FIELDS
+        if product_ids is not None and not product_ids:
+            return []
+        criteria = [Product.id.in_(product_ids)] if product_ids is not None else []
+        query = self._rows_query(fields, category_id, None if product_ids is not None else order_by, desc, criteria)
+
+        rows = [dict(zip(fields, row)) for row in query]
+        if product_ids is not None:
+            by_id = {row["id"]: row for row in rows}
+            rows = [by_id[pid] for pid in product_ids if pid in by_id]
+        return rows
+
+    def iter_rows(self, fields=None, category_id=None, order_by='id', desc=True, stock_criteria=(), batch_size=1000):
+        """
+        Như get_rows nhưng stream: yield từng dict, DB trả theo batch (server-side cursor với yield_per)
+        -> bộ nhớ không tăng theo kích thước catalog.
+        - stock_criteria: điều kiện trên Inventory (report tồn kho), sản phẩm chưa có inventory bị loại
+        """
+        fields = fields or Product.FIELDS
+        query = self._rows_query(fields, category_id, order_by, desc, stock_criteria, join_inventory=bool(stock_criteria))
+        for row in query.yield_per(batch_size):
+            yield dict(zip(fields, row))
+
+    def iter_low_stock_rows(self, threshold=10, fields=None, batch_size=1000):
+        """Stream của get_low_stock_products (0 < quantity < threshold), sort theo id."""
+        return self.iter_rows(
+            fields, order_by='id', desc=False, batch_size=batch_size,
+            stock_criteria=(Inventory.quantity < threshold, Inventory.quantity > 0),
+        )
+
+    def iter_out_of_stock_rows(self, fields=None, batch_size=1000):
+        """Stream của get_out_of_stock_products (quantity = 0), sort theo id."""
+        return self.iter_rows(
+            fields, order_by='id', desc=False, batch_size=batch_size,
+            stock_criteria=(Inventory.quantity == 0,),
+        )
+
+    def _rows_query(self, fields, category_id=None, order_by='id', desc=True, criteria=(), join_inventory=False):
+        query = self.session.query(*self._row_columns(fields))
+        if join_inventory or any(f in Product.STOCK_FIELDS for f in fields):
+            query = query.outerjoin(Inventory, Inventory.product_id == Product.id)
+        if criteria:
+            query = query.filter(*criteria)
+        if category_id is not None:
+            query = query.filter(self._in_subtree(category_id))
+        if order_by is not None:
+            order_by = order_by if order_by in self.ADMIN_SORTABLE else 'id'
+            columns = [getattr(Product, order_by)] + ([Product.id] if order_by != 'id' else [])
+            # id làm tie-breaker để thứ tự ổn định khi stream
+            query = query.order_by(*(c.desc() if desc else c for c in columns))
+        return query
+
+    def _in_subtree(self, category_id):
+        """
+        Điều kiện category_id thuộc cây con (id cây con lấy từ cache của CategoryRepository,
+        cùng nguồn với CatalogEngine -> đường SQL và đường bộ nhớ cho cùng kết quả).
+        """
+        return Product.category_id.in_(CategoryRepository(self.session).get_subtree_ids(category_id))
+
+    @staticmethod
+    def _row_columns(fields):
+        quantity = db.func.coalesce(Inventory.quantity, 0)
+        reserved = db.func.coalesce(Inventory.reserved_quantity, 0)
+        stock_columns = {
+            "stock": quantity,
+            "available_stock": db.case((quantity > reserved, quantity - reserved), else_=0),
+            "reserved_stock": reserved,
+        }
+        return [
+            getattr(Product, f) if f in Product.COLUMN_FIELDS else stock_columns[f].label(f)
+            for f in fields
+        ]
+
+    def _load_fields(self, query, fields=None, with_inventory=False):
+        """
+        Sparse fieldset: chỉ SELECT các cột cần cho `fields` (Product.to_dict(fields=...)).
+        Inventory được JOIN cùng query (thay vì lazy load từng sản phẩm) khi cần field tồn kho.
+        """
+        if fields is not None:
+            columns = [getattr(Product, f) for f in fields if f in Product.COLUMN_FIELDS]
+            query = query.options(load_only(*(columns or [Product.id])))
+            with_inventory = any(f in Product.STOCK_FIELDS for f in fields)
+        if with_inventory:
+            query = query.options(
+                joinedload(Product.inventory).load_only(Inventory.quantity, Inventory.reserved_quantity)
+            )
+        return query
 
     def get_total_count(self):
         """
@@ -75,10 +184,32 @@ class ProductRepository(BaseRepository):
             .all()
         )
 
-    def get_by_category(self, category_id, order_by='name', desc=False):
-        """Get all products in a category."""
+    def search_ids_by_name(self, name, limit=10000):
+        """Id của mọi sản phẩm khớp tên (cho faceted search), tối đa `limit`."""
+        rows = (
+            self.session.query(self.model.id)
+            .filter(self.model.name.ilike(f'%{name}%'))
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def get_by_category(self, category_id, order_by='name', desc=False, include_descendants=True,
+                        fields=None, with_inventory=False):
+        """
+        Get all products in a category.
+        - include_descendants: gồm cả sản phẩm của category con cháu (category_id IN cây con)
+        - fields / with_inventory: như get_by_ids
+        """
         column = getattr(self.model, order_by, self.model.id)
-        query = self.session.query(self.model).filter_by(category_id=category_id)
+        if include_descendants:
+            query = (
+                self._load_fields(self.session.query(self.model), fields, with_inventory)
+                .filter(self._in_subtree(category_id))
+            )
+        else:
+            query = self._load_fields(self.session.query(self.model), fields, with_inventory)
+            query = query.filter(self.model.category_id == category_id)
         
         if desc:
             query = query.order_by(column.desc())
@@ -96,6 +227,19 @@ class ProductRepository(BaseRepository):
             .all()
         )
 
+    def get_in_stock_ids(self, product_ids, batch_size=1000):
+        """Các id (trong product_ids) còn hàng (quantity > 0), IN theo từng batch."""
+        product_ids = list(product_ids)
+        in_stock = set()
+        for start in range(0, len(product_ids), batch_size):
+            rows = (
+                self.session.query(Inventory.product_id)
+                .filter(Inventory.product_id.in_(product_ids[start:start + batch_size]), Inventory.quantity > 0)
+                .all()
+            )
+            in_stock.update(product_id for product_id, in rows)
+        return in_stock
+
     def get_low_stock_products(self, threshold=10):
         """Get products with stock below threshold."""
         return (
@@ -115,6 +259,53 @@ class ProductRepository(BaseRepository):
             .all()
         )
 
+    def iter_catalog_rows(self, batch_size=50000):
+        """
+        Cột cho CatalogEngine, sort theo id, stream theo batch.
+        Yield: (id, name, price, category_id, created_at, quantity, reserved_quantity, sku)
+        """
+        return (
+            self.session.query(
+                Product.id, Product.name, Product.price, Product.category_id, Product.created_at,
+                Inventory.quantity, Inventory.reserved_quantity, Product.sku,
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .order_by(Product.id)
+            .yield_per(batch_size)
+        )
+
+    def iter_export_rows(self, since=None, batch_size=1000):
+        """
+        Dòng cho export feed, sort theo id, stream theo batch (yield_per).
+        - since: chỉ sản phẩm có products.updated_at hoặc inventory.updated_at >= since
+        Yield: (id, sku, name, description, price, category_id, category_name,
+                stock, available_stock, created_at, updated_at)
+        """
+        quantity = db.func.coalesce(Inventory.quantity, 0)
+        reserved = db.func.coalesce(Inventory.reserved_quantity, 0)
+        # Mốc mới hơn của 2 bảng; greatest() không có trên SQLite và xử lý NULL khác nhau giữa các DB
+        updated_at = db.case(
+            (Inventory.updated_at > Product.updated_at, Inventory.updated_at),
+            else_=Product.updated_at,
+        )
+        query = (
+            self.session.query(
+                Product.id, Product.sku, Product.name, Product.description, Product.price,
+                Product.category_id, Category.name,
+                quantity, db.case((quantity > reserved, quantity - reserved), else_=0),
+                Product.created_at, updated_at,
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .outerjoin(Category, Category.id == Product.category_id)
+        )
+        if since is not None:
+            query = query.filter(db.or_(Product.updated_at >= since, Inventory.updated_at >= since))
+        return query.order_by(Product.id).yield_per(batch_size)
+
+    def get_db_now(self):
+        """Giờ hiện tại theo DB (cùng đồng hồ với updated_at), dùng làm cursor export."""
+        return self.session.query(db.func.now()).scalar()
+
     # ========================================
     # ✅ CREATE METHODS
     # ========================================
@@ -157,6 +348,7 @@ class ProductRepository(BaseRepository):
                 reserved_quantity=0
             )
             self.session.add(inventory)
+            CounterRepository(self.session).increment("products", 1)
             self.session.commit()
             
             logger.info(f"Created product {product.id} with inventory stock={initial_stock}")
@@ -224,6 +416,7 @@ class ProductRepository(BaseRepository):
                 return False
             
             self.session.delete(product)
+            CounterRepository(self.session).increment("products", -1)
             self.session.commit()
             
             logger.info(f"Deleted product {product_id}")
@@ -235,13 +428,18 @@ class ProductRepository(BaseRepository):
             raise
 
     def bulk_delete(self, product_ids):
-        """Delete multiple products at once."""
+        """Delete multiple products at once. Catalog engine do ProductService.bulk_delete_products cập nhật."""
         try:
+            # query.delete không đi qua flush -> tự trừ counter theo category
+            category_repo = CategoryRepository(self.session)
+            removed = category_repo.count_products(product_ids)
             deleted_count = (
                 self.session.query(self.model)
                 .filter(self.model.id.in_(product_ids))
                 .delete(synchronize_session=False)
             )
+            CounterRepository(self.session).increment("products", -deleted_count)
+            category_repo.adjust_counts({c: (-products, -in_stock) for c, (products, in_stock) in removed.items()})
             self.session.commit()
             
             logger.info(f"Bulk deleted {deleted_count} products")
@@ -256,6 +454,42 @@ class ProductRepository(BaseRepository):
     # ✅ PAGINATION (bonus)
     # ========================================
 
+    ADMIN_SORTABLE = {"id", "sku", "name", "price", "created_at"}
+
+    def get_admin_page(self, page=1, per_page=15, sort='id', desc=True,
+                       q=None, category_id=None, stock=None, low_stock_threshold=10):
+        """
+        Trang danh sách sản phẩm cho admin: LIMIT/OFFSET + chỉ project cột hiển thị.
+        - q: prefix của name hoặc SKU (dùng được index)
+        - stock: 'in' | 'low' | 'out'
+        Returns: (rows, total_count, total_pages)
+        """
+        stock_col = db.func.coalesce(Inventory.quantity, 0)
+        query = (
+            self.session.query(
+                Product.id, Product.sku, Product.name, Product.price,
+                Product.category_id, Product.created_at, Product.description,
+                stock_col.label("stock"),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+        )
+
+        if q:
+            query = query.filter(Product.name.like(f"{q}%") | Product.sku.like(f"{q}%"))
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        if stock == 'in':
+            query = query.filter(stock_col > 0)
+        elif stock == 'low':
+            query = query.filter(stock_col > 0, stock_col < low_stock_threshold)
+        elif stock == 'out':
+            query = query.filter(stock_col == 0)
+
+        column = getattr(Product, sort if sort in self.ADMIN_SORTABLE else 'id')
+        query = query.order_by(column.desc() if desc else column, Product.id.desc() if desc else Product.id)
+
+        return self.paginate_rows(query, page, per_page, {"q": q, "category_id": category_id, "stock": stock})
+
     def get_paginated(self, page=1, per_page=20, order_by='id', desc=True):
         """
         Get paginated products.
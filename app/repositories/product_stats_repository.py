@@ -0,0 +1,43 @@
+# app/repositories/product_stats_repository.py
+from datetime import datetime
+
+from .base_repository import BaseRepository
+from app.models.product import Product
+from app.models.product_stats import ProductStats
+
+
+class ProductStatsRepository(BaseRepository):
+    """✅ Lượt xem sản phẩm (product_stats), ghi theo batch từ ViewCounter."""
+
+    def __init__(self, session=None):
+        super().__init__(ProductStats, session)
+
+    def increment_views(self, deltas, batch_size=5000):
+        """
+        deltas: {product_id: views}. 1 upsert cho mỗi batch, không commit.
+        Bỏ qua product đã bị xoá (FK product_stats.product_id sẽ làm cả batch lỗi mãi).
+        Return: số product đã ghi.
+        """
+        now = datetime.utcnow()
+        product_ids = list(deltas)
+        written = 0
+        for i in range(0, len(product_ids), batch_size):
+            batch = product_ids[i:i + batch_size]
+            existing = {pid for (pid,) in self.session.query(Product.id).filter(Product.id.in_(batch))}
+            rows = [
+                {"product_id": pid, "views": deltas[pid], "updated_at": now}
+                for pid in batch if pid in existing
+            ]
+            if rows:
+                self.upsert_increment(rows, ("product_id",), ("views",), replace_columns=("updated_at",))
+            written += len(rows)
+        return written
+
+    def get_most_viewed(self, limit=20):
+        return (
+            self.session.query(Product.id, Product.sku, Product.name, ProductStats.views)
+            .join(Product, Product.id == ProductStats.product_id)
+            .order_by(ProductStats.views.desc())
+            .limit(limit)
+            .all()
+        )
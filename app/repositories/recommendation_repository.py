@@ -0,0 +1,180 @@
+# app/repositories/recommendation_repository.py
+import numpy as np
+from sqlalchemy import and_, insert, or_
+
+from .base_repository import BaseRepository
+from app.models.job_cursor import JobCursor
+from app.models.order import Order, OrderItem, REVENUE_STATUSES
+from app.models.product import Product
+from app.models.product_pair import ProductPairCount, RelatedProduct
+
+# Số id tối đa trong 1 mệnh đề IN
+IN_CHUNK = 1000
+
+
+def _chunks(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class RecommendationRepository(BaseRepository):
+    """
+    ✅ Dữ liệu cho "frequently bought together":
+    order lines đã thanh toán (đọc theo batch), product_pair_counts, related_products
+    và cursor của job incremental.
+    """
+
+    def __init__(self, session=None):
+        super().__init__(RelatedProduct, session)
+
+    # ========================================
+    # ✅ CURSOR
+    # ========================================
+
+    def get_cursor(self, name):
+        cursor = self.session.get(JobCursor, name)
+        if cursor is None:
+            cursor = JobCursor(name=name, position_id=0, processed=0)
+            self.session.add(cursor)
+            self.session.flush()
+        return cursor
+
+    # ========================================
+    # ✅ ORDER LINES
+    # ========================================
+
+    def get_paid_orders_after(self, after_at, after_id, until, limit):
+        """Order thanh toán trong (cursor, until), sort theo (paid_at, id). Return: list (id, paid_at)."""
+        query = (
+            self.session.query(Order.id, Order.paid_at)
+            .filter(Order.status.in_(REVENUE_STATUSES), Order.paid_at.isnot(None), Order.paid_at < until)
+        )
+        if after_at is not None:
+            query = query.filter(or_(
+                Order.paid_at > after_at,
+                and_(Order.paid_at == after_at, Order.id > after_id),
+            ))
+        return query.order_by(Order.paid_at, Order.id).limit(limit).all()
+
+    def get_historical_order_ids(self, after_id, until, limit):
+        """Keyset theo id cho rebuild: mọi order đã thanh toán trước `until` (kể cả chưa có paid_at)."""
+        rows = (
+            self.session.query(Order.id)
+            .filter(Order.status.in_(REVENUE_STATUSES), Order.id > after_id)
+            .filter(or_(Order.paid_at.is_(None), Order.paid_at < until))
+            .order_by(Order.id)
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def get_order_lines(self, order_ids):
+        """Return: (order_ids, product_ids) dạng mảng int64."""
+        orders, products = [], []
+        for chunk in _chunks(list(order_ids), IN_CHUNK):
+            for order_id, product_id in (
+                self.session.query(OrderItem.order_id, OrderItem.product_id)
+                .filter(OrderItem.order_id.in_(chunk))
+            ):
+                orders.append(order_id)
+                products.append(product_id)
+        return np.array(orders, dtype=np.int64), np.array(products, dtype=np.int64)
+
+    # ========================================
+    # ✅ PAIR COUNTS
+    # ========================================
+
+    def increment_pairs(self, keys, counts, batch_size=5000):
+        a, b = (keys >> 32).tolist(), (keys & 0xFFFFFFFF).tolist()
+        rows = [
+            {"product_a": x, "product_b": y, "count": c}
+            for x, y, c in zip(a, b, counts.tolist())
+        ]
+        for batch in _chunks(rows, batch_size):
+            self.upsert_increment(batch, ("product_a", "product_b"), ("count",), model=ProductPairCount)
+
+    def insert_pairs(self, keys, counts, batch_size=10000):
+        a, b = (keys >> 32).tolist(), (keys & 0xFFFFFFFF).tolist()
+        rows = [
+            {"product_a": x, "product_b": y, "count": c}
+            for x, y, c in zip(a, b, counts.tolist())
+        ]
+        for batch in _chunks(rows, batch_size):
+            self.session.execute(insert(ProductPairCount), batch)
+
+    def get_partner_ids(self, product_ids):
+        """product_ids + mọi sản phẩm từng mua cùng 1 trong số đó. Return: mảng int64 đã sort."""
+        ids = set(product_ids)
+        for chunk in _chunks(list(product_ids), IN_CHUNK):
+            for a, b in (
+                self.session.query(ProductPairCount.product_a, ProductPairCount.product_b)
+                .filter(or_(ProductPairCount.product_a.in_(chunk), ProductPairCount.product_b.in_(chunk)))
+            ):
+                ids.update((a, b))
+        return np.array(sorted(ids), dtype=np.int64)
+
+    def get_pairs_for(self, product_ids):
+        """
+        Mọi cặp có chứa 1 trong product_ids + support (đường chéo) của tất cả sản phẩm liên quan.
+        Return: (keys, counts) đã sort theo key.
+        """
+        keys, counts, partners = [], [], set()
+        for chunk in _chunks(list(product_ids), IN_CHUNK):
+            rows = (
+                self.session.query(ProductPairCount.product_a, ProductPairCount.product_b, ProductPairCount.count)
+                .filter(or_(ProductPairCount.product_a.in_(chunk), ProductPairCount.product_b.in_(chunk)))
+                .all()
+            )
+            for a, b, c in rows:
+                if a != b:
+                    keys.append((a << 32) | b)
+                    counts.append(c)
+                partners.update((a, b))
+
+        for chunk in _chunks(sorted(partners), IN_CHUNK):
+            for a, c in (
+                self.session.query(ProductPairCount.product_a, ProductPairCount.count)
+                .filter(ProductPairCount.product_a.in_(chunk), ProductPairCount.product_b == ProductPairCount.product_a)
+            ):
+                keys.append((a << 32) | a)
+                counts.append(c)
+
+        keys = np.array(keys, dtype=np.int64)
+        counts = np.array(counts, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], counts[order]
+
+    # ========================================
+    # ✅ RELATED PRODUCTS
+    # ========================================
+
+    def replace_related(self, product_ids, src, rank, dst, score, pair_count, batch_size=10000):
+        for chunk in _chunks(list(product_ids), IN_CHUNK):
+            (
+                self.session.query(RelatedProduct)
+                .filter(RelatedProduct.product_id.in_(chunk))
+                .delete(synchronize_session=False)
+            )
+        rows = [
+            {"product_id": s, "rank": r, "related_id": d, "score": sc, "pair_count": c}
+            for s, r, d, sc, c in zip(src.tolist(), rank.tolist(), dst.tolist(), score.tolist(), pair_count.tolist())
+        ]
+        for batch in _chunks(rows, batch_size):
+            self.session.execute(insert(RelatedProduct), batch)
+
+    def clear_all(self):
+        self.session.query(RelatedProduct).delete(synchronize_session=False)
+        self.session.query(ProductPairCount).delete(synchronize_session=False)
+
+    def get_related(self, product_id, limit=10):
+        return (
+            self.session.query(
+                Product.id, Product.sku, Product.name, Product.price, Product.category_id,
+                RelatedProduct.score, RelatedProduct.pair_count,
+            )
+            .join(Product, Product.id == RelatedProduct.related_id)
+            .filter(RelatedProduct.product_id == product_id)
+            .order_by(RelatedProduct.rank)
+            .limit(limit)
+            .all()
+        )
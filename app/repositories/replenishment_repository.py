@@ -0,0 +1,72 @@
+# app/repositories/replenishment_repository.py
+from sqlalchemy import func, insert
+
+from .base_repository import BaseRepository
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.product_replenishment import ProductReplenishment
+from app.models.sales_rollup import SalesDaily
+
+class ReplenishmentRepository(BaseRepository):
+    """
+    ✅ Đọc dữ liệu đầu vào (tồn kho, sales_daily) theo từng khối product_id
+    và ghi kết quả vào product_replenishment.
+    """
+
+    def __init__(self, session=None):
+        super().__init__(ProductReplenishment, session)
+
+    def get_stock_chunk(self, after_id, limit):
+        """Keyset theo product_id. Return: list (product_id, available) đã sort."""
+        available = func.coalesce(Inventory.quantity - Inventory.reserved_quantity, 0)
+        return (
+            self.session.query(Product.id, available)
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .filter(Product.id > after_id)
+            .order_by(Product.id)
+            .limit(limit)
+            .all()
+        )
+
+    def get_daily_units(self, first_id, last_id, since):
+        """Return: list (product_id, day, units) của các product trong [first_id, last_id]."""
+        return (
+            self.session.query(SalesDaily.product_id, SalesDaily.day, SalesDaily.units)
+            .filter(SalesDaily.product_id.between(first_id, last_id), SalesDaily.day >= since)
+            .all()
+        )
+
+    def delete_range(self, first_id, last_id):
+        (
+            self.session.query(ProductReplenishment)
+            .filter(ProductReplenishment.product_id.between(first_id, last_id))
+            .delete(synchronize_session=False)
+        )
+
+    def insert_many(self, rows):
+        if rows:
+            self.session.execute(insert(ProductReplenishment), rows)
+
+    def delete_orphans(self, last_id):
+        """Xoá kết quả của product id lớn hơn product cuối cùng (đã bị xoá)."""
+        (
+            self.session.query(ProductReplenishment)
+            .filter(ProductReplenishment.product_id > last_id)
+            .delete(synchronize_session=False)
+        )
+
+    def get_reorder_page(self, page=1, per_page=50, category_id=None):
+        """Sản phẩm cần đặt hàng, sắp xếp theo số ngày còn đủ hàng (ít nhất trước)."""
+        query = (
+            self.session.query(ProductReplenishment, Product.sku, Product.name, Product.category_id)
+            .join(Product, Product.id == ProductReplenishment.product_id)
+            .filter(ProductReplenishment.needs_reorder.is_(True))
+        )
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        query = query.order_by(
+            ProductReplenishment.days_of_cover.is_(None),
+            ProductReplenishment.days_of_cover,
+            ProductReplenishment.product_id,
+        )
+        return self.paginate_rows(query, page, per_page, {"needs_reorder": True, "category_id": category_id})
@@ -0,0 +1,159 @@
+# app/repositories/sales_rollup_repository.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from .base_repository import BaseRepository
+from app.models.order import Order, OrderItem, REVENUE_STATUSES
+from app.models.product import Product
+from app.models.sales_rollup import SalesDaily, SalesHourly
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class SalesRollupRepository(BaseRepository):
+    """
+    ✅ Rollup doanh số vào sales_daily / sales_hourly.
+
+    - record_order(): gọi khi order vào nhóm trạng thái tính doanh thu (REVENUE_STATUSES), cộng dồn
+      bằng upsert trong cùng transaction với việc đổi status; sign=-1 khi order rời nhóm đó
+      (huỷ / hoàn tiền) -> rollup luôn khớp với rebuild()
+    - rebuild(): xoá và tính lại 1 khoảng thời gian từ orders + order_items (backfill)
+    - get_series(): đọc time series đã group theo bucket cho analytics
+    """
+
+    def __init__(self, session=None):
+        super().__init__(SalesDaily, session)
+
+    # ========================================
+    # ✅ WRITE
+    # ========================================
+
+    def record_order(self, order, paid_at=None, sign=1):
+        # Cùng bucket với rebuild(): coalesce(paid_at, created_at)
+        paid_at = paid_at or order.paid_at or order.created_at or datetime.utcnow()
+        lines = (
+            self.session.query(OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.unit_price)
+            .join(Product, Product.id == OrderItem.product_id)
+            .filter(OrderItem.order_id == order.id)
+            .all()
+        )
+        return self._upsert(self._aggregate(
+            (paid_at, product_id, category_id, sign * quantity, unit_price)
+            for product_id, category_id, quantity, unit_price in lines
+        ))
+
+    def rebuild(self, since, until):
+        """
+        Tính lại rollup cho order thanh toán trong [since, until) (since/until: datetime,
+        nên là mốc đầu ngày). Xử lý từng ngày để giới hạn bộ nhớ và độ dài transaction.
+        Return: số order line đã đọc.
+        """
+        processed = 0
+        day = since
+        while day < until:
+            next_day = min(day + timedelta(days=1), until)
+            paid_at = func.coalesce(Order.paid_at, Order.created_at)
+
+            self.session.query(SalesDaily).filter(
+                SalesDaily.day >= day.date(), SalesDaily.day < next_day.date()
+            ).delete(synchronize_session=False)
+            self.session.query(SalesHourly).filter(
+                SalesHourly.hour >= day, SalesHourly.hour < next_day
+            ).delete(synchronize_session=False)
+
+            lines = (
+                self.session.query(paid_at, OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.unit_price)
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .join(Product, Product.id == OrderItem.product_id)
+                .filter(Order.status.in_(REVENUE_STATUSES), paid_at >= day, paid_at < next_day)
+                .yield_per(5000)
+            )
+            counted = [0]
+
+            def counting(rows):
+                for row in rows:
+                    counted[0] += 1
+                    yield row
+
+            # Gom trực tiếp từ cursor: bộ nhớ theo số (ngày|giờ, sản phẩm), không theo số order line
+            self._upsert(self._aggregate(counting(lines)))
+            self.session.commit()
+
+            processed += counted[0]
+            day = next_day
+        logger.info(f"Rebuilt sales rollups {since} -> {until}: {processed} order lines")
+        return processed
+
+    @staticmethod
+    def _aggregate(lines):
+        """(paid_at, product_id, category_id, quantity, unit_price) -> (daily, hourly) dict theo key."""
+        daily = defaultdict(lambda: [0, 0])
+        hourly = defaultdict(lambda: [0, 0])
+        for paid_at, product_id, category_id, quantity, unit_price in lines:
+            if isinstance(paid_at, str):  # SQLite trả coalesce() dạng chuỗi
+                paid_at = datetime.fromisoformat(paid_at)
+            revenue = unit_price * quantity
+            for bucket in (daily[(paid_at.date(), product_id, category_id)],
+                           hourly[(_hour(paid_at), product_id, category_id)]):
+                bucket[0] += quantity
+                bucket[1] += revenue
+        return daily, hourly
+
+    def _upsert(self, aggregated):
+        daily, hourly = aggregated
+        self.upsert_increment(
+            [{"day": d, "product_id": p, "category_id": c, "units": u, "revenue": r}
+             for (d, p, c), (u, r) in daily.items()],
+            key_columns=("day", "product_id"),
+            increment_columns=("units", "revenue"),
+            model=SalesDaily,
+        )
+        self.upsert_increment(
+            [{"hour": h, "product_id": p, "category_id": c, "units": u, "revenue": r}
+             for (h, p, c), (u, r) in hourly.items()],
+            key_columns=("hour", "product_id"),
+            increment_columns=("units", "revenue"),
+            model=SalesHourly,
+        )
+        return len(daily)
+
+    # ========================================
+    # ✅ READ
+    # ========================================
+
+    def get_series(self, start, end, granularity='day', product_id=None, category_id=None):
+        """
+        Tổng units / revenue theo bucket trong [start, end).
+        granularity: 'day' (sales_daily) | 'hour' (sales_hourly)
+        Return: list (bucket, units, revenue) đã sort theo bucket, chỉ bucket có dữ liệu.
+        """
+        if granularity == 'hour':
+            model, bucket, lo, hi = SalesHourly, SalesHourly.hour, start, end
+        else:
+            model, bucket, lo, hi = SalesDaily, SalesDaily.day, start.date(), end.date()
+
+        query = (
+            self.session.query(bucket, func.sum(model.units), func.sum(model.revenue))
+            .filter(bucket >= lo, bucket < hi)
+        )
+        if product_id:
+            query = query.filter(model.product_id == product_id)
+        if category_id:
+            query = query.filter(model.category_id == category_id)
+        return query.group_by(bucket).order_by(bucket).all()
+
+    def get_hourly_units(self, since):
+        """Return: list (hour, product_id, category_id, units) từ `since` (dựng bảng bestseller)."""
+        return (
+            self.session.query(SalesHourly.hour, SalesHourly.product_id, SalesHourly.category_id, SalesHourly.units)
+            .filter(SalesHourly.hour >= since)
+            .all()
+        )
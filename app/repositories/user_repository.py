@@ -0,0 +1,44 @@
+# app/repositories/user_repository.py
+from .base_repository import BaseRepository
+from .counter_repository import CounterRepository
+from app.models.user import User
+
+class UserRepository(BaseRepository):
+    SORTABLE = {"id", "username", "email", "created_at"}
+
+    def __init__(self, session=None):
+        super().__init__(User, session)
+
+    def get_by_email(self, email):
+        return self.session.query(User).filter_by(email=email).first()
+
+    def get_by_username(self, username):
+        return self.session.query(User).filter_by(username=username).first()
+
+    def create_user(self, username, email, password_hash, is_admin=False):
+        """Tạo user + cập nhật counter dashboard trong cùng transaction."""
+        user = User(username=username, email=email, is_admin=is_admin)
+        user.password_hash = password_hash
+        self.session.add(user)
+        CounterRepository(self.session).increment("users", 1)
+        self.session.commit()
+        return user
+
+    def get_admin_page(self, page=1, per_page=15, sort='id', desc=True, q=None, role=None):
+        """
+        Trang danh sách user cho admin, chỉ lấy các cột hiển thị.
+        - q: prefix của username hoặc email
+        - role: 'admin' | 'customer'
+        Returns: (rows, total_count, total_pages)
+        """
+        query = self.session.query(User.id, User.username, User.email, User.is_admin, User.created_at)
+
+        if q:
+            query = query.filter(User.username.like(f"{q}%") | User.email.like(f"{q}%"))
+        if role in ("admin", "customer"):
+            query = query.filter(User.is_admin.is_(role == "admin"))
+
+        column = getattr(User, sort if sort in self.SORTABLE else 'id')
+        query = query.order_by(column.desc() if desc else column, User.id.desc() if desc else User.id)
+
+        return self.paginate_rows(query, page, per_page, {"q": q, "role": role})
@@ -5,100 +5,91 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.order import Order
 from app.models.inventory_log import InventoryLog
-from app.utils.auth_helpers import get_current_user
+from app.utils.auth_helpers import get_current_principal
+from app.repositories import ProductRepository, OrderRepository, UserRepository
+from app.services.dashboard_metrics import DashboardMetricsService
 
 admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/index')
 @jwt_required(optional=True)
 def index():
-    user = get_current_user()
+    user = get_current_principal()
     if not user:
         return jsonify({'message': 'User not found'}), 404
     
-    # Get statistics using model methods
-    total_products = Product.get_total_count()
-    
-    # Check if Order model exists
-    try:
-        from models.order import Order
-        total_orders = Order.get_total_count()
-        total_revenue = Order.get_total_revenue()
-    except (ImportError, AttributeError):
-        total_orders = 0
-        total_revenue = 0
-    
-    # Check if User model exists
-    try:
-        total_users = User.get_total_count()
-    except (ImportError, AttributeError):
-        total_users = 0
-
-    return render_template('admin/index.html',
-                        user=user,
-                        total_products=total_products,
-                        total_orders=total_orders,
-                        total_revenue=total_revenue,
-                        total_users=total_users
-                        )
+    # Counter được duy trì incremental -> 1 lookup theo primary key
+    stats = DashboardMetricsService().get_summary()
+
+    return render_template('admin/index.html', user=user, **stats)
+
+PER_PAGE = 15
+
+
+def _list_params():
+    """Tham số chung cho các trang danh sách admin: page, sort, dir."""
+    return {
+        "page": max(1, request.args.get('page', 1, type=int)),
+        "sort": request.args.get('sort', 'id'),
+        "desc": request.args.get('dir', 'desc').lower() != 'asc',
+    }
+
 
 @admin_bp.route('/products')
 @admin_required
 def product_index():
-    user = get_current_user()
+    user = get_current_principal()
     if not user:
         return jsonify({'message': 'User not found'}), 404
-    page = request.args.get('page', 1, type=int)
-    per_page = 15  # Number of products per page
-    
-    # Get all products
-    all_products = Product.get_all()
-    
-    # Manual pagination
-    total = len(all_products)
-    start = (page - 1) * per_page
-    end = start + per_page
-    products = all_products[start:end]
-    
-    # Calculate total pages
-    total_pages = (total + per_page - 1) // per_page
-    
+
+    params = _list_params()
+    filters = {
+        "q": request.args.get('q', '').strip() or None,
+        "category_id": request.args.get('category_id', type=int),
+        "stock": request.args.get('stock') or None,
+    }
+
+    products, total, total_pages = ProductRepository().get_admin_page(
+        per_page=PER_PAGE, **params, **filters
+    )
+
     return render_template(
         'admin/products/index.html',
         products=products,
-        page=page,
-        per_page=per_page,
+        page=params["page"],
+        per_page=PER_PAGE,
+        total=total,
         total_pages=total_pages,
+        query_args=_query_args(params, filters),
         user=user
     )
 
 @admin_bp.route('/orders')
 @admin_required
 def order_index():
-    user = get_current_user()
+    user = get_current_principal()
     if not user:
         return jsonify({'message': 'User not found'}), 404
-    page = request.args.get('page', 1, type=int)
-    per_page = 15  # Number of orders per page
-    
-    # Get all orders
-    all_orders = Order.get_all()
-    
-    # Manual pagination
-    total = len(all_orders)
-    start = (page - 1) * per_page
-    end = start + per_page
-    orders = all_orders[start:end]
-    
-    # Calculate total pages
-    total_pages = (total + per_page - 1) // per_page
-    
+
+    params = _list_params()
+    filters = {
+        "status": request.args.get('status') or None,
+        "user_id": request.args.get('user_id', type=int),
+    }
+
+    orders, total, total_pages = OrderRepository().get_admin_page(
+        per_page=PER_PAGE, **params, **filters
+    )
+
     return render_template(
         'admin/orders/index.html',
         orders=orders,
-        page=page,
-        per_page=per_page,
+        page=params["page"],
+        per_page=PER_PAGE,
+        total=total,
         total_pages=total_pages,
+        query_args=_query_args(params, filters),
+        status=filters["status"],
         user=user
     )
 
@@ -106,32 +97,37 @@ def order_index():
 @admin_bp.route('/users')
 @admin_required
 def user_index():
-    user = get_current_user()
+    user = get_current_principal()
     if not user:
         return jsonify({'message': 'User not found'}), 404
-    page = request.args.get('page', 1, type=int)
-    per_page = 15  # Number of orders per page
-    
-    # Get all orders
-    all_users = User.get_all()
-    print(all_users[:5])
-    print(all_users[0].email)
-    
-    # Manual pagination
-    total = len(all_users)
-    start = (page - 1) * per_page
-    end = start + per_page
-    all_users = all_users[start:end]
-    
-    # Calculate total pages
-    total_pages = (total + per_page - 1) // per_page
-    
+
+    params = _list_params()
+    filters = {
+        "q": request.args.get('q', '').strip() or None,
+        "role": request.args.get('role') or None,
+    }
+
+    all_users, total, total_pages = UserRepository().get_admin_page(
+        per_page=PER_PAGE, **params, **filters
+    )
+
     return render_template(
         'admin/users/index.html',
         all_users=all_users,
-        page=page,
-        per_page=per_page,
+        page=params["page"],
+        per_page=PER_PAGE,
+        total=total,
         total_pages=total_pages,
+        query_args=_query_args(params, filters),
         user=user
     )
 
+
+def _query_args(params, filters):
+    """Query string giữ lại khi chuyển trang (không gồm page)."""
+    args = {k: v for k, v in filters.items() if v not in (None, '')}
+    if params["sort"] != 'id':
+        args["sort"] = params["sort"]
+    if not params["desc"]:
+        args["dir"] = 'asc'
+    return args
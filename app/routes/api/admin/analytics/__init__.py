@@ -0,0 +1,55 @@
+# app/routes/api/admin/analytics/__init__.py
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify
+from app.services.sales_analytics import SalesAnalyticsService
+from app.utils.decorators import admin_required
+import time
+
+api_admin_analytics_bp = Blueprint('api_admin_analytics', __name__, url_prefix='/analytics')
+
+
+# GET /api/admin/analytics/sales — Time series doanh số từ bảng rollup
+@api_admin_analytics_bp.route('/sales', methods=['GET'])
+@admin_required
+def sales_timeseries():
+    """
+    Query params:
+    - start, end: YYYY-MM-DD (end tính cả ngày đó), mặc định 30 ngày gần nhất
+    - granularity: hour | day | week | month (mặc định day)
+    - product_id, category_id: lọc (tùy chọn)
+    - window: số bucket cho moving average (mặc định 7)
+    """
+    start_time = time.time()
+
+    try:
+        today = datetime.utcnow().date()
+        end_day = _parse_day(request.args.get('end')) or today
+        start_day = _parse_day(request.args.get('start')) or end_day - timedelta(days=29)
+        start = datetime.combine(start_day, datetime.min.time())
+        end = datetime.combine(end_day, datetime.min.time()) + timedelta(days=1)
+
+        series = SalesAnalyticsService().get_timeseries(
+            start, end,
+            granularity=request.args.get('granularity', 'day'),
+            product_id=request.args.get('product_id', type=int),
+            category_id=request.args.get('category_id', type=int),
+            window=request.args.get('window', 7, type=int),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    exec_time = time.time() - start_time
+    return jsonify({
+        "series": series,
+        "exec_time_seconds": round(exec_time, 6)
+    }), 200
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
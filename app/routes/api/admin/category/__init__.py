@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.models.category import Category
+from app.repositories import CategoryRepository
+from app.services.category_stats import category_stats
 from app.utils.decorators import admin_required
 import time
 
@@ -15,9 +17,25 @@ def get_category(category_id):
     category = Category.query.get(category_id)
     if not category:
         return jsonify({'error': 'Category not found'}), 404
+    repo = CategoryRepository()
     exec_time = time.time() - start_time
     return jsonify({
         "category": category.to_dict(),
+        "ancestors": [c.to_dict() for c in repo.get_ancestors(category_id)],
+        "children": [c.to_dict() for c in repo.get_children(category_id)],
+        "exec_time_seconds": round(exec_time, 6)
+    }), 200
+
+
+# GET /categories/tree — Toàn bộ cây category
+@api_admin_category_bp.route('/tree', methods=['GET'])
+@admin_required
+def get_category_tree():
+    start_time = time.time()
+    tree = CategoryRepository().get_tree()
+    exec_time = time.time() - start_time
+    return jsonify({
+        "categories": tree,
         "exec_time_seconds": round(exec_time, 6)
     }), 200
 
@@ -28,21 +46,22 @@ def get_category(category_id):
 def list_categories():
     start_time = time.time()
     
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
     per_page = min(request.args.get('per_page', 20, type=int), 100)  # max 100
 
-    paginated = Category.query.paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Listing kèm số sản phẩm / còn hàng, đọc từ cache trong bộ nhớ (sort theo name)
+    categories = category_stats.listing()
+    total = len(categories)
+    items = categories[(page - 1) * per_page:page * per_page]
 
     exec_time = time.time() - start_time
     return jsonify({
-        "categories": [cat.to_dict() for cat in paginated.items],
+        "categories": items,
         "pagination": {
             "page": page,
-            "pages": paginated.pages,
+            "pages": (total + per_page - 1) // per_page,
             "per_page": per_page,
-            "total": paginated.total
+            "total": total
         },
         "exec_time_seconds": round(exec_time, 6)
     }), 200
@@ -64,18 +83,24 @@ def create_category():
     if Category.query.filter_by(name=data['name'].strip()).first():
         return jsonify({'error': 'Category name already exists'}), 400
 
+    parent_id = data.get('parent_id')
+    if parent_id is not None and not isinstance(parent_id, int):
+        return jsonify({'error': 'parent_id must be an integer'}), 400
+
     try:
-        category = Category(
+        category = CategoryRepository().create_category(
             name=data['name'].strip(),
-            description=data.get('description', '').strip() or None
+            description=(data.get('description') or '').strip() or None,
+            parent_id=parent_id
         )
-        category.save()
 
         return jsonify({
             'message': 'Category created successfully',
             'category': category.to_dict()
         }), 201
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(e)
         return jsonify({'error': 'Failed to create category'}), 500
@@ -103,7 +128,17 @@ def update_category(category_id):
 
     # Cập nhật description
     if 'description' in data:
-        category.description = data['description'].strip() or None
+        category.description = (data['description'] or '').strip() or None
+
+    # Đổi category cha (null = thành gốc) — cập nhật closure của cả cây con
+    if 'parent_id' in data:
+        parent_id = data['parent_id']
+        if parent_id is not None and not isinstance(parent_id, int):
+            return jsonify({'error': 'parent_id must be an integer'}), 400
+        try:
+            CategoryRepository().move(category_id, parent_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     try:
         category.save()
@@ -124,11 +159,13 @@ def delete_category(category_id):
         return jsonify({'error': 'Category not found'}), 404
 
     # Kiểm tra xem category có product nào không
-    if category.products.first():
+    if CategoryRepository().has_products(category_id):
         return jsonify({'error': 'Cannot delete category with associated products'}), 400
 
     try:
-        category.delete()
+        CategoryRepository().delete_category(category_id)
         return jsonify({'message': 'Category deleted successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to delete category'}), 500
\ No newline at end of file
@@ -1,7 +1,13 @@
 # app/routes/admin/product_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, stream_with_context
 from app.services.product_service import ProductService
+from app.services.replenishment_service import ReplenishmentService
+from app.services.catalog_export import CatalogExportService, EXPORT_FORMATS, MIMETYPES, parse_since
+from app.repositories import ProductStatsRepository
+from app.models.product import Product
 from app.utils.decorators import admin_required
+from app.utils.request_params import parse_id_list
+from app.utils.streaming import stream_mode, stream_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -196,16 +202,21 @@ def delete_product(product_id):
 @api_admin_product_bp.route('/<int:product_id>', methods=['GET'])
 @admin_required
 def get_product(product_id):
-    """✅ Get single product với stock info."""
+    """✅ Get single product với stock info. Query params: ?fields=name,price,stock"""
+    try:
+        fields = Product.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         product_service = ProductService()
-        product = product_service.get_product(product_id, with_inventory=True)
+        product = product_service.get_product(product_id, with_inventory=True, fields=fields)
         
         if not product:
             return jsonify({'error': 'Product not found'}), 404
         
         return jsonify({
-            'product': product.to_dict(include_stock=True)
+            'product': product.to_dict(include_stock=True, fields=fields)
         }), 200
         
     except Exception as e:
@@ -226,28 +237,36 @@ def get_all_products():
     - order_by: id|name|price (default: id)
     - desc: true|false (default: true)
     - category_id: filter by category
+    - ids: 1,2,3 -> chỉ các sản phẩm này (1 query, tối đa 100)
+    - fields: sku,name,stock -> chỉ SELECT / trả các field này (luôn có id)
+    - stream: ndjson|json (hoặc Accept: application/x-ndjson) -> stream toàn bộ, bộ nhớ cố định
     """
+    try:
+        fields = Product.parse_fields(request.args.get('fields'))
+        ids = parse_id_list(request.args.get('ids'))
+        mode = stream_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         # Get query params
         order_by = request.args.get('order_by', 'id')
         desc = request.args.get('desc', 'true').lower() == 'true'
         category_id = request.args.get('category_id', type=int)
         
-        product_service = ProductService()
-        
-        # Filter by category nếu có
-        if category_id:
-            products = product_service.get_products_by_category(category_id)
-        else:
-            products = product_service.get_all_products(
-                order_by=order_by,
-                desc=desc,
-                include_inventory=True
+        if mode and ids is None:
+            return stream_response(
+                ProductService().iter_product_rows(fields, category_id or None, order_by, desc), mode
             )
+
+        # Dict dựng thẳng từ row, không qua ORM object / to_dict
+        products = ProductService().get_product_rows(
+            product_ids=ids, fields=fields, category_id=category_id or None, order_by=order_by, desc=desc
+        )
         
         return jsonify({
             'count': len(products),
-            'products': [p.to_dict(include_stock=True) for p in products]
+            'products': products
         }), 200
         
     except Exception as e:
@@ -350,17 +369,69 @@ def update_stock(product_id):
         return jsonify({'error': 'Failed to update stock'}), 500
 
 
+# ========================================
+# ✅ CATALOG EXPORT FEED
+# ========================================
+@api_admin_product_bp.route('/export', methods=['GET'])
+@admin_required
+def export_catalog():
+    """
+    Export toàn bộ catalog cho partner, stream từ server-side cursor.
+
+    Query params:
+    - format: csv|jsonl (default: csv)
+    - gzip: true|false -> body nén gzip
+    - updated_since: ISO 8601 -> chỉ sản phẩm / tồn kho thay đổi từ mốc này
+    Header X-Export-Cursor: giá trị updated_since cho lần export sau (đã lùi CATALOG_EXPORT_LOOKBACK_SECONDS,
+    delta sau có thể lặp lại vài dòng -> partner upsert theo id).
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Invalid format '{fmt}'. Allowed: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        since = parse_since(request.args.get('updated_since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        cursor, chunks = CatalogExportService().start(fmt, since, compress)
+    except Exception as e:
+        logger.error(f"Failed to export catalog: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to export catalog'}), 500
+
+    filename = f"catalog.{fmt}" + (".gz" if compress else "")
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype='application/gzip' if compress else MIMETYPES[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Export-Cursor': cursor.isoformat(),
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
 # ========================================
 # ✅ BONUS: INVENTORY REPORTS
 # ========================================
 @api_admin_product_bp.route('/reports/low-stock', methods=['GET'])
 @admin_required
 def low_stock_report():
-    """Get products with low stock. Query param: ?threshold=10"""
+    """Get products with low stock. Query param: ?threshold=10&stream=ndjson|json"""
     threshold = request.args.get('threshold', 10, type=int)
+    try:
+        mode = stream_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         product_service = ProductService()
+        if mode:
+            return stream_response(
+                product_service.iter_low_stock_report(threshold), mode,
+                meta={"success": True, "threshold": threshold}
+            )
         result = product_service.get_low_stock_report(threshold)
         return jsonify(result), 200
     except Exception as e:
@@ -368,12 +439,59 @@ def low_stock_report():
         return jsonify({'error': 'Failed to get report'}), 500
 
 
+@api_admin_product_bp.route('/reports/reorder', methods=['GET'])
+@admin_required
+def reorder_report():
+    """
+    Sản phẩm cần đặt thêm hàng theo reorder point đã tính (job replenishment).
+    Query params: ?page=1&per_page=50&category_id=
+    """
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(request.args.get('per_page', 50, type=int), 200)
+    category_id = request.args.get('category_id', type=int)
+
+    try:
+        result = ReplenishmentService().get_reorder_report(page, per_page, category_id)
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Failed to get reorder report: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get report'}), 500
+
+
+@api_admin_product_bp.route('/reports/most-viewed', methods=['GET'])
+@admin_required
+def most_viewed_report():
+    """Sản phẩm được xem nhiều nhất (product_stats, trễ tối đa VIEW_COUNTER_FLUSH_SECONDS). ?limit=20"""
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+
+    try:
+        rows = ProductStatsRepository().get_most_viewed(limit)
+        return jsonify({
+            "success": True,
+            "count": len(rows),
+            "products": [
+                {"id": pid, "sku": sku, "name": name, "views": views}
+                for pid, sku, name, views in rows
+            ]
+        }), 200
+    except Exception as e:
+        logger.error(f"Failed to get most viewed report: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get report'}), 500
+
+
 @api_admin_product_bp.route('/reports/out-of-stock', methods=['GET'])
 @admin_required
 def out_of_stock_report():
-    """Get out of stock products."""
+    """Get out of stock products. Query param: ?stream=ndjson|json"""
+    try:
+        mode = stream_mode()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         product_service = ProductService()
+        if mode:
+            return stream_response(product_service.iter_out_of_stock_report(), mode, meta={"success": True})
         result = product_service.get_out_of_stock_report()
         return jsonify(result), 200
     except Exception as e:
@@ -3,8 +3,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.order_facade import OrderFacade
 from app.services.payment_strategy import PayPalPayment, CreditCardPayment
+from app.utils.rate_limiter import rate_limiter
 
 api_order_bp = Blueprint('api_order', __name__, url_prefix='/order')
+rate_limiter.limit_blueprint(api_order_bp, keys=("ip", "user"))
 
 @api_order_bp.route('', methods=['POST'])
 @jwt_required()
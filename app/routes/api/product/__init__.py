@@ -1,17 +1,33 @@
 # app/routes/product/__init__.py
 from flask import Blueprint, request, jsonify
 from app.services.product_service import ProductService
+from app.services.recommendation_service import RecommendationService
+from app.services.bestseller_tracker import bestsellers
+from app.services.view_counter import view_counter
+from app.services.catalog_version import conditional_catalog_get
+from app.services.category_stats import category_stats
+from app.models.product import Product
+from app.utils.request_params import parse_id_list
+from app.utils.db_routing import prefer_replica
 import logging
 
 logger = logging.getLogger(__name__)
 
 api_product_bp = Blueprint('api_product_bp', __name__, url_prefix='/products')
 
+
+@api_product_bp.before_request
+def _read_from_replica():
+    # Endpoint public chỉ đọc: query có thể đi read replica (nếu đã cấu hình)
+    if request.method == 'GET':
+        prefer_replica()
+
 # ========================================
 # ✅ PUBLIC ENDPOINTS (Không cần auth)
 # ========================================
 
 @api_product_bp.route('', methods=['GET'])
+@conditional_catalog_get(unless=lambda: request.args.get('sort') == 'bestselling')
 def get_products():
     """
     Get all products (public view).
@@ -21,9 +37,27 @@ def get_products():
     - per_page: int (default: 20, max: 100)
     - order_by: id|name|price (default: id)
     - desc: true|false (default: true)
-    - category_id: filter by category
+    - category_id: filter by category (gồm cả category con cháu)
     - in_stock_only: true|false (default: false)
+    - sort: bestselling -> xếp theo số lượng bán trong `window` (24h|7d|30d, default 7d),
+      chỉ gồm sản phẩm có bán trong cửa sổ đó
+    - brand: lọc theo brand (từ đầu tiên của tên), price: khoảng giá dạng 50-100 / 1000+
+    - facets: true -> trả thêm số đếm theo category / brand / price / in_stock
+      (brand / price / facets cần CATALOG_ENGINE_ENABLED)
+    - ids: 1,2,3 -> lấy đúng các sản phẩm này trong 1 query (tối đa 100, giữ thứ tự)
+    - fields: name,price,stock -> chỉ SELECT / trả các field này (luôn có id)
     """
+    try:
+        fields = Product.parse_fields(request.args.get('fields'))
+        ids = parse_id_list(request.args.get('ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if ids is not None:
+        return _get_products_by_ids(ids, fields)
+    if request.args.get('sort') == 'bestselling':
+        return _get_bestselling_products(fields)
+
     try:
         # Parse query params
         page = request.args.get('page', 1, type=int)
@@ -32,22 +66,59 @@ def get_products():
         desc = request.args.get('desc', 'true').lower() == 'true'
         category_id = request.args.get('category_id', type=int)
         in_stock_only = request.args.get('in_stock_only', 'false').lower() == 'true'
+        brand = request.args.get('brand')
+        price_band = request.args.get('price')
+        with_facets = request.args.get('facets', 'false').lower() == 'true'
         
         product_service = ProductService()
-        
-        # Filter by category
-        if category_id:
-            products = product_service.get_products_by_category(category_id)
-        else:
-            products = product_service.get_all_products(
-                order_by=order_by,
-                desc=desc,
-                include_inventory=True
+
+        # ✅ Faceted listing: AND các bitmap facet trong catalog engine
+        if brand or price_band or with_facets:
+            result = product_service.search_catalog(
+                page, per_page, order_by, desc, facets=with_facets, fields=fields, rows=True,
+                category_id=category_id, brand=brand, price_band=price_band, in_stock_only=in_stock_only
             )
+            if result is None:
+                return jsonify({'error': 'brand, price and facets require the catalog engine'}), 400
+            products, total, facets = result
+            response = {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'total_pages': (total + per_page - 1) // per_page,
+                'products': products
+            }
+            if with_facets:
+                response['facets'] = facets
+            return jsonify(response), 200
+
+        # ✅ Catalog engine (nếu bật): filter / sort / phân trang trong bộ nhớ
+        result = product_service.list_products_from_catalog(
+            page, per_page, order_by, desc, category_id=category_id, in_stock_only=in_stock_only,
+            fields=fields, rows=True
+        )
+        if result is not None:
+            paginated_products, total = result
+            return jsonify({
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'total_pages': (total + per_page - 1) // per_page,
+                'products': paginated_products
+            }), 200
+        
+        load_fields = _fields_for_loading(fields, in_stock_only)
+
+        # Dict dựng thẳng từ row (category_id gồm cả category con cháu)
+        products = product_service.get_product_rows(
+            fields=load_fields, category_id=category_id, order_by=order_by, desc=desc
+        )
         
         # Filter in stock only
         if in_stock_only:
-            products = [p for p in products if p.stock > 0]
+            products = [p for p in products if p['stock'] > 0]
+            if load_fields != fields:
+                products = [{k: p[k] for k in fields} for p in products]
         
         # Manual pagination (hoặc dùng repo.get_paginated)
         total = len(products)
@@ -60,7 +131,7 @@ def get_products():
             'per_page': per_page,
             'total': total,
             'total_pages': (total + per_page - 1) // per_page,
-            'products': [p.to_dict(include_stock=True) for p in paginated_products]
+            'products': paginated_products
         }), 200
         
     except Exception as e:
@@ -68,24 +139,138 @@ def get_products():
         return jsonify({'error': 'Failed to get products'}), 500
 
 
+def _fields_for_loading(fields, in_stock_only):
+    """Lọc còn hàng cần stock dù client không yêu cầu field đó."""
+    if fields is not None and in_stock_only and 'stock' not in fields:
+        return fields + ('stock',)
+    return fields
+
+
+def _get_products_by_ids(ids, fields):
+    """Bulk lookup cho giỏ hàng / wishlist / order lines: 1 query thay vì 1 request mỗi sản phẩm."""
+    try:
+        products = ProductService().get_product_rows(ids, fields=fields)
+        found = {p['id'] for p in products}
+        return jsonify({
+            'count': len(products),
+            'products': products,
+            'missing': [pid for pid in ids if pid not in found]
+        }), 200
+    except Exception as e:
+        logger.error(f"Failed to get products by ids: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get products'}), 500
+
+
+def _get_bestselling_products(fields=None):
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    window = request.args.get('window', '7d')
+    category_id = request.args.get('category_id', type=int)
+    in_stock_only = request.args.get('in_stock_only', 'false').lower() == 'true'
+
+    try:
+        bestsellers.ensure_fresh()
+        if category_id or in_stock_only:
+            ranked = bestsellers.top_products(window, n=None, category_id=category_id)
+        else:
+            ranked = bestsellers.top_products(window, n=page * per_page)
+            total = bestsellers.ranked_count(window)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        product_service = ProductService()
+        if category_id or in_stock_only:
+            if in_stock_only:
+                # Lọc trên cả ranking rồi mới cắt trang -> total / total_pages đúng, trang luôn đủ per_page
+                in_stock = set(product_service.filter_in_stock([pid for pid, _ in ranked]))
+                ranked = [(pid, sold) for pid, sold in ranked if pid in in_stock]
+            total = len(ranked)
+        ranked = ranked[(page - 1) * per_page:page * per_page]
+        units = dict(ranked)
+        products = product_service.get_product_rows([pid for pid, _ in ranked], fields=fields)
+
+        return jsonify({
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'total_pages': (total + per_page - 1) // per_page,
+            'sort': 'bestselling',
+            'window': window,
+            'products': [{**p, 'units_sold': units[p['id']]} for p in products]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Failed to get bestselling products: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get products'}), 500
+
+
+@api_product_bp.route('/bestsellers/categories', methods=['GET'])
+def get_bestselling_categories():
+    """Top category theo số lượng bán. Query params: ?window=7d&limit=10"""
+    limit = request.args.get('limit', 10, type=int)
+    if limit < 1 or limit > 50:
+        return jsonify({'error': 'Limit must be between 1 and 50'}), 400
+
+    try:
+        bestsellers.ensure_fresh()
+        ranked = bestsellers.top_categories(request.args.get('window', '7d'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'window': request.args.get('window', '7d'),
+        'categories': [{'category_id': cid, 'units_sold': units} for cid, units in ranked]
+    }), 200
+
+
+@api_product_bp.route('/categories', methods=['GET'])
+@conditional_catalog_get()
+def get_category_menu():
+    """
+    Cây category cho menu storefront, kèm số sản phẩm / còn hàng
+    (product_count của chính category, total_* gồm cả category con cháu).
+    Query params: ?flat=true -> danh sách phẳng sort theo name
+    """
+    try:
+        if request.args.get('flat', 'false').lower() == 'true':
+            return jsonify({'categories': category_stats.listing()}), 200
+        return jsonify({'categories': category_stats.tree()}), 200
+    except Exception as e:
+        logger.error(f"Failed to get categories: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get categories'}), 500
+
+
 @api_product_bp.route('/<int:product_id>', methods=['GET'])
+@conditional_catalog_get(
+    on_not_modified=lambda product_id: view_counter.increment(product_id),
+    product=lambda product_id: product_id,
+)
 def get_product(product_id):
-    """Get single product detail."""
+    """Get single product detail. Query params: ?fields=name,price (chỉ trả các field này)"""
+    try:
+        fields = Product.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         product_service = ProductService()
-        product = product_service.get_product(product_id, with_inventory=True)
+        # Dict từ row, request đồng thời cho cùng sản phẩm dùng chung 1 query (single-flight)
+        product = product_service.get_product_row(product_id, fields=fields)
         
         if not product:
             return jsonify({'error': 'Product not found'}), 404
-        
-        # ✅ Check if product có sẵn hàng
-        is_in_stock = product.stock > 0
+
+        view_counter.increment(product_id)
+        if fields is not None:
+            return jsonify({'product': product}), 200
         
         return jsonify({
             'product': {
-                **product.to_dict(include_stock=True),
-                'is_in_stock': is_in_stock,
-                'is_available': product.is_available(1)  # Business logic từ model
+                **product,
+                # ✅ Check if product có sẵn hàng (giống Product.is_available(1))
+                'is_in_stock': product['stock'] > 0,
+                'is_available': product['available_stock'] >= 1
             }
         }), 200
         
@@ -94,11 +279,38 @@ def get_product(product_id):
         return jsonify({'error': 'Failed to get product'}), 500
 
 
+@api_product_bp.route('/<int:product_id>/related', methods=['GET'])
+def get_related_products(product_id):
+    """
+    Sản phẩm thường được mua cùng (tính sẵn bởi job related products).
+    Query params: ?limit=10 (max 50)
+    """
+    limit = request.args.get('limit', 10, type=int)
+    if limit < 1 or limit > 50:
+        return jsonify({'error': 'Limit must be between 1 and 50'}), 400
+
+    try:
+        related = RecommendationService().get_related(product_id, limit)
+        return jsonify({
+            'product_id': product_id,
+            'count': len(related),
+            'products': related
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Failed to get related products for {product_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get related products'}), 500
+
+
 @api_product_bp.route('/search', methods=['GET'])
+@conditional_catalog_get()
 def search_products():
     """
     Search products by name.
     Query params: ?q=search_term&limit=10
+    Faceted (cần catalog engine): &page=1&category_id=&brand=&price=&in_stock_only=true&facets=true
+    Fuzzy (cần catalog engine): &fuzzy=true -> chịu lỗi chính tả trên tên / SKU, kèm similarity
+      (trigram index chưa dựng xong -> "fuzzy": false, kết quả tìm theo tiền tố tên)
     """
     query = request.args.get('q', '').strip()
     limit = request.args.get('limit', 10, type=int)
@@ -108,9 +320,48 @@ def search_products():
     
     if limit < 1 or limit > 50:
         return jsonify({'error': 'Limit must be between 1 and 50'}), 400
+
+    filters = {
+        'category_id': request.args.get('category_id', type=int),
+        'brand': request.args.get('brand'),
+        'price_band': request.args.get('price'),
+        'in_stock_only': request.args.get('in_stock_only', 'false').lower() == 'true',
+    }
+    with_facets = request.args.get('facets', 'false').lower() == 'true'
     
     try:
         product_service = ProductService()
+
+        if request.args.get('fuzzy', 'false').lower() == 'true':
+            result = product_service.fuzzy_search_products(query, limit)
+            if result is None:
+                return jsonify({'error': 'Fuzzy search requires the catalog engine'}), 400
+            # fuzzy=false: index chưa dựng xong (vừa khởi động), trả kết quả LIKE search
+            matches, fuzzy = result
+            return jsonify({
+                'query': query,
+                'fuzzy': fuzzy,
+                'count': len(matches),
+                'products': [{**p.to_summary(), 'similarity': similarity} for p, similarity in matches]
+            }), 200
+
+        if with_facets or any(filters.values()):
+            result = product_service.search_catalog(
+                request.args.get('page', 1, type=int), limit, q=query, facets=with_facets, **filters
+            )
+            if result is None:
+                return jsonify({'error': 'Filters and facets require the catalog engine'}), 400
+            products, total, facets = result
+            response = {
+                'query': query,
+                'count': len(products),
+                'total': total,
+                'products': [p.to_summary() for p in products]
+            }
+            if with_facets:
+                response['facets'] = facets
+            return jsonify(response), 200
+
         products = product_service.search_products(query, limit)
         
         return jsonify({
@@ -125,21 +376,33 @@ def search_products():
 
 
 @api_product_bp.route('/category/<int:category_id>', methods=['GET'])
+@conditional_catalog_get()
 def get_products_by_category(category_id):
-    """Get all products in a category."""
+    """Get all products in a category and its descendants. Query params: ?in_stock_only=true&fields=name,price"""
     try:
+        fields = Product.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        in_stock_only = request.args.get('in_stock_only', 'false').lower() == 'true'
+        load_fields = _fields_for_loading(fields, in_stock_only)
+
         product_service = ProductService()
-        products = product_service.get_products_by_category(category_id)
+        products = product_service.get_product_rows(
+            fields=load_fields, category_id=category_id, order_by='name', desc=False
+        )
         
         # Filter only in-stock products for public view (optional)
-        in_stock_only = request.args.get('in_stock_only', 'false').lower() == 'true'
         if in_stock_only:
-            products = [p for p in products if p.stock > 0]
+            products = [p for p in products if p['stock'] > 0]
+            if load_fields != fields:
+                products = [{k: p[k] for k in fields} for p in products]
         
         return jsonify({
             'category_id': category_id,
             'count': len(products),
-            'products': [p.to_dict(include_stock=True) for p in products]
+            'products': products
         }), 200
         
     except Exception as e:
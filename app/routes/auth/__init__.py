@@ -2,13 +2,27 @@ from flask import Blueprint, jsonify, request, redirect, url_for, make_response,
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity, unset_jwt_cookies,
-    set_access_cookies, set_refresh_cookies
+    set_access_cookies, set_refresh_cookies,
+    verify_jwt_in_request, get_jwt, decode_token
 )
 from datetime import timedelta
 from app import db
 from app.models.user import User
+from app.repositories import UserRepository
+from app.services.password_hasher import password_hasher, HasherBusyError
+from app.services.token_blocklist import token_blocklist
+from app.utils.rate_limiter import rate_limiter
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
+rate_limiter.limit_blueprint(auth_bp, keys=("ip",))
+
+
+@auth_bp.errorhandler(HasherBusyError)
+def hasher_busy(e):
+    response = jsonify({"message": "Too many authentication requests, please retry shortly"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
 
 # --- LOGIN ---
 @auth_bp.route('/login', methods=['POST'])
@@ -26,9 +40,17 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not user.check_password(password):
+    if not user or not password_hasher.verify(user.password_hash, password):
         return jsonify({"message": "Invalid email or password"}), 401
 
+    # Nâng cấp hash khi method / cost trong config đã thay đổi
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+        except HasherBusyError:
+            pass  # để lần login sau nâng cấp
+
     # Create tokens
     access_token = create_access_token(
         identity=str(user.id),
@@ -68,10 +90,7 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"message": "Email already registered"}), 400
 
-    user = User(username=username, email=email)
-    user.set_password(password)
-    db.session.add(user)
-    db.session.commit()
+    user = UserRepository().create_user(username, email, password_hasher.hash(password))
 
     access_token = create_access_token(
         identity=str(user.id),
@@ -104,4 +123,28 @@ def refresh_token():
 # --- LOGOUT ---
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
-    return jsonify({"message": "Logout successful (client should discard tokens)"}), 200
+    """
+    Thu hồi token hiện tại (header hoặc cookie) và refresh token nếu gửi kèm.
+    Body (optional): {"refresh_token": "..."}
+    """
+    revoked = 0
+    try:
+        verify_jwt_in_request(optional=True, verify_type=False)
+        claims = get_jwt()
+        if claims:
+            token_blocklist.revoke_claims(claims)
+            revoked += 1
+    except Exception:
+        pass  # token hết hạn / không hợp lệ thì không cần thu hồi
+
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            token_blocklist.revoke_claims(decode_token(data['refresh_token']))
+            revoked += 1
+        except Exception:
+            pass
+
+    response = jsonify({"message": "Logout successful", "revoked_tokens": revoked})
+    unset_jwt_cookies(response)
+    return response, 200
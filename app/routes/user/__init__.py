@@ -4,18 +4,14 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.order import Order
 from app.models.inventory_log import InventoryLog
+from app.utils.auth_helpers import get_current_principal
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/index')
 @jwt_required(optional=True)
 def index():
-    current_user_id = get_jwt_identity()
-
-    if isinstance(current_user_id, dict):
-        current_user_id = current_user_id.get("id")
-    
-    user = User.query.get(current_user_id)
+    user = get_current_principal()
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
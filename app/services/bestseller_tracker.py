@@ -0,0 +1,205 @@
+# app/services/bestseller_tracker.py
+import heapq
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tên cửa sổ -> số giờ
+WINDOWS = {"24h": 24, "7d": 24 * 7, "30d": 24 * 30}
+_MAX_HOURS = max(WINDOWS.values())
+
+
+def _hour_of(ts):
+    if isinstance(ts, datetime):
+        return int((ts - datetime(1970, 1, 1)).total_seconds() // 3600)
+    return int(ts // 3600)
+
+
+class BestsellerTracker:
+    """
+    ✅ Bảng xếp hạng bán chạy theo cửa sổ trượt 24h / 7d / 30d, giữ trong bộ nhớ.
+
+    - Bucket theo giờ: {hour: {product_id: units}}, giữ tối đa 30 ngày
+    - Mỗi cửa sổ có tổng chạy (per product + per category); khi giờ mới bắt đầu,
+      bucket rơi khỏi cửa sổ được trừ ra (decay) -> cập nhật O(số sản phẩm trong bucket)
+    - Top-N đọc thẳng từ tổng chạy bằng heapq.nlargest: O(M log N), không giữ ranking
+      sort sẵn nên ghi (record / sync) không làm lần đọc sau phải sort lại toàn bộ
+    - Nguồn bền vững là bảng sales_hourly (ghi trong transaction thanh toán):
+      lần đọc đầu dựng lại từ DB, sau đó mỗi refresh_seconds đồng bộ lại vài giờ gần nhất
+      (lấy luôn doanh số do worker khác ghi)
+    """
+
+    def __init__(self, refresh_seconds=60, sync_hours=2):
+        self.refresh_seconds = refresh_seconds
+        self.sync_hours = sync_hours
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, now=None):
+        self._now_hour = _hour_of(now if now is not None else time.time())
+        self._buckets = defaultdict(lambda: defaultdict(int))
+        self._totals = {w: defaultdict(int) for w in WINDOWS}
+        self._category_totals = {w: defaultdict(int) for w in WINDOWS}
+        self._categories = {}       # product_id -> category_id
+        self._loaded = False
+        self._next_refresh = 0.0
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('BESTSELLER_REFRESH_SECONDS', self.refresh_seconds)
+
+    # ========================================
+    # ✅ WRITE
+    # ========================================
+
+    def record(self, product_id, units, category_id=None, at=None):
+        """Ghi nhận units bán ra (gọi sau khi order PAID đã commit)."""
+        with self._lock:
+            if category_id is not None:
+                self._categories[product_id] = category_id
+            hour = _hour_of(at if at is not None else time.time())
+            self._advance(hour)
+            self._add(hour, product_id, units)
+
+    def record_items(self, items, at=None):
+        """items: list dict có product_id, quantity (và category_id nếu có)."""
+        for item in items:
+            self.record(item["product_id"], item["quantity"], item.get("category_id"), at)
+
+    def load(self, rows, now=None):
+        """
+        Dựng lại toàn bộ từ rows (hour: datetime, product_id, category_id, units).
+        """
+        with self._lock:
+            self._reset(now)
+            self._load_rows(rows)
+            self._loaded = True
+
+    def replace_hours(self, since_hour, rows, now=None):
+        """Thay các bucket từ since_hour bằng dữ liệu từ DB (đã gồm doanh số của mọi worker)."""
+        with self._lock:
+            self._advance(_hour_of(now if now is not None else time.time()))
+            for hour in [h for h in self._buckets if h >= since_hour]:
+                for product_id, units in self._buckets.pop(hour).items():
+                    for window, hours in WINDOWS.items():
+                        if hour > self._now_hour - hours:
+                            self._decrement(window, product_id, units)
+            self._load_rows(rows)
+
+    def _load_rows(self, rows):
+        for hour, product_id, category_id, units in rows:
+            self._categories[product_id] = category_id
+            self._add(_hour_of(hour), product_id, units)
+
+    def _add(self, hour, product_id, units):
+        if hour <= self._now_hour - _MAX_HOURS or not units:
+            return
+        self._buckets[hour][product_id] += units
+        category_id = self._categories.get(product_id)
+        for window, hours in WINDOWS.items():
+            if hour > self._now_hour - hours:
+                self._totals[window][product_id] += units
+                if category_id is not None:
+                    self._category_totals[window][category_id] += units
+
+    def _advance(self, hour):
+        """Sang giờ mới: trừ các bucket vừa rơi khỏi từng cửa sổ và bỏ bucket quá 30 ngày."""
+        if hour <= self._now_hour:
+            return
+        previous = self._now_hour
+        for window, hours in WINDOWS.items():
+            # Bucket thuộc cửa sổ cũ (> previous - hours) nhưng không còn thuộc cửa sổ mới
+            for expired in [h for h in self._buckets if previous - hours < h <= hour - hours]:
+                for product_id, units in self._buckets[expired].items():
+                    self._decrement(window, product_id, units)
+        self._now_hour = hour
+        for old in [h for h in self._buckets if h <= hour - _MAX_HOURS]:
+            del self._buckets[old]
+
+    def _decrement(self, window, product_id, units):
+        totals = self._totals[window]
+        totals[product_id] -= units
+        if totals[product_id] <= 0:
+            del totals[product_id]
+        category_id = self._categories.get(product_id)
+        if category_id is not None:
+            category_totals = self._category_totals[window]
+            category_totals[category_id] -= units
+            if category_totals[category_id] <= 0:
+                del category_totals[category_id]
+
+    # ========================================
+    # ✅ READ
+    # ========================================
+
+    def top_products(self, window="7d", n=10, category_id=None, now=None):
+        """Return: list (product_id, units) giảm dần; n=None -> tất cả."""
+        with self._lock:
+            totals = self._window_totals(window, "product", now)
+            items = totals.items()
+            if category_id is not None:
+                items = [(pid, units) for pid, units in items if self._categories.get(pid) == category_id]
+            return _top(items, n)
+
+    def top_categories(self, window="7d", n=10, now=None):
+        with self._lock:
+            return _top(self._window_totals(window, "category", now).items(), n)
+
+    def ranked_count(self, window="7d", now=None):
+        with self._lock:
+            return len(self._window_totals(window, "product", now))
+
+    def _window_totals(self, window, kind, now=None):
+        """Gọi khi đang giữ lock."""
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(WINDOWS)}")
+        self._advance(_hour_of(now if now is not None else time.time()))
+        return self._totals[window] if kind == "product" else self._category_totals[window]
+
+    # ========================================
+    # ✅ DB SYNC
+    # ========================================
+
+    def ensure_fresh(self):
+        """Gọi trong app context trước khi đọc: load lần đầu / đồng bộ định kỳ từ sales_hourly."""
+        now = time.time()
+        if self._loaded and now < self._next_refresh:
+            return
+        # Lần load đầu các thread khác chờ; các lần sync sau chỉ 1 thread làm, thread khác đọc dữ liệu hiện có
+        if not self._refresh_lock.acquire(blocking=not self._loaded):
+            return
+        from app.repositories import SalesRollupRepository
+
+        try:
+            if self._loaded and now < self._next_refresh:
+                return
+            repo = SalesRollupRepository()
+            if not self._loaded:
+                since = datetime.utcnow() - timedelta(hours=_MAX_HOURS)
+                self.load(repo.get_hourly_units(since))
+                logger.info("Bestseller tracker loaded from sales_hourly")
+            else:
+                since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=self.sync_hours - 1)
+                self.replace_hours(_hour_of(since), repo.get_hourly_units(since))
+            self._next_refresh = now + self.refresh_seconds
+        except Exception as e:
+            self._next_refresh = now + self.refresh_seconds
+            logger.error(f"Failed to refresh bestseller tracker: {str(e)}")
+        finally:
+            self._refresh_lock.release()
+
+
+def _top(items, n):
+    """Units giảm dần, cùng units thì id nhỏ trước; n=None -> sort toàn bộ."""
+    key = lambda item: (-item[1], item[0])
+    if n is None:
+        return sorted(items, key=key)
+    return heapq.nsmallest(n, items, key=key)
+
+
+bestsellers = BestsellerTracker()
@@ -0,0 +1,580 @@
+# app/services/catalog_engine.py
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.services.catalog_facets import (
+    FACETS, FacetIndex, bitmap_contains, bitmap_count, bitmap_from_mask,
+)
+from app.services.trigram_index import TrigramIndex
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SORTABLE = ("id", "name", "price", "created_at")
+DEFAULT_PRICE_BANDS = (0, 50, 100, 200, 500, 1000)
+
+# Cột thay đổi thì phải sort / lọc lại (khác với quantity / reserved chỉ đổi tồn kho)
+_ORDER_FIELDS = {"name", "price", "category_id", "created_at"}
+_NO_DATE = np.datetime64("NaT", "s")
+
+
+def _to_datetime64(value):
+    if value is None:
+        return _NO_DATE
+    if isinstance(value, str):  # SQLite server_default trả chuỗi
+        value = datetime.fromisoformat(value)
+    return np.datetime64(value.replace(tzinfo=None), "s")
+
+
+def _category_key(category_id):
+    """None | id | list id (cây con) -> None | tuple id đã sort (dùng làm key cache)."""
+    if category_id is None:
+        return None
+    if isinstance(category_id, (list, tuple, set, frozenset)):
+        return tuple(sorted({int(c) for c in category_id}))
+    return (int(category_id),)
+
+
+class CatalogEngine:
+    """
+    ✅ Catalog dạng cột trong bộ nhớ (NumPy) cho listing / filter / sort / đếm tồn kho.
+
+    - Mỗi sản phẩm là 1 vị trí trong các mảng ids (đã sort), price, category_id,
+      quantity, reserved, created_at; name / sku được intern, name xếp hạng để sort
+    - Thứ tự sort (theo category, theo cột) tính lazy rồi cache; chỉ bị xoá khi đổi
+      name / price / category / thêm / xoá sản phẩm — đổi tồn kho không làm mất cache
+    - Đồng bộ: listener session (after_flush) ghi lại Product / Inventory vừa ghi,
+      after_commit mới áp vào catalog, rollback thì bỏ. Worker khác ghi thì catalog
+      được nạp lại toàn bộ mỗi reload_seconds (ở thread nền, reader vẫn đọc bản cũ)
+    - Facet (category / brand / price band / in_stock): bitmap theo giá trị trong FacetIndex,
+      dựng lazy, ghi thì lật bit; thêm / xoá sản phẩm thì dựng lại ở lần đọc sau
+    - Fuzzy search: TrigramIndex trên name + sku, dựng ở thread nền ngay sau mỗi lần load
+      (ngoài lock), ghi thì cập nhật delta; chưa dựng xong -> fuzzy_search trả None để
+      caller dùng LIKE search, request không bao giờ phải chờ dựng index
+    - Tắt mặc định (CATALOG_ENGINE_ENABLED); bật thì các endpoint listing dùng catalog
+    """
+
+    def __init__(self, reload_seconds=300):
+        self.enabled = False
+        self.reload_seconds = reload_seconds
+        self.price_bands = DEFAULT_PRICE_BANDS
+        self.fuzzy_max_edits = 2
+        self.app = None
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._loaded = False
+        self._next_reload = 0.0
+        self._reloading = False
+        self._pending = []          # thay đổi commit trong lúc đang reload
+        self._trigrams = None
+        self._trigram_lock = threading.Lock()
+        self._trigram_log = None    # thay đổi name / sku trong lúc đang dựng trigram index
+        # Đổi mỗi lần nội dung đổi (load / apply); kèm id process vì mỗi worker có bản riêng
+        self._instance = uuid.uuid4().hex[:8]
+        self._generation = 0
+        self._set_columns(*self._empty_columns())
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('CATALOG_ENGINE_ENABLED', False)
+        self.reload_seconds = app.config.get('CATALOG_ENGINE_RELOAD_SECONDS', self.reload_seconds)
+        self.price_bands = app.config.get('CATALOG_PRICE_BANDS', self.price_bands)
+        self.fuzzy_max_edits = app.config.get('FUZZY_SEARCH_MAX_EDITS', self.fuzzy_max_edits)
+        if self.enabled and not event.contains(Session, "after_flush", _collect_changes):
+            event.listen(Session, "after_flush", _collect_changes)
+            event.listen(Session, "after_commit", _publish_changes)
+            event.listen(Session, "after_transaction_end", _discard_changes)
+
+    @property
+    def ready(self):
+        return self.enabled and self._loaded
+
+    @property
+    def content_tag(self):
+        """Định danh nội dung hiện tại của catalog trong process này (cho ETag)."""
+        return f"{self._instance}.{self._generation}"
+
+    # ========================================
+    # ✅ LOAD
+    # ========================================
+
+    @staticmethod
+    def _empty_columns():
+        return (
+            np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype="datetime64[s]"), [], [],
+        )
+
+    def _set_columns(self, ids, price, category_id, quantity, reserved, created_at, names, skus):
+        self.ids = ids
+        self.price = price
+        self.category_id = category_id
+        self.quantity = quantity
+        self.reserved = reserved
+        self.created_at = created_at
+        self.names = names
+        self.skus = skus
+        self._name_rank = None
+        self._orders = {}
+        self._in_stock_totals = {}  # tuple category_id (None = tất cả) -> số sản phẩm còn hàng
+        self._facets = None
+
+    def load(self, rows):
+        """rows: (id, name, price, category_id, created_at, quantity, reserved, sku) sort theo id."""
+        ids, names, price, category_id, created_at, quantity, reserved, skus = [], [], [], [], [], [], [], []
+        for row in rows:
+            ids.append(row[0])
+            names.append(sys.intern(row[1]))
+            price.append(row[2])
+            category_id.append(row[3])
+            created_at.append(row[4])
+            quantity.append(row[5] or 0)
+            reserved.append(row[6] or 0)
+            skus.append(sys.intern(row[7]))
+
+        columns = (
+            np.array(ids, dtype=np.int64), np.array(price, dtype=np.float64),
+            np.array(category_id, dtype=np.int64), np.array(quantity, dtype=np.int32),
+            np.array(reserved, dtype=np.int32), np.array(created_at, dtype="datetime64[s]"), names, skus,
+        )
+        with self._lock:
+            self._set_columns(*columns)
+            pending, self._pending = self._pending, []
+            for upserts, deleted in pending:
+                self.apply(upserts, deleted)
+            self._generation += 1
+            self._loaded = True
+        return len(ids)
+
+    def ensure_fresh(self):
+        """Gọi trong app context: load lần đầu (chặn), sau đó reload định kỳ ở thread nền."""
+        if not self.enabled:
+            return
+        now = time.time()
+        if self._loaded and now < self._next_reload:
+            return
+        if not self._reload_lock.acquire(blocking=not self._loaded):
+            return
+        if self._loaded and now < self._next_reload:
+            self._reload_lock.release()
+            return
+        self._next_reload = now + self.reload_seconds
+        if not self._loaded:
+            try:
+                loaded = self._reload()
+            finally:
+                self._reload_lock.release()
+            if loaded:
+                # Lần load đầu chạy trong request: trigram index dựng tiếp ở thread nền
+                threading.Thread(target=self._build_trigrams_quietly, name="catalog-trigrams", daemon=True).start()
+        else:
+            threading.Thread(target=self._background_reload, name="catalog-reload", daemon=True).start()
+
+    def _background_reload(self):
+        try:
+            with self.app.app_context():
+                loaded = self._reload()
+            if loaded:
+                self._build_trigrams_quietly()
+        finally:
+            self._reload_lock.release()
+
+    def _build_trigrams_quietly(self):
+        try:
+            self.build_trigrams(rebuild=True)
+        except Exception as e:
+            logger.error(f"Failed to build trigram index: {str(e)}")
+
+    def _reload(self):
+        """Return: True nếu load thành công."""
+        from app.repositories import ProductRepository
+        from app.utils.db_routing import use_primary
+
+        started = time.perf_counter()
+        with self._lock:
+            self._reloading = True
+            self._pending = []
+        try:
+            # Snapshot từ primary: bản load từ replica trễ có thể mất thay đổi đã apply qua event
+            with use_primary():
+                count = self.load(ProductRepository().iter_catalog_rows())
+            logger.info(f"Catalog engine loaded {count} products in {time.perf_counter() - started:.2f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load catalog engine: {str(e)}")
+            return False
+        finally:
+            with self._lock:
+                self._reloading = False
+                self._pending = []
+
+    # ========================================
+    # ✅ SYNC
+    # ========================================
+
+    def publish(self, upserts, deleted):
+        """Nhận thay đổi đã commit: upserts {product_id: {field: value}}, deleted {product_id}."""
+        with self._lock:
+            if self._reloading:
+                self._pending.append((upserts, deleted))
+            if not self._loaded:
+                return
+            try:
+                self.apply(upserts, deleted)
+            except Exception as e:
+                # Không để lỗi catalog làm hỏng commit; nạp lại ở lần đọc sau
+                logger.error(f"Failed to apply catalog changes, scheduling reload: {str(e)}")
+                self._next_reload = 0.0
+
+    def apply(self, upserts, deleted):
+        """Gọi khi đang giữ lock (hoặc trong test)."""
+        self._generation += 1
+        if deleted:
+            keep = ~np.isin(self.ids, np.fromiter(deleted, dtype=np.int64))
+            if not keep.all():
+                flags = keep.tolist()
+                self._set_columns(
+                    self.ids[keep], self.price[keep], self.category_id[keep], self.quantity[keep],
+                    self.reserved[keep], self.created_at[keep],
+                    [name for name, k in zip(self.names, flags) if k],
+                    [sku for sku, k in zip(self.skus, flags) if k],
+                )
+            for product_id in deleted:
+                self._trigram_change(product_id, None)
+
+        reorder = False
+        for product_id, fields in upserts.items():
+            if product_id in deleted:
+                continue
+            pos = int(np.searchsorted(self.ids, product_id))
+            if pos == len(self.ids) or self.ids[pos] != product_id:
+                if "name" not in fields or "price" not in fields:
+                    continue  # chỉ có Inventory, Product chưa nằm trong catalog -> đợi reload
+                self._insert(pos, product_id)
+                reorder = True
+            if _ORDER_FIELDS.intersection(fields):
+                reorder = True
+            self._assign(pos, fields)
+            if "name" in fields or "sku" in fields:
+                self._trigram_change(product_id, f"{self.names[pos]} {self.skus[pos]}")
+
+        if reorder:
+            self._name_rank = None
+            self._orders = {}
+            self._in_stock_totals = {}
+
+    def _insert(self, pos, product_id):
+        self.ids = np.insert(self.ids, pos, product_id)
+        self.price = np.insert(self.price, pos, 0.0)
+        self.category_id = np.insert(self.category_id, pos, 0)
+        self.quantity = np.insert(self.quantity, pos, 0)
+        self.reserved = np.insert(self.reserved, pos, 0)
+        self.created_at = np.insert(self.created_at, pos, np.datetime64(datetime.utcnow(), "s"))
+        self.names.insert(pos, "")
+        self.skus.insert(pos, "")
+        self._facets = None
+
+    def _assign(self, pos, fields):
+        if "name" in fields:
+            self.names[pos] = sys.intern(fields["name"])
+        if "sku" in fields:
+            self.skus[pos] = sys.intern(fields["sku"])
+        if "price" in fields:
+            self.price[pos] = float(fields["price"])
+        if "category_id" in fields:
+            self.category_id[pos] = fields["category_id"]
+        if "created_at" in fields:
+            self.created_at[pos] = _to_datetime64(fields["created_at"])
+        if "quantity" in fields:
+            quantity = fields["quantity"] or 0
+            delta = int(quantity > 0) - int(self.quantity[pos] > 0)
+            if delta:
+                # Giữ số đếm còn hàng đã cache thay vì đếm lại cả catalog
+                category_id = int(self.category_id[pos])
+                for key in self._in_stock_totals:
+                    if key is None or category_id in key:
+                        self._in_stock_totals[key] += delta
+            self.quantity[pos] = quantity
+        if "reserved_quantity" in fields:
+            self.reserved[pos] = fields["reserved_quantity"] or 0
+        if self._facets is not None:
+            self._facets.update(
+                pos, name=fields.get("name"), price=fields.get("price"),
+                category_id=fields.get("category_id"), quantity=fields.get("quantity"),
+            )
+
+    # ========================================
+    # ✅ QUERY
+    # ========================================
+
+    def list_product_ids(self, page=1, per_page=20, sort="id", desc=True, category_id=None, in_stock_only=False):
+        """
+        Listing đã filter + sort + phân trang.
+        - category_id: 1 id hoặc list id (cả cây con của category)
+        Return: (product_ids của trang, total)
+        """
+        if sort not in SORTABLE:
+            raise ValueError(f"sort must be one of {', '.join(SORTABLE)}")
+        offset = (max(1, page) - 1) * per_page
+        category_id = _category_key(category_id)
+        with self._lock:
+            positions = self._sorted_positions(category_id, sort)
+            if desc:
+                positions = positions[::-1]
+
+            if not in_stock_only:
+                return self.ids[positions[offset:offset + per_page]].tolist(), len(positions)
+
+            total = self._in_stock_totals.get(category_id)
+            if total is None:
+                quantity = self.quantity if category_id is None else self.quantity[positions]
+                total = self._in_stock_totals[category_id] = int(np.count_nonzero(quantity > 0))
+            return self.ids[self._scan_in_stock(positions, offset + per_page)[offset:]].tolist(), total
+
+    def search(self, page=1, per_page=20, sort="id", desc=True, category_id=None, brand=None,
+               price_band=None, in_stock_only=False, product_ids=None, facets=False, facet_limit=20):
+        """
+        Listing với filter facet (AND các bitmap) + số đếm facet cho query hiện tại.
+        - price_band: label dạng "50-100" / "1000+"; brand: không phân biệt hoa thường
+        - product_ids: giới hạn trong tập id (vd kết quả search theo tên)
+        - category_id: 1 id hoặc list id (cả cây con) — bitmap của các category được OR lại
+        - Số đếm của 1 facet tính với mọi filter trừ chính facet đó (để hiện các lựa chọn khác)
+        Return: {"product_ids", "total", "facets" (None nếu facets=False)}
+        """
+        if sort not in SORTABLE:
+            raise ValueError(f"sort must be one of {', '.join(SORTABLE)}")
+        offset = (max(1, page) - 1) * per_page
+        category_id = _category_key(category_id)
+        wanted = {"category": category_id, "brand": brand, "price": price_band,
+                  "in_stock": True if in_stock_only else None}
+        with self._lock:
+            index = self._facet_index()
+            filters = {}
+            for facet, value in wanted.items():
+                if value is None:
+                    continue
+                if facet == "category":
+                    filters[facet] = self._union(index.bitmap(facet, code) for code in
+                                                 (index.code_of(facet, c) for c in value) if code is not None)
+                    continue
+                code = index.code_of(facet, value)
+                filters[facet] = index.bitmap(facet, code) if code is not None else self._empty_bitmap()
+            if product_ids is not None:
+                filters["ids"] = self._ids_bitmap(product_ids)
+
+            query = self._intersect(filters.values())
+            positions = self._sorted_positions(category_id, sort)
+            if desc:
+                positions = positions[::-1]
+            if query is None:
+                page_positions, total = positions[offset:offset + per_page], len(positions)
+            else:
+                page_positions = self._scan(positions, offset + per_page, partial(bitmap_contains, query))[offset:]
+                total = bitmap_count(query)
+
+            result = {"product_ids": self.ids[page_positions].tolist(), "total": total, "facets": None}
+            if facets:
+                result["facets"] = {
+                    facet: self._facet_values(
+                        index, facet, self._intersect(v for k, v in filters.items() if k != facet), facet_limit
+                    )
+                    for facet in FACETS
+                }
+            return result
+
+    @property
+    def trigrams_ready(self):
+        return self.ready and self._trigrams is not None
+
+    def fuzzy_search(self, query, limit=10):
+        """
+        Tìm gần đúng trên name + sku. Return: list (product_id, similarity),
+        hoặc None khi trigram index chưa dựng xong (không dựng trong request).
+        """
+        with self._lock:
+            if self._trigrams is None:
+                return None
+            return self._trigrams.search(query, limit)
+
+    def build_trigrams(self, rebuild=False):
+        """Dựng TrigramIndex ngoài lock (vài giây với 1M sản phẩm), reader vẫn dùng index cũ."""
+        with self._trigram_lock:
+            if self._trigrams is not None and not rebuild:
+                return
+            with self._lock:
+                ids = self.ids.copy()
+                texts = [f"{name} {sku}" for name, sku in zip(self.names, self.skus)]
+                self._trigram_log = []
+            started = time.perf_counter()
+            index = TrigramIndex(ids, texts, max_edits=self.fuzzy_max_edits)
+            with self._lock:
+                for product_id, text in self._trigram_log:
+                    if text is None:
+                        index.remove(product_id)
+                    else:
+                        index.upsert(product_id, text)
+                self._trigrams, self._trigram_log = index, None
+                # Kết quả search đổi (LIKE -> fuzzy / index mới) -> ETag theo content_tag cũng đổi
+                self._generation += 1
+            logger.info(f"Trigram index built for {len(ids)} products in {time.perf_counter() - started:.2f}s")
+
+    def _trigram_change(self, product_id, text):
+        if self._trigram_log is not None:
+            self._trigram_log.append((product_id, text))
+        if self._trigrams is not None:
+            if text is None:
+                self._trigrams.remove(product_id)
+            else:
+                self._trigrams.upsert(product_id, text)
+
+    def _facet_index(self):
+        if self._facets is None:
+            self._facets = FacetIndex(self.names, self.price, self.category_id, self.quantity, self.price_bands)
+        return self._facets
+
+    def _facet_values(self, index, facet, words, limit):
+        counts = index.counts(facet, words)
+        codes = np.flatnonzero(counts)
+        if facet in ("category", "brand"):
+            codes = codes[np.argsort(-counts[codes], kind="stable")][:limit]
+        labels = index.labels[facet]
+        return [{"value": labels[code], "count": int(counts[code])} for code in codes.tolist()]
+
+    def _ids_bitmap(self, product_ids):
+        ids = np.asarray(product_ids, dtype=np.int64)
+        pos = np.searchsorted(self.ids, ids)
+        found = pos < len(self.ids)
+        pos = pos[found]
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[pos[self.ids[pos] == ids[found]]] = True
+        return bitmap_from_mask(mask)
+
+    def _empty_bitmap(self):
+        return bitmap_from_mask(np.zeros(len(self.ids), dtype=bool))
+
+    def _union(self, bitmaps):
+        result = None
+        for words in bitmaps:
+            result = words if result is None else result | words
+        return result if result is not None else self._empty_bitmap()
+
+    @staticmethod
+    def _intersect(bitmaps):
+        result = None
+        for words in bitmaps:
+            result = words if result is None else result & words
+        return result
+
+    def _scan_in_stock(self, positions, need):
+        return self._scan(positions, need, lambda part: self.quantity[part] > 0)
+
+    def _scan(self, positions, need, test):
+        """Duyệt positions theo từng khúc cho tới khi đủ `need` vị trí thoả test (trang đầu rất rẻ)."""
+        found, count, start, chunk = [], 0, 0, max(need * 2, 1024)
+        while start < len(positions) and count < need:
+            part = positions[start:start + chunk]
+            hit = part[test(part)]
+            found.append(hit)
+            count += len(hit)
+            start += chunk
+            chunk *= 2
+        return np.concatenate(found)[:need] if found else positions[:0]
+
+    def _sorted_positions(self, category_id, sort):
+        key = (category_id, sort)
+        positions = self._orders.get(key)
+        if positions is not None:
+            return positions
+
+        if sort == "id":
+            # ids đã sort -> vị trí tăng dần chính là thứ tự theo id
+            if category_id is None:
+                positions = np.arange(len(self.ids))
+            elif len(category_id) == 1:
+                positions = np.flatnonzero(self.category_id == category_id[0])
+            else:
+                positions = np.flatnonzero(np.isin(self.category_id, category_id))
+        else:
+            base = self._sorted_positions(category_id, "id")
+            values = {"price": self.price, "created_at": self.created_at, "name": self._names_ranked()}[sort]
+            positions = base[np.argsort(values[base], kind="stable")]
+
+        self._orders[key] = positions
+        return positions
+
+    def _names_ranked(self):
+        if self._name_rank is None:
+            rank = np.empty(len(self.names), dtype=np.int64)
+            rank[sorted(range(len(self.names)), key=self.names.__getitem__)] = np.arange(len(self.names))
+            self._name_rank = rank
+        return self._name_rank
+
+    def stock_counts(self, low_stock_threshold=10, category_id=None):
+        """Đếm theo mức tồn kho: in_stock (>0), low_stock (0 < q < threshold), out_of_stock (=0)."""
+        category_id = _category_key(category_id)
+        with self._lock:
+            quantity = self.quantity if category_id is None else self.quantity[self._sorted_positions(category_id, "id")]
+            in_stock = int(np.count_nonzero(quantity > 0))
+            return {
+                "total_products": len(quantity),
+                "in_stock": in_stock,
+                "out_of_stock": len(quantity) - in_stock,
+                "low_stock": int(np.count_nonzero((quantity > 0) & (quantity < low_stock_threshold))),
+            }
+
+
+# ========================================
+# ✅ SESSION EVENTS (change hub)
+# ========================================
+
+_PRODUCT_FIELDS = ("name", "sku", "price", "category_id", "created_at")
+_INVENTORY_FIELDS = ("quantity", "reserved_quantity")
+
+
+def _collect_changes(session, flush_context):
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+
+    upserts = session.info.setdefault("catalog_upserts", {})
+    deleted = session.info.setdefault("catalog_deleted", set())
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Product):
+            product_id, names = obj.id, _PRODUCT_FIELDS
+        elif isinstance(obj, Inventory):
+            product_id, names = obj.product_id, _INVENTORY_FIELDS
+        else:
+            continue
+        # Chỉ đọc thuộc tính đã nạp, không lazy load trong lúc flush
+        state = inspect(obj).dict
+        upserts.setdefault(product_id, {}).update({k: state[k] for k in names if k in state})
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            deleted.add(obj.id)
+
+
+def _publish_changes(session):
+    upserts = session.info.pop("catalog_upserts", None)
+    deleted = session.info.pop("catalog_deleted", None)
+    if upserts or deleted:
+        catalog.publish(upserts or {}, deleted or set())
+
+
+def _discard_changes(session, transaction):
+    # Transaction ngoài cùng kết thúc mà chưa publish (rollback) -> bỏ; savepoint thì giữ
+    if transaction.parent is not None:
+        return
+    session.info.pop("catalog_upserts", None)
+    session.info.pop("catalog_deleted", None)
+
+
+catalog = CatalogEngine()
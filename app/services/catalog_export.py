@@ -0,0 +1,122 @@
+# app/services/catalog_export.py
+import csv
+import io
+import zlib
+from datetime import date, datetime, timedelta, timezone
+
+from app.utils.streaming import iter_ndjson
+
+EXPORT_FIELDS = (
+    "id", "sku", "name", "description", "price", "category_id", "category_name",
+    "stock", "available_stock", "created_at", "updated_at",
+)
+EXPORT_FORMATS = ("csv", "jsonl")
+MIMETYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+# Số dòng gom trước khi trả 1 chunk
+ROWS_PER_CHUNK = 500
+
+
+def parse_since(raw):
+    """
+    ISO 8601 ("2024-05-01", "2024-05-01T08:30:00", có thể kèm timezone) -> datetime naive UTC
+    (cùng kiểu với updated_at trong DB); None nếu không truyền. Raise ValueError nếu sai định dạng.
+    """
+    if raw is None or not raw.strip():
+        return None
+    raw = raw.strip()
+    try:
+        value = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid updated_since '{raw}', expected ISO 8601") from None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows, fields=EXPORT_FIELDS):
+    """Header + từng row tuple, trả theo chunk ROWS_PER_CHUNK dòng."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(rows, dumps, fields=EXPORT_FIELDS):
+    """1 JSON object / dòng."""
+    return iter_ndjson((dict(zip(fields, row)) for row in rows), dumps)
+
+
+def iter_gzip(chunks, level=6):
+    """Nén gzip dạng stream: chỉ giữ buffer của zlib, không giữ cả file."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = header / trailer gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode(rows, fmt, dumps, gzip=False):
+    """Row tuple (EXPORT_FIELDS) -> iterable chunk (str, hoặc bytes nếu gzip)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{fmt}'. Allowed: {', '.join(EXPORT_FORMATS)}")
+    chunks = iter_csv(rows) if fmt == "csv" else iter_jsonl(rows, dumps)
+    return iter_gzip(chunks) if gzip else chunks
+
+
+class CatalogExportService:
+    """
+    ✅ Export toàn bộ catalog (hoặc phần thay đổi) cho marketplace / search partner.
+
+    - Đọc bằng server-side cursor (yield_per), encode + nén theo chunk -> bộ nhớ cố định
+    - Delta: ?updated_since=<cursor lần trước>; cursor mới = giờ DB lúc bắt đầu export - lookback_seconds.
+      updated_at được gán lúc chạy câu UPDATE chứ không phải lúc commit: transaction ghi trước mốc
+      nhưng commit sau snapshot của export sẽ có updated_at < giờ bắt đầu export. Lookback (>= thời gian
+      transaction dài nhất + replication lag) để delta sau đọc lại khoảng chồng lấn đó; các dòng lặp
+      lại là vô hại vì partner upsert theo id
+    - Sản phẩm đã xoá không có trong delta: partner cần đồng bộ full định kỳ
+    """
+
+    def __init__(self, session=None, lookback_seconds=None):
+        from app.repositories import ProductRepository
+
+        if lookback_seconds is None:
+            from flask import current_app
+            lookback_seconds = current_app.config.get('CATALOG_EXPORT_LOOKBACK_SECONDS', 300)
+        self.product_repo = ProductRepository(session)
+        self.lookback = timedelta(seconds=lookback_seconds)
+
+    def start(self, fmt, since=None, gzip=False, dumps=None):
+        """Return: (cursor, iterable chunk). Cursor lấy trước khi query, lùi lại lookback (xem docstring class)."""
+        if dumps is None:
+            from flask import current_app
+            dumps = current_app.json.dumps
+        cursor = self.product_repo.get_db_now()
+        if isinstance(cursor, str):
+            cursor = datetime.fromisoformat(cursor)
+        cursor -= self.lookback
+        return cursor, encode(self.product_repo.iter_export_rows(since), fmt, dumps, gzip)
+
+    def write(self, output, fmt, since=None, gzip=False):
+        """Ghi ra file object (mở dạng binary). Return: cursor."""
+        cursor, chunks = self.start(fmt, since, gzip)
+        for chunk in chunks:
+            output.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        return cursor
@@ -0,0 +1,161 @@
+# app/services/catalog_facets.py
+import numpy as np
+
+FACETS = ("category", "brand", "price", "in_stock")
+SMALL_FACET = 16
+
+
+def brand_of(name):
+    """Không có cột brand: lấy từ đầu tiên của tên sản phẩm ("Lenovo Laptop AB01" -> "Lenovo")."""
+    word = name.split(None, 1)[0].strip(" -,.()[]") if name and name.strip() else ""
+    return word or "Other"
+
+
+def price_band_labels(edges):
+    """[0, 50, 100] -> ["0-50", "50-100", "100+"]"""
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return labels + [f"{edges[-1]:g}+"]
+
+
+def bitmap_from_mask(mask):
+    """bool array -> bitmap uint64 (bit i = sản phẩm ở vị trí i)."""
+    packed = np.packbits(mask, bitorder="little")
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def bitmap_positions(words, n):
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), count=n, bitorder="little"))
+
+
+def bitmap_count(words):
+    return int(np.bitwise_count(words).sum())
+
+
+def bitmap_contains(words, positions):
+    return ((words[positions >> 6] >> (positions & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+class FacetIndex:
+    """
+    ✅ Bitmap theo từng giá trị facet (category / brand / price band / in_stock) trên vị trí
+    sản phẩm của CatalogEngine.
+
+    - Mỗi facet có mảng code theo vị trí + danh sách label; bitmap (uint64, 1 bit / sản phẩm)
+      của 1 giá trị tạo lần đầu khi được lọc rồi giữ lại — lọc nhiều facet = AND các bitmap
+    - Ghi (đổi giá / category / tên / tồn kho) chỉ lật bit và sửa số đếm của code cũ + mới
+    - Thêm / xoá sản phẩm làm lệch vị trí -> CatalogEngine bỏ index và dựng lại lazy
+    """
+
+    def __init__(self, names, price, category_id, quantity, price_edges):
+        self.n = len(price)
+        self.price_edges = np.asarray(price_edges, dtype=np.float64)
+        self.labels = {"price": price_band_labels(list(price_edges)), "in_stock": [False, True]}
+        self.codes = {
+            "price": self._price_codes(price),
+            "in_stock": (quantity > 0).astype(np.intp),
+        }
+
+        categories, codes = np.unique(category_id, return_inverse=True)
+        self.labels["category"] = categories.tolist()
+        self.codes["category"] = codes.astype(np.intp)
+
+        brand_codes, brands, self._brand_lookup = np.empty(self.n, dtype=np.intp), [], {}
+        for pos, name in enumerate(names):
+            brand = brand_of(name)
+            code = self._brand_lookup.get(brand.lower())
+            if code is None:
+                code = self._brand_lookup[brand.lower()] = len(brands)
+                brands.append(brand)
+            brand_codes[pos] = code
+        self.labels["brand"] = brands
+        self.codes["brand"] = brand_codes
+
+        self._bitmaps = {}          # (facet, code) -> bitmap
+        self._full_counts = {}      # facet -> số sản phẩm theo code (không filter)
+
+    def _price_codes(self, price):
+        return np.maximum(np.searchsorted(self.price_edges, price, side="right") - 1, 0)
+
+    # ========================================
+    # ✅ LOOKUP
+    # ========================================
+
+    def code_of(self, facet, value):
+        """Label -> code; None nếu không có sản phẩm nào mang giá trị này."""
+        if facet == "brand":
+            return self._brand_lookup.get(str(value).lower())
+        if facet == "in_stock":
+            return int(bool(value))
+        try:
+            return self.labels[facet].index(value)
+        except ValueError:
+            return None
+
+    def bitmap(self, facet, code):
+        words = self._bitmaps.get((facet, code))
+        if words is None:
+            words = self._bitmaps[(facet, code)] = bitmap_from_mask(self.codes[facet] == code)
+        return words
+
+    def counts(self, facet, words=None):
+        """Số sản phẩm theo code của facet, trong tập `words` (None = cả catalog)."""
+        labels = len(self.labels[facet])
+        if words is None:
+            counts = self._full_counts.get(facet)
+            if counts is None:
+                counts = self._full_counts[facet] = np.bincount(self.codes[facet], minlength=labels)
+            return counts
+        if labels <= SMALL_FACET:
+            # Ít giá trị (price band, in_stock): AND + popcount từng bitmap
+            return np.array([bitmap_count(words & self.bitmap(facet, code)) for code in range(labels)])
+        if bitmap_count(words) * 16 < self.n:
+            # Tập thưa: chỉ gom code của các vị trí được chọn
+            return np.bincount(self.codes[facet][bitmap_positions(words, self.n)], minlength=labels)
+        # Tập dày: bincount cả mảng với trọng số 0/1, tránh gather ngẫu nhiên
+        mask = np.unpackbits(words.view(np.uint8), count=self.n, bitorder="little")
+        return np.bincount(self.codes[facet], weights=mask, minlength=labels).astype(np.int64)
+
+    # ========================================
+    # ✅ UPDATE
+    # ========================================
+
+    def update(self, pos, name=None, price=None, category_id=None, quantity=None):
+        if price is not None:
+            self._move(pos, "price", int(self._price_codes(np.array([price]))[0]))
+        if quantity is not None:
+            self._move(pos, "in_stock", int(quantity > 0))
+        if category_id is not None:
+            code = self.code_of("category", category_id)
+            if code is None:
+                code = self._new_label("category", category_id)
+            self._move(pos, "category", code)
+        if name is not None:
+            brand = brand_of(name)
+            code = self._brand_lookup.get(brand.lower())
+            if code is None:
+                code = self._brand_lookup[brand.lower()] = self._new_label("brand", brand)
+            self._move(pos, "brand", code)
+
+    def _new_label(self, facet, label):
+        self.labels[facet].append(label)
+        counts = self._full_counts.get(facet)
+        if counts is not None:
+            self._full_counts[facet] = np.append(counts, 0)
+        return len(self.labels[facet]) - 1
+
+    def _move(self, pos, facet, code):
+        old = int(self.codes[facet][pos])
+        if old == code:
+            return
+        self.codes[facet][pos] = code
+        word, bit = pos >> 6, np.uint64(1 << (pos & 63))
+        if (facet, old) in self._bitmaps:
+            self._bitmaps[(facet, old)][word] &= ~bit
+        if (facet, code) in self._bitmaps:
+            self._bitmaps[(facet, code)][word] |= bit
+        counts = self._full_counts.get(facet)
+        if counts is not None:
+            counts[old] -= 1
+            counts[code] += 1
@@ -0,0 +1,301 @@
+# app/services/catalog_version.py
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from itertools import chain
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.utils.cache import TTLCache
+from app.utils.serialization import wants_msgpack
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAME = "catalog:version"
+
+
+class CatalogVersion:
+    """
+    ✅ Validator của dữ liệu catalog (sản phẩm, tồn kho, category) cho ETag / 304, 2 mức:
+    - listing (dashboard_counters["catalog:version"], SUM các slot): listing / search / menu category.
+      +1 khi Product / Category đổi hoặc tồn kho qua mốc còn hàng <-> hết hàng. Đổi số lượng
+      không qua mốc 0 (giữ hàng, thanh toán, nhập thêm) KHÔNG bump -> checkout không làm mất 304
+      của cả catalog; field stock trong listing có thể cũ tới lần bump sau, số chính xác ở trang chi tiết
+    - từng sản phẩm: trang chi tiết, hash của products.updated_at / inventory.updated_at cùng các cột
+      trang chi tiết hiển thị (DATETIME chỉ chính xác tới giây, checkout đổi tồn kho nhiều lần mỗi giây;
+      Last-Modified = updated_at mới nhất). 1 SELECT theo PK, không ghi gì thêm: xoá sản phẩm
+      là hết validator, không có row nào phải dọn
+
+    - Đọc = 1 lookup theo PK, không quét bảng
+    - +1 ở transaction riêng ngay sau commit, vào 1 slot ngẫu nhiên (như CounterRepository):
+      không giữ lock row counter trong transaction ghi, các commit đồng thời không tranh 1 row
+    - Mỗi worker cache tối đa ttl_seconds; commit trong chính worker xoá cache ngay
+    - Ghi hàng loạt không qua flush (query.delete, Core insert / update qua session) bắt ở do_orm_execute
+    """
+
+    def __init__(self, ttl_seconds=1.0, shards=None):
+        self.enabled = False
+        self.ttl_seconds = ttl_seconds
+        self.shards = shards        # None -> COUNTER_SHARDS như các counter dashboard
+        self._lock = threading.Lock()
+        self._current = None        # (version, updated_at)
+        self._expires_at = 0.0
+        self._products = TTLCache(maxsize=100_000, ttl=ttl_seconds)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CATALOG_ETAG_ENABLED', True)
+        self.ttl_seconds = app.config.get('CATALOG_VERSION_TTL_SECONDS', self.ttl_seconds)
+        self._products = TTLCache(maxsize=100_000, ttl=self.ttl_seconds)
+        if self.enabled and not event.contains(Session, "after_flush", _track_writes):
+            event.listen(Session, "after_flush", _track_writes)
+            event.listen(Session, "after_commit", _bump_after_commit)
+            event.listen(Session, "after_transaction_end", _discard_flag)
+            event.listen(Session, "do_orm_execute", _track_bulk_writes)
+
+    def current(self):
+        """(version, updated_at) của listing — gọi trong app context."""
+        cached = self._current
+        if cached is not None and time.monotonic() < self._expires_at:
+            return cached
+        from app import db
+        from app.models.dashboard_counter import DashboardCounter
+
+        from app.utils.db_routing import use_primary
+
+        # Cache dùng chung cả worker -> đọc primary, replica trễ sẽ giữ version cũ tới hết TTL
+        with use_primary():
+            version, updated_at = db.session.execute(
+                select(func.sum(DashboardCounter.value), func.max(DashboardCounter.updated_at))
+                .where(DashboardCounter.name == COUNTER_NAME)
+            ).one()
+        current = (int(version or 0), updated_at)
+        with self._lock:
+            self._current, self._expires_at = current, time.monotonic() + self.ttl_seconds
+        return current
+
+    def product(self, product_id):
+        """(tag, last_modified) của 1 sản phẩm; None nếu không có sản phẩm."""
+        return self._products.get_or_set(product_id, lambda: self._read_product(product_id))
+
+    def _read_product(self, product_id):
+        from app import db
+        from app.models.inventory import Inventory
+        from app.models.product import Product
+
+        from app.utils.db_routing import use_primary
+
+        with use_primary():
+            row = db.session.execute(
+                select(
+                    Product.updated_at, Inventory.updated_at,
+                    Product.sku, Product.name, Product.description, Product.price, Product.category_id,
+                    Inventory.quantity, Inventory.reserved_quantity,
+                )
+                .outerjoin(Inventory, Inventory.product_id == Product.id)
+                .where(Product.id == product_id)
+            ).first()
+        if row is None:
+            return None
+        tag = hashlib.blake2b(repr(tuple(row)).encode(), digest_size=8).hexdigest()
+        last_modified = max((ts for ts in row[:2] if ts is not None), default=None)
+        return tag, last_modified
+
+    def bump(self):
+        """+1 listing version bằng connection riêng (autocommit ngắn). Lỗi chỉ log: ETag cũ hơn dữ liệu tới lần ghi sau."""
+        from app import db
+        from app.models.dashboard_counter import DashboardCounter
+        from app.repositories.counter_repository import COUNTER_SHARDS
+
+        table = DashboardCounter.__table__
+        slot = random.randrange(self.shards or COUNTER_SHARDS)
+        now = datetime.utcnow()
+        where = (table.c.name == COUNTER_NAME) & (table.c.slot == slot)
+        try:
+            with db.engine.begin() as conn:
+                if not conn.execute(update(table).where(where).values(value=table.c.value + 1, updated_at=now)).rowcount:
+                    try:
+                        with conn.begin_nested():
+                            conn.execute(insert(table).values(name=COUNTER_NAME, slot=slot, value=1, updated_at=now))
+                    except IntegrityError:
+                        # Worker khác vừa tạo row
+                        conn.execute(update(table).where(where).values(value=table.c.value + 1, updated_at=now))
+        except Exception as e:
+            logger.error(f"Failed to bump catalog version: {str(e)}")
+        finally:
+            self.invalidate()
+
+    def invalidate(self, product_ids=(), listing=True):
+        """product_ids=None -> bỏ validator của mọi sản phẩm đang cache trong worker."""
+        if listing:
+            self._expires_at = 0.0
+        if product_ids is None:
+            self._products.clear()
+            return
+        for product_id in product_ids:
+            self._products.pop(product_id)
+
+    def etag(self, variant=""):
+        version, updated_at = self.current()
+        return f"{version}{'-' + variant if variant else ''}", updated_at
+
+    def product_etag(self, product_id, variant=""):
+        """(etag, last_modified) hoặc None nếu sản phẩm không tồn tại."""
+        validator = self.product(product_id)
+        if validator is None:
+            return None
+        tag, last_modified = validator
+        return f"p{tag}{'-' + variant if variant else ''}", last_modified
+
+
+# ========================================
+# ✅ SESSION EVENTS
+# ========================================
+
+def _track_writes(session, flush_context):
+    from app.models.category import Category
+    from app.models.category_closure import CategoryClosure
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+
+    listing = False
+    products = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Category, CategoryClosure)):
+            listing = True
+        elif isinstance(obj, Product):
+            listing = True
+            products.add(obj.id)
+        elif isinstance(obj, Inventory):
+            products.add(obj.product_id)
+            if obj in session.new or obj in session.deleted or _stock_crossed(obj):
+                listing = True
+    if listing:
+        session.info["catalog_version_changed"] = True
+    if products:
+        session.info.setdefault("catalog_products_changed", set()).update(products)
+
+
+def _stock_crossed(inventory):
+    """Tồn kho qua mốc còn hàng <-> hết hàng trong flush này (chỉ đổi reserved_quantity -> False)."""
+    history = inspect(inventory).attrs.quantity.history
+    if not history.has_changes():
+        return False
+    if not history.deleted or history.deleted[0] is None:
+        # Giá trị cũ chưa nạp -> không biết có qua mốc không, bump cho chắc
+        return True
+    return (history.deleted[0] > 0) != ((inventory.quantity or 0) > 0)
+
+
+# Ghi hàng loạt không đi qua flush (query.delete, Core insert / update qua session) vào các bảng này
+_LISTING_TABLES = frozenset(("products", "inventory", "categories", "category_closure"))
+_DETAIL_TABLES = frozenset(("products", "inventory"))
+
+
+def _track_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    name = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    if name in _LISTING_TABLES:
+        # Không biết dòng nào / tồn kho có qua mốc 0 không -> bump cho chắc
+        orm_execute_state.session.info["catalog_version_changed"] = True
+    if name in _DETAIL_TABLES:
+        orm_execute_state.session.info["catalog_products_bulk"] = True
+
+
+def _bump_after_commit(session):
+    products = session.info.pop("catalog_products_changed", ())
+    if session.info.pop("catalog_products_bulk", False):
+        products = None
+    if session.info.pop("catalog_version_changed", False):
+        catalog_version.bump()
+    # Validator trang chi tiết đọc từ updated_at: chỉ cần bỏ bản cache của worker này
+    catalog_version.invalidate(products, listing=False)
+
+
+def _discard_flag(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("catalog_version_changed", None)
+        session.info.pop("catalog_products_changed", None)
+        session.info.pop("catalog_products_bulk", None)
+
+
+# ========================================
+# ✅ CONDITIONAL GET
+# ========================================
+
+def conditional_catalog_get(unless=None, on_not_modified=None, product=None):
+    """
+    ETag (weak) theo catalog version cho GET endpoint chỉ phụ thuộc dữ liệu catalog.
+    If-None-Match / If-Modified-Since khớp -> 304 trước khi chạy view (không query, không serialize).
+    Version đọc TRƯỚC dữ liệu: commit xen giữa chỉ làm ETag cũ hơn body, không bao giờ ngược lại.
+    - unless(): True -> bỏ qua (response phụ thuộc dữ liệu khác catalog, vd bestseller)
+    - on_not_modified(**kwargs): side effect của view vẫn cần khi trả 304 (vd đếm lượt xem)
+    - product(**kwargs): id sản phẩm -> dùng version của riêng sản phẩm đó (trang chi tiết)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not catalog_version.enabled or request.method != "GET" or (unless and unless()):
+                return view(*args, **kwargs)
+            if product is not None:
+                # Chi tiết đọc thẳng DB, không phụ thuộc bản catalog engine trong bộ nhớ
+                variant, from_engine = _variant(with_engine=False)
+                tagged = catalog_version.product_etag(product(*args, **kwargs), variant)
+                if tagged is None:
+                    return view(*args, **kwargs)  # không có sản phẩm -> 404 không gắn ETag
+                etag, last_modified = tagged
+            else:
+                variant, from_engine = _variant()
+                etag, last_modified = catalog_version.etag(variant)
+            if from_engine:
+                # Reload catalog engine đổi nội dung mà không đổi mốc thời gian trong DB -> chỉ dùng ETag
+                last_modified = None
+            if _not_modified(etag, last_modified):
+                if on_not_modified:
+                    on_not_modified(*args, **kwargs)
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Cache (browser / proxy) được lưu nhưng phải hỏi lại server mỗi lần dùng
+            response.cache_control.no_cache = True
+            response.vary.add("Accept")
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _variant(with_engine=True):
+    """(phần thêm vào ETag, có dùng catalog engine không)."""
+    from app.services.catalog_engine import catalog
+
+    parts = ["m"] if wants_msgpack() else []
+    if with_engine and catalog.ready:
+        # Listing từ catalog engine: bản trong bộ nhớ của worker có thể cũ hơn DB tới lần reload
+        parts.append(catalog.content_tag)
+    return "-".join(parts), with_engine and catalog.ready
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+catalog_version = CatalogVersion()
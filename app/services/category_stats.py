@@ -0,0 +1,238 @@
+# app/services/category_stats.py
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.services.category_tree import build_tree, rollup
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNT_FIELDS = ("product_count", "in_stock_count")
+
+
+def count_deltas(changes):
+    """
+    changes: iterable (category trước, tồn kho trước, category sau, tồn kho sau) của từng sản phẩm;
+    category None = sản phẩm chưa tồn tại / đã xoá, tồn kho None = chưa có inventory.
+    Return: {category_id: (product_delta, in_stock_delta)}, bỏ category không đổi.
+    """
+    deltas = {}
+    for before_category, before_quantity, after_category, after_quantity in changes:
+        for category_id, quantity, sign in ((before_category, before_quantity, -1), (after_category, after_quantity, 1)):
+            if category_id is None:
+                continue
+            products, in_stock = deltas.get(category_id, (0, 0))
+            deltas[category_id] = (products + sign, in_stock + sign * int((quantity or 0) > 0))
+    return {category_id: delta for category_id, delta in deltas.items() if delta != (0, 0)}
+
+
+class CategoryStats:
+    """
+    ✅ Số sản phẩm / còn hàng theo category + listing category trong bộ nhớ.
+
+    - Counter là cột categories.product_count / in_stock_count, cộng trừ bằng UPDATE atomic
+      ngay trong flush (tạo / xoá sản phẩm, đổi category, tồn kho qua mốc 0) -> đi cùng transaction
+    - listing() / tree(): đọc 1 lần rồi giữ trong bộ nhớ; commit có đổi counter hoặc category
+      trong process này làm mới ngay; worker khác làm mới khi catalog version đổi (ETag bật)
+      hoặc sau tối đa ttl_seconds
+    - Ghi hàng loạt không qua flush (query.delete, Core update qua session) bắt ở do_orm_execute;
+      caller tự cộng trừ counter (CategoryRepository.adjust_counts), hook chỉ làm mới listing
+    - reconcile_category_counts() chạy định kỳ trên leader để sửa drift (ghi trực tiếp DB, seed, ...)
+    """
+
+    def __init__(self, ttl_seconds=30):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._rows = None
+        self._expires_at = 0.0
+        self._version = 0
+        self._catalog_version = None    # catalog version lúc đọc bản đang cache
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config.get('CATEGORY_LISTING_TTL_SECONDS', self.ttl_seconds)
+        if not event.contains(Session, "after_flush", _track_counts):
+            event.listen(Session, "after_flush", _track_counts)
+            event.listen(Session, "after_commit", _refresh_listing)
+            event.listen(Session, "after_transaction_end", _discard_flag)
+            event.listen(Session, "do_orm_execute", _track_bulk_writes)
+
+    def listing(self):
+        """list dict (id, name, parent_id, product_count, in_stock_count) sort theo name. Gọi trong app context."""
+        from app.services.catalog_version import catalog_version
+
+        # Đọc trước dữ liệu: bản cache không bao giờ cũ hơn version đi kèm (ETag của endpoint)
+        current = catalog_version.current()[0] if catalog_version.enabled else None
+        rows = self._rows
+        if self._is_fresh(rows, current):
+            return rows
+        from app.repositories import CategoryRepository
+        from app.utils.db_routing import use_primary
+
+        with self._lock:
+            if self._is_fresh(self._rows, current):
+                return self._rows
+            version = self._version
+            with use_primary():
+                rows = CategoryRepository().get_listing_rows()
+            # Có commit xen vào lúc đang đọc -> không cache bản có thể đã cũ
+            if version == self._version:
+                self._rows, self._catalog_version = rows, current
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            return rows
+
+    def _is_fresh(self, rows, current):
+        return rows is not None and time.monotonic() < self._expires_at and self._catalog_version == current
+
+    def tree(self):
+        """Cây category kèm total_product_count / total_in_stock_count của cả cây con."""
+        return rollup(build_tree(self.listing()), COUNT_FIELDS)
+
+    def invalidate(self):
+        self._version += 1
+        self._rows = None
+
+
+# ========================================
+# ✅ SESSION EVENTS
+# ========================================
+
+def _change(obj, name):
+    """(trước, sau) của thuộc tính trong flush hiện tại; None nếu không đổi."""
+    history = inspect(obj).attrs[name].history
+    if not history.has_changes():
+        return None
+    after = getattr(obj, name)
+    # Thuộc tính chưa nạp trước khi gán -> không biết giá trị cũ, để reconcile sửa
+    before = history.deleted[0] if history.deleted else after
+    return None if before == after else (before, after)
+
+
+def _committed(obj, name):
+    history = inspect(obj).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(obj, name)
+
+
+def _loaded_state(session, product_model, inventory_model, product_id):
+    """(category_id, quantity) đã commit của sản phẩm nếu Product + Inventory đều đã nạp trong session, không thì None."""
+    product = session.identity_map.get(identity_key(product_model, product_id))
+    if product is None or "inventory" not in inspect(product).dict:
+        return None
+    inventory = product.inventory
+    if inventory is not None and not isinstance(inventory, inventory_model):
+        return None
+    return (
+        _committed(product, "category_id"),
+        _committed(inventory, "quantity") if inventory is not None else None,
+    )
+
+
+def _track_counts(session, flush_context):
+    from app.models.category import Category
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+    from app.repositories import CategoryRepository
+
+    categories, quantities = {}, {}  # product_id -> (trước, sau)
+    for obj in session.new:
+        if isinstance(obj, Product):
+            categories[obj.id] = (None, obj.category_id)
+        elif isinstance(obj, Inventory):
+            quantities[obj.product_id] = (None, obj.quantity)
+    for obj in session.dirty:
+        if isinstance(obj, Product):
+            change = _change(obj, "category_id")
+            if change:
+                categories[obj.id] = change
+        elif isinstance(obj, Inventory):
+            change = _change(obj, "quantity")
+            if change:
+                quantities[obj.product_id] = change
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            categories[obj.id] = (_committed(obj, "category_id"), None)
+        elif isinstance(obj, Inventory):
+            quantities[obj.product_id] = (_committed(obj, "quantity"), None)
+
+    if any(isinstance(obj, Category) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["category_counts_changed"] = True
+    # Tồn kho đổi nhưng không qua mốc 0 (phần lớn lần thanh toán / nhập hàng) không đổi counter nào
+    quantities = {
+        pid: change for pid, change in quantities.items()
+        if pid in categories or ((change[0] or 0) > 0) != ((change[1] or 0) > 0)
+    }
+    product_ids = categories.keys() | quantities.keys()
+    if not product_ids:
+        return
+
+    # Phần không đổi trong flush này (vd chỉ đổi tồn kho): trạng thái hiện tại trong DB = trước = sau.
+    # Lấy từ object đã nạp trong session nếu có, chỉ SELECT phần còn thiếu
+    current = {}
+    missing = []
+    for pid in product_ids:
+        if pid in categories and pid in quantities:
+            continue
+        known = _loaded_state(session, Product, Inventory, pid)
+        if known is None:
+            missing.append(pid)
+        else:
+            current[pid] = known
+    if missing:
+        rows = session.connection().execute(
+            select(Product.id, Product.category_id, Inventory.quantity)
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .where(Product.id.in_(missing))
+        )
+        current.update({product_id: (category_id, quantity) for product_id, category_id, quantity in rows})
+
+    changes = []
+    for product_id in product_ids:
+        category_id, quantity = current.get(product_id, (None, None))
+        before_category, after_category = categories.get(product_id, (category_id, category_id))
+        before_quantity, after_quantity = quantities.get(product_id, (quantity, quantity))
+        changes.append((before_category, before_quantity, after_category, after_quantity))
+
+    deltas = count_deltas(changes)
+    if deltas:
+        CategoryRepository(session).adjust_counts(deltas, session.connection())
+        session.info["category_counts_changed"] = True
+
+
+def _refresh_listing(session):
+    if session.info.pop("category_counts_changed", False):
+        category_stats.invalidate()
+
+
+def _discard_flag(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("category_counts_changed", None)
+
+
+# Ghi hàng loạt không đi qua flush (query.delete, Core update qua session) vào các bảng này
+_COUNTED_TABLES = frozenset(("products", "inventory", "categories"))
+
+
+def _track_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) in _COUNTED_TABLES:
+        orm_execute_state.session.info["category_counts_changed"] = True
+
+
+def reconcile_category_counts():
+    from app.repositories import CategoryRepository
+
+    drifted = CategoryRepository().reconcile_counts()
+    if drifted:
+        logger.warning(f"Category counters drifted for {drifted} categories")
+        category_stats.invalidate()
+    return drifted
+
+
+category_stats = CategoryStats()
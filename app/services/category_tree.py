@@ -0,0 +1,58 @@
+# app/services/category_tree.py
+
+
+def closure_rows(parents):
+    """
+    Dựng toàn bộ closure từ quan hệ cha-con.
+    parents: {category_id: parent_id | None}
+    Return: list (ancestor_id, descendant_id, depth), gồm cả (X, X, 0).
+    """
+    rows = []
+    for node in parents:
+        seen, current, depth = set(), node, 0
+        while current is not None:
+            if current in seen:
+                raise ValueError(f"Category cycle detected at {current}")
+            seen.add(current)
+            rows.append((current, node, depth))
+            current, depth = parents.get(current), depth + 1
+    return rows
+
+
+def move_rows(new_ancestors, subtree):
+    """
+    Các dòng closure cần thêm khi gắn cây con vào cha mới.
+    - new_ancestors: list (ancestor_id, depth tới cha mới) của cha mới, gồm chính nó (depth 0)
+    - subtree: list (descendant_id, depth từ gốc cây con), gồm gốc (depth 0)
+    Return: tích chéo, depth = depth tới cha + 1 + depth trong cây con.
+    """
+    return [
+        (ancestor, descendant, up + 1 + down)
+        for ancestor, up in new_ancestors
+        for descendant, down in subtree
+    ]
+
+
+def build_tree(categories):
+    """
+    categories: list dict có id, parent_id -> list node gốc, mỗi node thêm "children" (sort theo name).
+    Node có cha không nằm trong danh sách được coi là gốc.
+    """
+    nodes = {c["id"]: {**c, "children": []} for c in categories}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.get("parent_id"))
+        (parent["children"] if parent is not None else roots).append(node)
+    for node in nodes.values():
+        node["children"].sort(key=lambda c: (c.get("name") or "", c["id"]))
+    roots.sort(key=lambda c: (c.get("name") or "", c["id"]))
+    return roots
+
+
+def rollup(roots, fields):
+    """Cộng dồn các field số theo cây con: node["total_<field>"] = field của node + mọi con cháu."""
+    for node in roots:
+        rollup(node["children"], fields)
+        for field in fields:
+            node[f"total_{field}"] = (node.get(field) or 0) + sum(c[f"total_{field}"] for c in node["children"])
+    return roots
@@ -0,0 +1,117 @@
+# app/services/dashboard_metrics.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from app import db
+from app.models.dashboard_counter import DashboardCounter
+from app.models.order import Order, OrderStatus, REVENUE_STATUSES
+from app.models.product import Product
+from app.models.user import User
+from app.repositories import CounterRepository
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Giữ counter theo ngày trong bao nhiêu ngày
+DAY_COUNTER_RETENTION_DAYS = 30
+
+# Row dùng làm mutex cho reconcile (không phải counter)
+RECONCILE_LOCK = "lock:dashboard_reconcile"
+
+
+class DashboardMetricsService:
+    """
+    ✅ Số liệu admin dashboard đọc từ bảng dashboard_counters.
+
+    Counter được cộng/trừ trong cùng transaction với write path (ProductRepository,
+    OrderService / OrderRepository, UserRepository) nên dashboard chỉ cần SUM vài row
+    theo primary key, không COUNT/SUM trên bảng lớn. reconcile() chạy định kỳ trên leader
+    (và ngay khi được bầu) để sửa drift (seed data, ghi trực tiếp vào DB, ...).
+    """
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self.counter_repo = CounterRepository(self.session)
+
+    def get_summary(self):
+        names = (
+            ["products", "users", "orders", CounterRepository.day_key()]
+            + [f"orders:{s.value}" for s in OrderStatus]
+            + [f"revenue:{s}" for s in REVENUE_STATUSES]
+        )
+        # DB cũ chưa reconcile lần nào: counter chỉ có phần cộng dồn từ lúc deploy tới job reconcile đầu tiên
+        values = self.counter_repo.get_values(names)
+
+        def number(name):
+            return values.get(name) or Decimal(0)
+
+        return {
+            "total_products": int(number("products")),
+            "total_users": int(number("users")),
+            "total_orders": int(number("orders")),
+            "orders_today": int(number(CounterRepository.day_key())),
+            "total_revenue": sum((number(f"revenue:{s}") for s in REVENUE_STATUSES), Decimal(0)),
+            "orders_by_status": {s.value: int(number(f"orders:{s.value}")) for s in OrderStatus},
+        }
+
+    def reconcile(self):
+        """
+        Tính lại counter từ bảng gốc và cộng phần lệch (drift) vào counter.
+        - Lock row RECONCILE_LOCK trước: 2 reconcile chạy cùng lúc sẽ cộng cùng 1 drift 2 lần
+        - Đọc bảng gốc và counter trong cùng transaction (cùng snapshot) -> order đang checkout
+          chưa commit không nằm ở cả hai vế; cộng delta (không ghi đè) nên không mất phần
+          cộng dồn commit sau snapshot
+        Return: số counter bị lệch đã được sửa (dùng làm rows_processed của job).
+        """
+        self.counter_repo.lock(RECONCILE_LOCK)
+        today = datetime.utcnow().date()
+        actual = {
+            "products": self.session.query(func.count(Product.id)).scalar() or 0,
+            "users": self.session.query(func.count(User.id)).scalar() or 0,
+            "orders": 0,
+            CounterRepository.day_key(today): (
+                self.session.query(func.count(Order.id))
+                .filter(Order.created_at >= datetime.combine(today, datetime.min.time()))
+                .scalar() or 0
+            ),
+        }
+        for status in OrderStatus:
+            actual[f"orders:{status.value}"] = 0
+            actual[f"revenue:{status.value}"] = 0
+
+        rows = (
+            self.session.query(Order.status, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+            .group_by(Order.status)
+            .all()
+        )
+        for status, count, revenue in rows:
+            actual["orders"] += count
+            actual[f"orders:{status}"] = count
+            actual[f"revenue:{status}"] = revenue
+
+        current = self.counter_repo.get_values(actual.keys())
+        drifted = {}
+        for name, value in actual.items():
+            delta = Decimal(str(value)) - Decimal(str(current.get(name) or 0))
+            if delta:
+                drifted[name] = delta
+        if drifted:
+            if current:
+                logger.warning(f"Dashboard counters drifted: {sorted(drifted)}")
+            self.counter_repo.increment_many(drifted)
+
+        cutoff = CounterRepository.day_key(today - timedelta(days=DAY_COUNTER_RETENTION_DAYS))
+        (
+            self.session.query(DashboardCounter)
+            .filter(DashboardCounter.name.like("orders:day:%"), DashboardCounter.name < cutoff)
+            .delete(synchronize_session=False)
+        )
+        self.session.commit()
+        return len(drifted)
+
+
+def reconcile_dashboard_counters():
+    return DashboardMetricsService().reconcile()
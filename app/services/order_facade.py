@@ -3,7 +3,10 @@ from .order_service import OrderService
 from .inventory_service import InventoryService
 from .payment_factory import PaymentFactory
 from app.models.order import OrderStatus
+from app.tasks.order_expiry import order_expiry
+from app.services.bestseller_tracker import bestsellers
 from app import db
+from app.utils.db_routing import read_replica, use_primary
 
 import logging
 from datetime import datetime, timedelta
@@ -12,19 +15,20 @@ from functools import wraps
 logger = logging.getLogger(__name__)
 
 def with_transaction(func):
-    """✅ Decorator để quản lý transaction tự động."""
+    """✅ Decorator để quản lý transaction tự động (mọi query trong transaction đi primary)."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        try:
-            # Bắt đầu savepoint để có thể rollback
-            db.session.begin_nested()
-            result = func(*args, **kwargs)
-            db.session.commit()
-            return result
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Transaction rolled back: {str(e)}")
-            raise
+        with use_primary():
+            try:
+                # Bắt đầu savepoint để có thể rollback
+                db.session.begin_nested()
+                result = func(*args, **kwargs)
+                db.session.commit()
+                return result
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Transaction rolled back: {str(e)}")
+                raise
     return wrapper
 
 class OrderFacade:
@@ -106,6 +110,9 @@ class OrderFacade:
             logger.info(f"Reserving inventory for PENDING order {order.id}")
             inventory_service.reserve_stock(items)
 
+            # Đăng ký deadline thanh toán vào expiry timer
+            order_expiry.schedule(order.id, order.created_at)
+
             logger.info(f"Order {order.id} created as PENDING. Awaiting payment.")
 
             return {
@@ -153,6 +160,7 @@ class OrderFacade:
                     }
                 time.sleep(2 ** attempt)
     @staticmethod
+    @read_replica
     def get_order(order_id):
         try:
             order_service = OrderService()
@@ -176,6 +184,7 @@ class OrderFacade:
             }
 
     @staticmethod
+    @read_replica
     def get_user_orders(user_id):
         """ Get user orders"""
         try:
@@ -229,6 +238,7 @@ class OrderFacade:
             
             order_service.update_order_status(order_id, OrderStatus.CANCELLED.value)
             db.session.commit()
+            order_expiry.discard(order_id)
             
             logger.info(f"Order {order_id} cancelled. Reason: {reason}")
             
@@ -320,6 +330,8 @@ class OrderFacade:
             # Update status to PAID
             order_service.update_order_status(order_id, OrderStatus.PAID.value)
             db.session.commit()
+            order_expiry.discard(order_id)
+            bestsellers.record_items(items, at=order.paid_at)
 
             return {
                 "success": True,
@@ -345,22 +357,28 @@ class OrderFacade:
             order_service = OrderService()
             inventory_service = InventoryService()
 
-            order = order_service.get_order_with_items(order_id)
+            # Lock row: timer của worker tạo order và recovery của leader có thể cùng tới hạn
+            order = order_service.get_order_for_update(order_id)
             if not order:
+                db.session.rollback()
                 return {"success": False, "error": "Order not found"}
 
             # Chỉ hủy PENDING
             if order.status != OrderStatus.PENDING.value:
+                db.session.rollback()
                 return {"success": False, "message": f"Order not PENDING. Status: {order.status}"}
 
             # Kiểm tra thời gian
             now = datetime.utcnow()
             if order.created_at + timedelta(seconds=timeout_seconds) > now:
-                return {"success": False, "message": "Order is still within payment window"}
+                db.session.rollback()
+                return {"success": False, "within_window": True, "message": "Order is still within payment window"}
 
-            # Restock
-            for item in order.items:
-                inventory_service.inventory_repo.increase_stock(item.product_id, item.quantity)
+            # Trả lại phần stock đã reserve lúc tạo order PENDING
+            inventory_service.release_reserved_stock([
+                {"product_id": item.product_id, "quantity": item.quantity}
+                for item in order.items
+            ])
 
             # Update status
             order_service.update_order_status(order_id, OrderStatus.CANCELLED.value)
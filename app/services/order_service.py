@@ -1,7 +1,8 @@
 # app/services/order_service.py
 from app import db
-from app.repositories import OrderRepository, ProductRepository, InventoryRepository
+from app.repositories import OrderRepository, ProductRepository, InventoryRepository, CounterRepository
 from app.models.order import OrderStatus
+from app.utils.db_routing import read_replica
 
 import logging
 
@@ -12,6 +13,7 @@ class OrderService:
         self.order_repo = OrderRepository(self.session)
         self.inventory_repo = InventoryRepository(self.session)
         self.product_repo = ProductRepository(self.session)
+        self.counter_repo = CounterRepository(self.session)
     
     def create_order(self, user_id, items, total_amount=0, status=OrderStatus.PENDING.value):
         """Tạo đơn hàng (mặc định pending)."""
@@ -20,6 +22,7 @@ class OrderService:
             self.order_repo.add_items(order, items)
             order.status = status
             self.session.flush()
+            self.counter_repo.record_order_created(status, order.total_amount, order.created_at)
             logger.info(f"Order {order.id} created with status {status}")
             return order
         except Exception as e:
@@ -40,6 +43,10 @@ class OrderService:
     def get_order_with_items(self, order_id):
         return self.order_repo.get_order_with_items(order_id)
 
+    def get_order_for_update(self, order_id):
+        return self.order_repo.get_order_for_update(order_id)
+
+    @read_replica
     def get_orders_by_user(self, user_id):
         return self.order_repo.get_orders_by_user(user_id)
     
@@ -0,0 +1,131 @@
+# app/services/password_hasher.py
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusyError(Exception):
+    """Pool hash đã đầy hàng đợi -> route trả 429 ngay thay vì xếp hàng."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hasher is saturated")
+        self.retry_after = retry_after
+
+
+def _hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify_password(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """
+    ✅ Chạy PBKDF2/scrypt của werkzeug trên process pool giới hạn.
+
+    Hash password là việc CPU-bound cố ý chậm; chạy trong request thread sẽ giữ GIL
+    và làm chậm mọi request khác của worker. Ở đây:
+    - tối đa `workers` process hash song song
+    - tối đa `max_pending` job đang chờ/chạy (kể cả job đã quá timeout mà chưa xong),
+      vượt quá -> HasherBusyError (429)
+    - workers=0 -> chạy đồng bộ như cũ (dev / test)
+    """
+
+    def __init__(self, workers=2, max_pending=32, method="scrypt", timeout=10, retry_after=1):
+        self.configure(workers, max_pending, method, timeout, retry_after)
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def configure(self, workers, max_pending, method, timeout, retry_after):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.method = method
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Tính ở init_app (1 lần hash); chưa init_app -> needs_rehash luôn False
+        self._method_prefix = None
+
+    def init_app(self, app):
+        self.configure(
+            workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+            max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+            method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+            timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+            retry_after=app.config.get('PASSWORD_HASH_RETRY_AFTER', 1),
+        )
+        # werkzeug mở rộng "scrypt" -> "scrypt:32768:8:1", "pbkdf2" -> "pbkdf2:sha256:<iterations>"
+        self._method_prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+
+    # ========================================
+    # ✅ PUBLIC API
+    # ========================================
+
+    def hash(self, password):
+        return self._submit(_hash_password, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._submit(_verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True nếu hash được tạo với method / cost khác cấu hình hiện tại."""
+        return self._method_prefix is not None and password_hash.split("$", 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ========================================
+    # ✅ INTERNAL
+    # ========================================
+
+    def _get_pool(self):
+        # Pool tạo lazy sau khi gunicorn fork worker; không dùng lại pool của process cha
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _submit(self, fn, *args):
+        slots = self._slots  # configure() có thể thay semaphore khi job còn chạy
+        if not slots.acquire(blocking=False):
+            raise HasherBusyError(self.retry_after)
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # Slot trả lại khi job thực sự xong: job quá timeout vẫn chiếm process trong pool,
+        # trả slot sớm sẽ cho hàng đợi phình quá max_pending
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"Password hashing timed out after {self.timeout}s")
+            raise HasherBusyError(self.retry_after)
+
+
+password_hasher = PasswordHasher()
+atexit.register(password_hasher.shutdown)
@@ -1,10 +1,17 @@
 # app/services/product_service.py
-from app.repositories import ProductRepository, InventoryRepository
+from app.models.product import Product
+from app.repositories import ProductRepository, InventoryRepository, CategoryRepository
+from app.services.catalog_engine import catalog, SORTABLE
+from app.utils.db_routing import read_replica, replica_preferred
+from app.utils.single_flight import SingleFlight
 from app import db
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Request đồng thời xem cùng 1 sản phẩm (sản phẩm hot, cache nguội sau deploy) dùng chung 1 query
+_product_reads = SingleFlight()
+
 class ProductService:
     """
     ✅ Service layer để orchestrate business logic.
@@ -15,33 +22,143 @@ class ProductService:
         self.session = session or db.session
         self.product_repo = ProductRepository(self.session)
         self.inventory_repo = InventoryRepository(self.session)
+        self.category_repo = CategoryRepository(self.session)
 
     # ========================================
     # ✅ PRODUCT OPERATIONS
     # ========================================
 
-    def get_all_products(self, order_by='id', desc=True, include_inventory=True):
+    @read_replica
+    def get_all_products(self, order_by='id', desc=True, include_inventory=True, fields=None):
         """
         Get all products.
         Use include_inventory=True khi cần show stock info.
+        fields: sparse fieldset (Product.parse_fields) -> chỉ SELECT các cột cần.
         """
-        if include_inventory:
-            return self.product_repo.get_all_with_inventory(order_by, desc)
+        if include_inventory or fields is not None:
+            return self.product_repo.get_all_with_inventory(order_by, desc, fields=fields)
         return self.product_repo.get_all_ordered(order_by, desc)
 
-    def get_product(self, product_id, with_inventory=True):
+    @read_replica
+    def get_product(self, product_id, with_inventory=True, fields=None):
         """Get single product."""
-        if with_inventory:
-            return self.product_repo.get_by_id_with_inventory(product_id)
+        if with_inventory or fields is not None:
+            return self.product_repo.get_by_id_with_inventory(product_id, fields=fields)
         return self.product_repo.get_by_id(product_id)
 
+    @read_replica
+    def get_product_row(self, product_id, fields=None):
+        """
+        Dict 1 sản phẩm (như get_product_rows) hoặc None. Các request đồng thời cùng
+        (product_id, fields) trong worker chỉ chạy 1 query; mỗi caller nhận bản copy riêng.
+        Lời gọi đọc replica và lời gọi phải đọc primary (vừa ghi) không dùng chung kết quả.
+        """
+        row = _product_reads.do(
+            (product_id, fields, replica_preferred()),
+            lambda: next(iter(self.product_repo.get_rows(fields, [product_id])), None),
+        )
+        return dict(row) if row is not None else None
+
+    @read_replica
+    def get_products_by_ids(self, product_ids, fields=None, with_inventory=False):
+        """Get products theo danh sách id (giữ thứ tự), 1 query."""
+        return self.product_repo.get_by_ids(product_ids, fields=fields, with_inventory=with_inventory)
+
+    @read_replica
+    def get_product_rows(self, product_ids=None, fields=None, category_id=None, order_by='id', desc=True):
+        """Dict sản phẩm dựng thẳng từ row (list view / bulk), xem ProductRepository.get_rows."""
+        return self.product_repo.get_rows(fields, product_ids, category_id, order_by, desc)
+
+    @read_replica
+    def filter_in_stock(self, product_ids):
+        """Giữ các id còn hàng, đúng thứ tự đầu vào (lọc ranking trước khi phân trang)."""
+        in_stock = self.product_repo.get_in_stock_ids(product_ids)
+        return [pid for pid in product_ids if pid in in_stock]
+
+    def iter_product_rows(self, fields=None, category_id=None, order_by='id', desc=True):
+        """Generator của get_product_rows cho response stream (admin listing, không giới hạn số dòng)."""
+        return self.product_repo.iter_rows(fields, category_id, order_by, desc)
+
+    @read_replica
+    def list_products_from_catalog(self, page=1, per_page=20, order_by='id', desc=True,
+                                   category_id=None, in_stock_only=False, fields=None, rows=False):
+        """
+        Listing qua CatalogEngine (filter / sort / phân trang trong bộ nhớ),
+        chỉ query DB cho các sản phẩm của trang. category_id gồm cả category con cháu.
+        - rows=True: trả dict từ row (get_product_rows) thay vì Product object
+        Return: (products, total) hoặc None nếu catalog chưa bật / không hỗ trợ order_by.
+        """
+        if not catalog.enabled or order_by not in SORTABLE:
+            return None
+        catalog.ensure_fresh()
+        if not catalog.ready:
+            return None
+        product_ids, total = catalog.list_product_ids(
+            page, per_page, order_by, desc, category_id=self._category_subtree(category_id),
+            in_stock_only=in_stock_only
+        )
+        if rows:
+            return self.product_repo.get_rows(fields, product_ids), total
+        return self.product_repo.get_by_ids(product_ids, fields=fields, with_inventory=True), total
+
+    @read_replica
+    def search_catalog(self, page=1, per_page=20, order_by='id', desc=True, q=None, facets=False,
+                       fields=None, rows=False, **filters):
+        """
+        Faceted listing / search qua CatalogEngine.
+        - filters: category_id (gồm cả category con cháu), brand, price_band, in_stock_only
+        - q: lọc theo tên (ILIKE ở DB, lấy id) rồi giao với các bitmap facet
+        Return: (products, total, facets) hoặc None nếu catalog chưa bật.
+        """
+        if not catalog.enabled:
+            return None
+        catalog.ensure_fresh()
+        if not catalog.ready:
+            return None
+        product_ids = self.product_repo.search_ids_by_name(q) if q else None
+        if filters.get('category_id') is not None:
+            filters['category_id'] = self._category_subtree(filters['category_id'])
+        result = catalog.search(
+            page, per_page, order_by if order_by in SORTABLE else 'id', desc,
+            product_ids=product_ids, facets=facets, **filters
+        )
+        if rows:
+            products = self.product_repo.get_rows(fields, result["product_ids"])
+        else:
+            products = self.product_repo.get_by_ids(result["product_ids"], fields=fields, with_inventory=True)
+        return products, result["total"], result["facets"]
+
+    @read_replica
+    def fuzzy_search_products(self, query, limit=10):
+        """
+        Tìm gần đúng (sai chính tả) trên name + SKU qua trigram index của catalog.
+        Return: (list (product, similarity), fuzzy) hoặc None nếu catalog chưa bật.
+        - fuzzy=False: trigram index đang dựng ở thread nền -> kết quả LIKE search, similarity None
+        """
+        if not catalog.enabled:
+            return None
+        catalog.ensure_fresh()
+        if not catalog.ready:
+            return None
+        ranked = catalog.fuzzy_search(query, limit)
+        if ranked is None:
+            return [(p, None) for p in self.product_repo.search_by_name(query, limit)], False
+        similarity = dict(ranked)
+        products = self.product_repo.get_by_ids([pid for pid, _ in ranked])
+        return [(p, similarity[p.id]) for p in products], True
+
+    @read_replica
     def search_products(self, name, limit=10):
         """Search products by name."""
         return self.product_repo.search_by_name(name, limit)
 
-    def get_products_by_category(self, category_id):
-        """Get products in a category."""
-        return self.product_repo.get_by_category(category_id)
+    @read_replica
+    def get_products_by_category(self, category_id, fields=None, with_inventory=False):
+        """Get products in a category (gồm cả category con cháu)."""
+        return self.product_repo.get_by_category(category_id, fields=fields, with_inventory=with_inventory)
+
+    def _category_subtree(self, category_id):
+        return None if category_id is None else self.category_repo.get_subtree_ids(category_id)
 
     def create_product(self, sku, name, price, category_id, description=None, initial_stock=0):
         """
@@ -118,10 +235,33 @@ class ProductService:
                 "error": str(e)
             }
 
+    def bulk_delete_products(self, product_ids):
+        """
+        Delete nhiều sản phẩm trong 1 statement.
+        query.delete không đi qua flush -> sau commit tự bỏ các sản phẩm khỏi catalog engine.
+        """
+        try:
+            deleted = self.product_repo.bulk_delete(product_ids)
+            if deleted:
+                catalog.publish({}, set(product_ids))
+            return {
+                "success": True,
+                "deleted": deleted,
+                "message": f"Deleted {deleted} products"
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to bulk delete products: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     # ========================================
     # ✅ INVENTORY OPERATIONS
     # ========================================
 
+    @read_replica
     def get_product_stock(self, product_id):
         """Get current stock level."""
         inventory = self.inventory_repo.get_inventory_by_product(product_id)
@@ -211,6 +351,7 @@ class ProductService:
     # ✅ REPORTING
     # ========================================
 
+    @read_replica
     def get_low_stock_report(self, threshold=10):
         """Get products with low stock."""
         products = self.product_repo.get_low_stock_products(threshold)
@@ -229,6 +370,14 @@ class ProductService:
             ]
         }
 
+    def iter_low_stock_report(self, threshold=10):
+        """Các dòng của get_low_stock_report dạng generator (stream)."""
+        fields = Product.COLUMN_FIELDS + ("stock", "available_stock")
+        for row in self.product_repo.iter_low_stock_rows(threshold, fields):
+            row["available"] = row.pop("available_stock")
+            yield row
+
+    @read_replica
     def get_out_of_stock_report(self):
         """Get out of stock products."""
         products = self.product_repo.get_out_of_stock_products()
@@ -239,8 +388,25 @@ class ProductService:
             "products": [p.to_dict() for p in products]
         }
 
+    def iter_out_of_stock_report(self):
+        """Các dòng của get_out_of_stock_report dạng generator (stream)."""
+        return self.product_repo.iter_out_of_stock_rows(Product.COLUMN_FIELDS)
+
+    @read_replica
     def get_product_stats(self):
         """Get overall product statistics."""
+        catalog.ensure_fresh()
+        if catalog.ready:
+            stats = catalog.stock_counts()
+            total, in_stock = stats["total_products"], stats["in_stock"]
+            return {
+                "success": True,
+                "stats": {
+                    **stats,
+                    "in_stock_percentage": round((in_stock / total * 100) if total > 0 else 0, 2)
+                }
+            }
+
         total = self.product_repo.get_total_count()
         in_stock = len(self.product_repo.get_in_stock_products())
         out_of_stock = len(self.product_repo.get_out_of_stock_products())
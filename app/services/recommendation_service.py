@@ -0,0 +1,214 @@
+# app/services/recommendation_service.py
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import db
+from app.repositories import RecommendationRepository
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "related_products"
+_LOW32 = 0xFFFFFFFF
+
+
+def basket_pairs(order_ids, product_ids, max_basket=50):
+    """
+    ✅ Đếm co-occurrence từ các order line (không cần sort / unique trước).
+
+    Mỗi order chỉ tính 1 lần cho mỗi sản phẩm / cặp sản phẩm. Order có hơn max_basket
+    sản phẩm khác nhau (mua sỉ) vẫn được tính support nhưng bỏ qua cặp (O(k²) và nhiễu).
+    Return: (keys, counts) — key = a << 32 | b với a <= b; a == b là support của a.
+    """
+    lines = np.unique((np.asarray(order_ids, dtype=np.int64) << 32) | np.asarray(product_ids, dtype=np.int64))
+    if not len(lines):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    oid, pid = lines >> 32, lines & _LOW32
+
+    # Các line đã sort theo (order, product) -> mỗi order là 1 đoạn liên tục
+    starts = np.flatnonzero(np.r_[True, oid[1:] != oid[:-1]])
+    sizes = np.diff(np.r_[starts, len(oid)])
+    ends = np.repeat(starts + sizes, sizes)
+    in_small_basket = np.repeat(sizes <= max_basket, sizes)
+
+    # Ghép line i với mọi line j > i trong cùng order
+    idx = np.arange(len(pid))
+    partners = np.where(in_small_basket, ends - idx - 1, 0)
+    left = np.repeat(idx, partners)
+    run_starts = np.repeat(np.cumsum(partners) - partners, partners)
+    right = left + 1 + (np.arange(len(left)) - run_starts)
+
+    keys = np.concatenate(((pid[left] << 32) | pid[right], (pid << 32) | pid))
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys, counts.astype(np.int64)
+
+
+def merge_counts(keys_a, counts_a, keys_b, counts_b):
+    keys, inverse = np.unique(np.concatenate((keys_a, keys_b)), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate((counts_a, counts_b)), minlength=len(keys))
+    return keys, counts.astype(np.int64)
+
+
+def top_k_neighbours(keys, counts, k=10, score='cosine', total_orders=None, min_count=2, sources=None):
+    """
+    Chấm điểm cặp và lấy k hàng xóm tốt nhất cho mỗi sản phẩm.
+    - keys phải chứa support (a == b) của mọi sản phẩm xuất hiện trong các cặp
+    - score: 'cosine' = c_ab / sqrt(c_a·c_b) | 'lift' = c_ab·N / (c_a·c_b) (cần total_orders)
+    - sources: chỉ trả kết quả cho các sản phẩm này (incremental)
+    Return: (src, rank, dst, score, pair_count) đã sort theo (src, rank).
+    """
+    a, b = keys >> 32, keys & _LOW32
+    diagonal = a == b
+    support_ids, support = a[diagonal], counts[diagonal]
+    order = np.argsort(support_ids)
+    support_ids, support = support_ids[order], support[order]
+
+    is_pair = ~diagonal & (counts >= min_count)
+    pa, pb, pc = a[is_pair], b[is_pair], counts[is_pair].astype(np.float64)
+    ca = support[np.searchsorted(support_ids, pa)].astype(np.float64)
+    cb = support[np.searchsorted(support_ids, pb)].astype(np.float64)
+    if score == 'lift':
+        if not total_orders:
+            raise ValueError("lift requires total_orders")
+        scores = pc * total_orders / (ca * cb)
+    else:
+        scores = pc / np.sqrt(ca * cb)
+
+    # Cạnh có hướng theo cả 2 chiều
+    src = np.concatenate((pa, pb))
+    dst = np.concatenate((pb, pa))
+    scores = np.concatenate((scores, scores))
+    pair_count = np.concatenate((pc, pc)).astype(np.int64)
+    if sources is not None:
+        keep = np.isin(src, sources)
+        src, dst, scores, pair_count = src[keep], dst[keep], scores[keep], pair_count[keep]
+    if not len(src):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty(0), empty
+
+    order = np.lexsort((dst, -scores, src))
+    src, dst, scores, pair_count = src[order], dst[order], scores[order], pair_count[order]
+    starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+    rank = np.arange(len(src)) - np.repeat(starts, np.diff(np.r_[starts, len(src)]))
+    keep = rank < k
+    return src[keep], rank[keep], dst[keep], scores[keep], pair_count[keep]
+
+
+class RecommendationService:
+    """
+    ✅ "Frequently bought together" tính offline.
+
+    - update(): incremental — đọc order thanh toán sau cursor (paid_at, id), cộng dồn
+      product_pair_counts bằng upsert rồi tính lại top-k cho các sản phẩm bị ảnh hưởng: sản phẩm
+      trong batch + mọi sản phẩm từng mua cùng chúng (support đổi -> điểm cosine của họ cũng đổi)
+      Lift phụ thuộc tổng số order nên mọi điểm đổi sau mỗi batch -> score="lift" thì update() chạy rebuild()
+    - rebuild(): tính lại toàn bộ trong bộ nhớ (đổi công thức score / dữ liệu cũ chưa có paid_at)
+    Order chỉ được xử lý khi đã thanh toán quá `lag_seconds` để transaction commit muộn
+    với paid_at cũ hơn cursor không bị bỏ sót.
+    """
+
+    def __init__(self, session=None, k=10, score='cosine', min_count=2, max_basket=50,
+                 batch_orders=50_000, lag_seconds=60):
+        self.session = session or db.session
+        self.repo = RecommendationRepository(self.session)
+        self.k = k
+        self.score = score
+        self.min_count = min_count
+        self.max_basket = max_basket
+        self.batch_orders = batch_orders
+        self.lag_seconds = lag_seconds
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            k=config.get('RELATED_PRODUCTS_K', 10),
+            score=config.get('RELATED_PRODUCTS_SCORE', 'cosine'),
+            min_count=config.get('RELATED_PRODUCTS_MIN_COUNT', 2),
+        )
+
+    def update(self):
+        """Return: số order đã xử lý."""
+        if self.score == 'lift':
+            logger.info("Related products use lift, running a full rebuild instead of an incremental update")
+            return self.rebuild()
+        until = datetime.utcnow() - timedelta(seconds=self.lag_seconds)
+        cursor = self.repo.get_cursor(CURSOR_NAME)
+        if cursor.position_at is None:
+            return self.rebuild()
+
+        processed = 0
+        while True:
+            orders = self.repo.get_paid_orders_after(cursor.position_at, cursor.position_id, until, self.batch_orders)
+            if not orders:
+                break
+            keys, counts = basket_pairs(*self.repo.get_order_lines([o[0] for o in orders]), self.max_basket)
+            self.repo.increment_pairs(keys, counts)
+
+            # keys có cả đường chéo nên a của mọi key đã phủ hết sản phẩm trong batch;
+            # partner của chúng có cạnh tới sản phẩm đổi support -> cũng phải tính lại
+            touched = np.unique(keys >> 32)
+            self._refresh_related(self.repo.get_partner_ids(touched.tolist()), cursor.processed + len(orders))
+
+            cursor.position_at, cursor.position_id = orders[-1][1], orders[-1][0]
+            cursor.processed += len(orders)
+            self.session.commit()
+            processed += len(orders)
+
+        if processed:
+            logger.info(f"Related products updated from {processed} new orders")
+        return processed
+
+    def rebuild(self):
+        until = datetime.utcnow() - timedelta(seconds=self.lag_seconds)
+        keys = counts = np.empty(0, dtype=np.int64)
+        total, last_id = 0, 0
+        while True:
+            order_ids = self.repo.get_historical_order_ids(last_id, until, self.batch_orders)
+            if not order_ids:
+                break
+            batch_keys, batch_counts = basket_pairs(*self.repo.get_order_lines(order_ids), self.max_basket)
+            keys, counts = merge_counts(keys, counts, batch_keys, batch_counts)
+            total += len(order_ids)
+            last_id = order_ids[-1]
+
+        self.repo.clear_all()
+        self.repo.insert_pairs(keys, counts)
+        src, rank, dst, score, pair_count = top_k_neighbours(
+            keys, counts, self.k, self.score, total_orders=total, min_count=self.min_count
+        )
+        self.repo.replace_related([], src, rank, dst, score, pair_count)
+
+        cursor = self.repo.get_cursor(CURSOR_NAME)
+        cursor.position_at, cursor.position_id, cursor.processed = until, 0, total
+        self.session.commit()
+        logger.info(f"Related products rebuilt from {total} orders, {len(keys)} pair counts")
+        return total
+
+    def _refresh_related(self, product_ids, total_orders):
+        keys, counts = self.repo.get_pairs_for(product_ids.tolist())
+        src, rank, dst, score, pair_count = top_k_neighbours(
+            keys, counts, self.k, self.score,
+            total_orders=total_orders, min_count=self.min_count, sources=product_ids,
+        )
+        self.repo.replace_related(product_ids.tolist(), src, rank, dst, score, pair_count)
+
+    def get_related(self, product_id, limit=10):
+        return [
+            {
+                "id": pid,
+                "sku": sku,
+                "name": name,
+                "price": float(price),
+                "category_id": category_id,
+                "score": round(score, 4),
+                "bought_together": pair_count,
+            }
+            for pid, sku, name, price, category_id, score, pair_count in self.repo.get_related(product_id, limit)
+        ]
+
+
+def update_related_products_job():
+    from flask import current_app
+    return RecommendationService.from_config(current_app.config).update()
@@ -0,0 +1,117 @@
+# app/services/sales_analytics.py
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import db
+from app.repositories import SalesRollupRepository
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Giới hạn số bucket theo giờ để 1 request không dựng mảng quá lớn
+MAX_HOURLY_RANGE = timedelta(days=31)
+
+
+class SalesAnalyticsService:
+    """
+    ✅ Time series doanh số từ bảng rollup (sales_daily / sales_hourly).
+
+    DB chỉ trả các bucket có dữ liệu (đã GROUP BY), phần còn lại làm bằng NumPy:
+    - dựng trục thời gian liên tục (bucket không có đơn = 0)
+    - resample ngày -> tuần (bắt đầu thứ 2) / tháng bằng np.add.reduceat
+    - moving average bằng cumsum, delta so với bucket trước và so với kỳ trước
+    """
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self.rollup_repo = SalesRollupRepository(self.session)
+
+    def get_timeseries(self, start, end, granularity='day', product_id=None, category_id=None, window=7):
+        """
+        start, end: datetime, khoảng [start, end).
+        Return: dict gồm buckets, units, revenue, moving average, delta và tổng so với kỳ trước.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if end <= start:
+            raise ValueError("end must be after start")
+        if granularity == 'hour' and end - start > MAX_HOURLY_RANGE:
+            raise ValueError(f"Hourly series are limited to {MAX_HOURLY_RANGE.days} days")
+
+        unit = 'h' if granularity == 'hour' else 'D'
+        if unit == 'D':
+            # Bảng ngày: làm tròn khoảng về mốc đầu ngày
+            start = datetime.combine(start.date(), datetime.min.time())
+            end = datetime.combine((end - timedelta(microseconds=1)).date(), datetime.min.time()) + timedelta(days=1)
+        axis, units, revenue = self._dense_series(start, end, unit, product_id, category_id)
+        if granularity in ('week', 'month'):
+            axis, units, revenue = _resample(axis, units, revenue, granularity)
+
+        # Kỳ trước có cùng độ dài, chỉ cần tổng
+        prev_start = start - (end - start)
+        _, prev_units, prev_revenue = self._dense_series(prev_start, start, unit, product_id, category_id)
+        totals = {"units": int(units.sum()), "revenue": round(float(revenue.sum()), 2)}
+        previous = {"units": int(prev_units.sum()), "revenue": round(float(prev_revenue.sum()), 2)}
+
+        return {
+            "granularity": granularity,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": [str(b) for b in axis],
+            "units": units.tolist(),
+            "revenue": np.round(revenue, 2).tolist(),
+            "revenue_moving_avg": np.round(_moving_average(revenue, window), 2).tolist(),
+            "units_moving_avg": np.round(_moving_average(units, window), 2).tolist(),
+            "revenue_delta": np.round(np.diff(revenue, prepend=revenue[:1]), 2).tolist(),
+            "totals": totals,
+            "previous_totals": previous,
+            "change_pct": {key: _pct_change(totals[key], previous[key]) for key in totals},
+        }
+
+    def _dense_series(self, start, end, unit, product_id, category_id):
+        granularity = 'hour' if unit == 'h' else 'day'
+        if unit == 'h':
+            lo, hi = np.datetime64(start, 'h'), np.datetime64(end - timedelta(microseconds=1), 'h') + 1
+        else:
+            lo, hi = np.datetime64(start.date(), 'D'), np.datetime64(end.date(), 'D')
+        axis = np.arange(lo, hi, dtype=f'datetime64[{unit}]')
+
+        rows = self.rollup_repo.get_series(start, end, granularity, product_id, category_id)
+        units = np.zeros(len(axis), dtype=np.int64)
+        revenue = np.zeros(len(axis), dtype=np.float64)
+        if rows:
+            buckets = np.array([r[0] for r in rows], dtype=f'datetime64[{unit}]')
+            idx = (buckets - lo).astype(np.int64)
+            keep = (idx >= 0) & (idx < len(axis))
+            units[idx[keep]] = np.array([r[1] or 0 for r in rows], dtype=np.int64)[keep]
+            revenue[idx[keep]] = np.array([float(r[2] or 0) for r in rows], dtype=np.float64)[keep]
+        return axis, units, revenue
+
+
+def _resample(axis, units, revenue, granularity):
+    """Gộp series theo ngày (đã sort, liên tục) thành tuần / tháng."""
+    if granularity == 'week':
+        # 1970-01-01 là thứ 5 -> lùi về thứ 2 gần nhất
+        days = axis.astype(np.int64)
+        labels = axis - ((days + 3) % 7).astype('timedelta64[D]')
+    else:
+        labels = axis.astype('datetime64[M]')
+    labels, starts = np.unique(labels, return_index=True)
+    if not len(starts):
+        return labels, units, revenue
+    return labels, np.add.reduceat(units, starts), np.add.reduceat(revenue, starts)
+
+
+def _moving_average(values, window):
+    """Trung bình trượt `window` bucket; các bucket đầu lấy trung bình trên phần đã có."""
+    window = max(1, int(window))
+    csum = np.cumsum(values, dtype=np.float64)
+    shifted = np.concatenate((np.zeros(window), csum[:-window])) if len(csum) > window else np.zeros(len(csum))
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return (csum - shifted[:len(csum)]) / counts
+
+
+def _pct_change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
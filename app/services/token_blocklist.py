@@ -0,0 +1,177 @@
+# app/services/token_blocklist.py
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.revoked_token import RevokedToken
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class BloomFilter:
+    """Bloom filter trên bytearray; không có false negative, false positive ~error_rate."""
+
+    def __init__(self, capacity=100_000, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenBlocklist:
+    """
+    ✅ JTI revocation store cho JWTManager.token_in_blocklist_loader.
+
+    - revoke(): ghi row vào bảng revoked_tokens và cập nhật bộ nhớ local ngay
+    - is_revoked(): bloom filter (fast path, không lock) -> exact set; không hit DB
+    - Mỗi refresh_seconds, worker đọc lại các row có revoked_at >= lần refresh trước - overlap_seconds.
+      Không dùng cursor id: id auto-increment có thể commit không theo thứ tự, row id nhỏ commit
+      sau lần refresh sẽ bị bỏ qua mãi mãi. Row đọc lại trong overlap chỉ ghi đè cùng giá trị
+    - JTI hết hạn được prune khỏi bộ nhớ; purge_expired() xoá row cũ trong DB
+    """
+
+    def __init__(self, refresh_seconds=5, capacity=100_000, error_rate=0.001, overlap_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self.overlap_seconds = overlap_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked = {}        # jti -> expires_at (epoch seconds)
+        self._synced_at = None    # thời điểm (UTC) bắt đầu lần refresh trước; None -> load toàn bộ
+        self._next_refresh = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, jwt_manager):
+        self.refresh_seconds = app.config.get('TOKEN_BLOCKLIST_REFRESH_SECONDS', self.refresh_seconds)
+        self.overlap_seconds = app.config.get('TOKEN_BLOCKLIST_OVERLAP_SECONDS', self.overlap_seconds)
+        jwt_manager.token_in_blocklist_loader(self._check_payload)
+
+    def _check_payload(self, jwt_header, jwt_payload):
+        return self.is_revoked(jwt_payload["jti"])
+
+    # ========================================
+    # ✅ PUBLIC API
+    # ========================================
+
+    def is_revoked(self, jti):
+        self._maybe_refresh()
+        if jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, jti, token_type, expires_at, user_id=None):
+        """expires_at: epoch seconds (claim `exp`) của token."""
+        try:
+            db.session.add(RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                user_id=user_id,
+                expires_at=datetime.utcfromtimestamp(expires_at),
+            ))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # đã bị revoke trước đó
+
+        self._remember(jti, expires_at)
+        logger.info(f"Revoked {token_type} token {jti} of user {user_id}")
+
+    def revoke_claims(self, claims):
+        sub = claims.get("sub")
+        self.revoke(
+            claims["jti"],
+            claims.get("type", "access"),
+            claims["exp"],
+            user_id=int(sub) if str(sub).isdigit() else None,
+        )
+
+    def purge_expired(self):
+        """Xoá row của token đã hết hạn tự nhiên (job định kỳ trên leader)."""
+        deleted = (
+            db.session.query(RevokedToken)
+            .filter(RevokedToken.expires_at < datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.session.commit()
+        return deleted
+
+    # ========================================
+    # ✅ INTERNAL
+    # ========================================
+
+    def _remember(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._bloom.add(jti)
+
+    def _maybe_refresh(self):
+        now = time.time()
+        if now < self._next_refresh:
+            return
+        # Chỉ 1 thread refresh, các thread khác tiếp tục dùng dữ liệu hiện có
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_refresh = now + self.refresh_seconds
+            self._refresh()
+            if now >= self._next_prune:
+                self._next_prune = now + max(60, self.refresh_seconds * 12)
+                self._prune(now)
+        except Exception as e:
+            logger.error(f"Failed to refresh token blocklist: {str(e)}")
+        finally:
+            self._lock.release()
+
+    def _refresh(self):
+        started = datetime.utcnow()
+        query = db.session.query(RevokedToken.jti, RevokedToken.expires_at)
+        if self._synced_at is None:
+            query = query.filter(RevokedToken.expires_at > started)
+        else:
+            # revoked_at được gán lúc INSERT, row có thể commit sau đó tối đa ~overlap_seconds
+            # (transaction chậm, lệch clock giữa các worker)
+            query = query.filter(RevokedToken.revoked_at >= self._synced_at - timedelta(seconds=self.overlap_seconds))
+        for jti, expires_at in query.all():
+            self._revoked[jti] = (expires_at - _EPOCH).total_seconds()
+            self._bloom.add(jti)
+        self._synced_at = started
+
+    def _prune(self, now):
+        """Bỏ JTI hết hạn và dựng lại bloom filter (bloom không hỗ trợ xoá)."""
+        live = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        if len(live) == len(self._revoked) and len(live) <= self.capacity:
+            return
+
+        capacity = max(self.capacity, 2 * len(live))
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in live:
+            bloom.add(jti)
+        self._revoked, self._bloom = live, bloom
+
+
+token_blocklist = TokenBlocklist()
@@ -0,0 +1,204 @@
+# app/services/trigram_index.py
+import re
+import unicodedata
+
+import numpy as np
+
+# Bảng chữ cái sau khi chuẩn hoá: space, a-z, 0-9
+_ALPHABET = " abcdefghijklmnopqrstuvwxyz0123456789"
+_BASE = len(_ALPHABET)
+_TRIGRAMS = _BASE ** 3
+_LUT = np.zeros(256, dtype=np.int32)
+for _i, _c in enumerate(_ALPHABET):
+    _LUT[ord(_c)] = _i
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Bỏ dấu (kể cả đ), lowercase, ký tự khác a-z0-9 thành khoảng trắng: "Lenovo Laptop ABCD-1234" -> "lenovo laptop abcd 1234"."""
+    text = (text or "").lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text.replace("đ", "d"))
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(text):
+    """Trigram id (duy nhất) của chuỗi đã normalize, có đệm 1 khoảng trắng 2 đầu."""
+    padded = f" {text} "
+    codes = [_ALPHABET.index(c) for c in padded]
+    return sorted({(a * _BASE + b) * _BASE + c for a, b, c in zip(codes, codes[1:], codes[2:])})
+
+
+def within_distance(a, b, k):
+    """Khoảng cách sửa (Levenshtein + đổi chỗ 2 ký tự kề nhau) <= k, dừng sớm khi cả hàng DP đã vượt k."""
+    if abs(len(a) - len(b)) > k:
+        return False
+    if a == b:
+        return True
+    if len(set(a).difference(b)) > k:
+        return False  # mỗi ký tự không có trong b cần ít nhất 1 phép sửa
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > k:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= k
+
+
+class TrigramIndex:
+    """
+    ✅ Index trigram cho tìm kiếm gần đúng (gõ sai chính tả) trên tên + SKU.
+
+    - Base: CSR NumPy (trigram -> danh sách doc đã sort), dựng 1 lần bằng vector hoá
+    - Ghi sau khi dựng: doc cũ bị đánh dấu tombstone, nội dung mới vào delta (dict nhỏ)
+    - Query: đếm trùng trigram trên các posting hiếm nhất (giới hạn tổng posting để giữ
+      latency ổn định kể cả khi query toàn trigram phổ biến), lấy top candidates, tính
+      độ tương đồng chính xác rồi kiểm tra từng từ của query theo edit distance
+    """
+
+    def __init__(self, product_ids, texts, max_edits=2, posting_budget=100_000):
+        self.max_edits = max_edits
+        self.posting_budget = posting_budget
+        self._build(np.asarray(product_ids, dtype=np.int64), [normalize(t) for t in texts])
+        self._delta = {}            # product_id -> (text, trigram ids)
+        self._delta_postings = {}   # trigram -> set(product_id)
+
+    def _build(self, product_ids, texts):
+        n = len(texts)
+        self.ids = product_ids
+        self.texts = texts
+        self.dead = np.zeros(n, dtype=bool)
+
+        padded = [f" {t} " for t in texts]
+        lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=n)
+        codes = _LUT[np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8)]
+        doc = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        valid = doc[:-2] == doc[2:] if len(doc) > 2 else np.zeros(0, dtype=bool)
+        tri = (codes[:-2].astype(np.int64) * _BASE + codes[1:-1]) * _BASE + codes[2:]
+
+        # sort + bỏ trùng (trigram, doc); np.unique chậm hơn nhiều trên vài chục triệu phần tử
+        keys = tri[valid] * max(n, 1) + doc[:-2][valid]
+        keys.sort()
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+        tri, doc = keys // max(n, 1), keys % max(n, 1)
+        self.postings = doc.astype(np.int32)
+        self.offsets = np.zeros(_TRIGRAMS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tri, minlength=_TRIGRAMS), out=self.offsets[1:])
+        self.doc_trigrams = np.bincount(doc, minlength=n).astype(np.int32)
+
+    # ========================================
+    # ✅ UPDATE
+    # ========================================
+
+    def upsert(self, product_id, text):
+        self.remove(product_id)
+        text = normalize(text)
+        grams = trigrams(text)
+        self._delta[product_id] = (text, grams)
+        for gram in grams:
+            self._delta_postings.setdefault(gram, set()).add(product_id)
+
+    def remove(self, product_id):
+        pos = int(np.searchsorted(self.ids, product_id))
+        if pos < len(self.ids) and self.ids[pos] == product_id:
+            self.dead[pos] = True
+        old = self._delta.pop(product_id, None)
+        if old is not None:
+            for gram in old[1]:
+                self._delta_postings[gram].discard(product_id)
+
+    @property
+    def delta_size(self):
+        return len(self._delta)
+
+    # ========================================
+    # ✅ SEARCH
+    # ========================================
+
+    def search(self, query, limit=10, candidates=None):
+        """Return: list (product_id, similarity) giảm dần theo độ tương đồng."""
+        text = normalize(query)
+        grams = np.array(trigrams(text), dtype=np.int64) if text else np.empty(0, dtype=np.int64)
+        if not len(grams):
+            return []
+        words = text.split()
+        candidates = candidates or min(max(limit * 20, 200), 2000)
+
+        # 1. Đếm trùng trên base, ưu tiên trigram hiếm
+        starts, ends = self.offsets[grams], self.offsets[grams + 1]
+        df = ends - starts
+        budget, chosen = self.posting_budget, []
+        for i in np.argsort(df, kind="stable"):
+            if df[i] and (not chosen or df[i] <= budget):
+                chosen.append(self.postings[starts[i]:ends[i]])
+                budget -= df[i]
+        base_docs = np.empty(0, dtype=np.int64)
+        if chosen:
+            docs = np.concatenate(chosen)
+            if len(docs) * 8 < len(self.ids):
+                # Ít posting: sort + đếm theo đoạn rẻ hơn bincount trên cả catalog
+                docs.sort()
+                edges = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1], True])
+                hits, counts = docs[edges[:-1]].astype(np.int64), np.diff(edges)
+            else:
+                counts = np.bincount(docs)
+                hits = np.flatnonzero(counts)
+                counts = counts[hits]
+            alive = ~self.dead[hits]
+            hits, counts = hits[alive], counts[alive]
+            if len(hits) > candidates:
+                hits = hits[np.argpartition(-counts, candidates)[:candidates]]
+            base_docs = hits
+
+        # 2. Độ tương đồng chính xác với toàn bộ trigram của query
+        # (cùng dtype với postings để searchsorted không phải ép kiểu cả posting list)
+        base_docs = base_docs.astype(self.postings.dtype)
+        overlap = np.zeros(len(base_docs), dtype=np.int64)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end > start:
+                posting = self.postings[start:end]
+                idx = np.minimum(np.searchsorted(posting, base_docs), end - start - 1)
+                overlap += posting[idx] == base_docs
+        scored = [
+            (int(self.ids[d]), self.texts[d], o, int(self.doc_trigrams[d]))
+            for d, o in zip(base_docs.tolist(), overlap.tolist())
+        ]
+        grams_set = set(grams.tolist())
+        for product_id in set().union(*(self._delta_postings.get(g, ()) for g in grams_set)):
+            doc_text, doc_grams = self._delta[product_id]
+            scored.append((product_id, doc_text, len(grams_set.intersection(doc_grams)), len(doc_grams)))
+
+        # word similarity (phần query khớp) trước, sau đó similarity toàn chuỗi
+        q = len(grams)
+        scored.sort(key=lambda s: (-s[2] / q, -s[2] / (q + s[3] - s[2]), s[0]))
+
+        # 3. Mỗi từ của query phải khớp 1 từ trong tên / SKU trong giới hạn edit distance
+        results, memo = [], {}
+        for product_id, doc_text, common, total in scored:
+            if self._words_match(words, doc_text.split(), memo):
+                results.append((product_id, round(common / (q + total - common), 4)))
+                if len(results) == limit:
+                    break
+        return results
+
+    def _words_match(self, words, doc_words, memo):
+        # Từ vựng của catalog lặp lại nhiều (brand, loại sản phẩm) -> nhớ kết quả theo cặp từ
+        for word in words:
+            edits = 0 if len(word) <= 2 else min(self.max_edits, 1 if len(word) <= 5 else self.max_edits)
+            for doc_word in doc_words:
+                key = (word, doc_word)
+                matched = memo.get(key)
+                if matched is None:
+                    matched = memo[key] = doc_word.startswith(word) or within_distance(word, doc_word, edits)
+                if matched:
+                    break
+            else:
+                return False
+        return True
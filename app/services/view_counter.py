@@ -0,0 +1,140 @@
+# app/services/view_counter.py
+import atexit
+import os
+import threading
+from collections import defaultdict
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    ✅ Đếm lượt xem sản phẩm trong bộ nhớ, flush theo batch vào product_stats.
+
+    - increment(): lock theo stripe (product_id % stripes) + dict += 1, không chạm DB
+    - Thread nền mỗi flush_seconds tráo dict của từng stripe và ghi tổng delta
+      bằng 1 bulk upsert (views = views + delta)
+    - Product đã bị xoá: bỏ delta của nó (không để 1 id làm hỏng cả batch)
+    - Flush lỗi -> cộng delta trở lại để lần sau ghi tiếp, tối đa max_pending product
+      (DB lỗi lâu -> bỏ bớt lượt xem thay vì để dict phình không giới hạn)
+    - atexit: dừng thread và flush lần cuối khi worker thoát
+    """
+
+    def __init__(self, stripes=16, flush_seconds=10, max_pending=100_000):
+        self.stripes = 1 << max(0, (stripes - 1).bit_length())
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.enabled = True
+        self.app = None
+
+        self._mask = self.stripes - 1
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._counts = [defaultdict(int) for _ in range(self.stripes)]
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('VIEW_COUNTER_ENABLED', True)
+        self.flush_seconds = app.config.get('VIEW_COUNTER_FLUSH_SECONDS', self.flush_seconds)
+        self.max_pending = app.config.get('VIEW_COUNTER_MAX_PENDING', self.max_pending)
+
+    # ========================================
+    # ✅ PUBLIC API
+    # ========================================
+
+    def increment(self, product_id, count=1):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._start()
+        stripe = product_id & self._mask
+        with self._locks[stripe]:
+            self._counts[stripe][product_id] += count
+
+    def pending(self):
+        """Tổng số lượt xem chưa flush (để debug / test)."""
+        return sum(sum(counts.values()) for counts in self._counts)
+
+    def flush(self):
+        """Ghi toàn bộ delta hiện có. Return: số product đã ghi."""
+        with self._flush_lock:
+            deltas = self._drain()
+            if not deltas:
+                return 0
+            try:
+                with self.app.app_context():
+                    from app import db
+                    from app.repositories import ProductStatsRepository
+
+                    written = ProductStatsRepository().increment_views(deltas)
+                    db.session.commit()
+                if written < len(deltas):
+                    logger.info(f"Dropped view counts of {len(deltas) - written} deleted products")
+                return written
+            except Exception as e:
+                logger.error(f"Failed to flush {len(deltas)} product view counters: {str(e)}")
+                self._restore(deltas)
+                return 0
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds)
+        if self.app is not None:
+            self.flush()
+
+    # ========================================
+    # ✅ INTERNAL
+    # ========================================
+
+    def _drain(self):
+        deltas = defaultdict(int)
+        for i in range(self.stripes):
+            with self._locks[i]:
+                counts, self._counts[i] = self._counts[i], defaultdict(int)
+            for product_id, views in counts.items():
+                deltas[product_id] += views
+        return deltas
+
+    def _restore(self, deltas):
+        pending = sum(len(counts) for counts in self._counts)
+        if pending + len(deltas) > self.max_pending:
+            logger.error(f"View counter backlog over {self.max_pending} products, dropping {len(deltas)} deltas")
+            return
+        for product_id, views in deltas.items():
+            stripe = product_id & self._mask
+            with self._locks[stripe]:
+                self._counts[stripe][product_id] += views
+
+    def _start(self):
+        # Thread tạo lazy ở lần increment đầu tiên của mỗi worker
+        with self._flush_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            thread = threading.Thread(target=self._run, name="view-counter-flush", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def _after_fork(self):
+        # Process con không thừa hưởng thread của cha; delta của cha do cha flush
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._counts = [defaultdict(int) for _ in range(self.stripes)]
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            if self.app is not None:
+                self.flush()
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=view_counter._after_fork)
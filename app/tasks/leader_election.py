@@ -0,0 +1,207 @@
+# app/tasks/leader_election.py
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.scheduler_lease import SchedulerLease
+from app.models.job_run import JobRun
+from app.logger_config import setup_logger
+
+logger = setup_logger(name="scheduler", log_file="app/logs/scheduler.log")
+
+LEASE_NAME = "scheduler"
+
+
+def _default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class DatabaseLease:
+    """
+    ✅ Lease row trong bảng scheduler_leases.
+    Process nào UPDATE được row (lease của chính nó hoặc lease đã hết hạn) là leader.
+    """
+
+    def __init__(self, app, owner, lease_seconds, name=LEASE_NAME):
+        self.app = app
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.name = name
+
+    def acquire(self):
+        with self.app.app_context():
+            now = datetime.utcnow()
+            values = {
+                "owner": self.owner,
+                "expires_at": now + timedelta(seconds=self.lease_seconds),
+                "heartbeat_at": now,
+            }
+            try:
+                updated = (
+                    db.session.query(SchedulerLease)
+                    .filter(SchedulerLease.name == self.name)
+                    .filter(or_(SchedulerLease.owner == self.owner, SchedulerLease.expires_at < now))
+                    .update(values, synchronize_session=False)
+                )
+                if not updated:
+                    # Row chưa tồn tại -> thử tạo; process khác đang giữ lease thì INSERT lỗi / bỏ qua
+                    if db.session.get(SchedulerLease, self.name) is not None:
+                        db.session.rollback()
+                        return False
+                    db.session.add(SchedulerLease(name=self.name, **values))
+                db.session.commit()
+                return True
+            except IntegrityError:
+                db.session.rollback()
+                return False
+
+    def release(self):
+        with self.app.app_context():
+            (
+                db.session.query(SchedulerLease)
+                .filter_by(name=self.name, owner=self.owner)
+                .update({"expires_at": datetime.utcnow()}, synchronize_session=False)
+            )
+            db.session.commit()
+
+
+class FileLease:
+    """
+    ✅ Fallback cho single host: flock non-blocking trên lock file.
+    OS tự nhả lock khi process chết nên failover gần như tức thì.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        import fcntl
+
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        import fcntl
+
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class LeaderElector:
+    """
+    ✅ Đảm bảo mỗi scheduled job chỉ chạy trên 1 process (gunicorn N workers).
+
+    - heartbeat(): gia hạn / giành lease, chạy mỗi lease_seconds / 3
+    - run_as_leader(): bọc job, chỉ chạy khi đang là leader và ghi metrics vào job_runs
+    - on_elected(): callback khi process vừa trở thành leader (vd: recovery scan)
+    """
+
+    def __init__(self, app, backend=None, lease_seconds=None, owner=None):
+        self.app = app
+        self.owner = owner or _default_owner()
+        self.lease_seconds = lease_seconds or app.config.get('SCHEDULER_LEASE_SECONDS', 30)
+        self.heartbeat_seconds = max(1, self.lease_seconds // 3)
+
+        backend = backend or app.config.get('SCHEDULER_LEADER_BACKEND', 'db')
+        if backend == 'file':
+            self.lease = FileLease(app.config.get('SCHEDULER_LOCK_FILE', '/tmp/smartshop-scheduler.lock'))
+        else:
+            self.lease = DatabaseLease(app, self.owner, self.lease_seconds)
+
+        self.is_leader = False
+        self._elected_callbacks = []
+
+    def on_elected(self, job_id, func):
+        self._elected_callbacks.append(self.run_as_leader(job_id, func))
+
+    def heartbeat(self):
+        try:
+            acquired = self.lease.acquire()
+        except Exception as e:
+            logger.error(f"Leader heartbeat failed: {str(e)}", exc_info=True)
+            acquired = False
+
+        was_leader, self.is_leader = self.is_leader, acquired
+        if acquired and not was_leader:
+            logger.info(f"{self.owner} became scheduler leader")
+            for callback in self._elected_callbacks:
+                callback()
+        elif was_leader and not acquired:
+            logger.warning(f"{self.owner} lost scheduler leadership")
+        return acquired
+
+    def release(self):
+        if self.is_leader:
+            try:
+                self.lease.release()
+            except Exception as e:
+                logger.error(f"Failed to release leader lease: {str(e)}")
+            self.is_leader = False
+
+    # ========================================
+    # ✅ JOB WRAPPER + METRICS
+    # ========================================
+
+    def run_as_leader(self, job_id, func):
+        """Job trả về số row đã xử lý (int) để ghi vào metrics."""
+        @wraps(func)
+        def job(*args, **kwargs):
+            if not self.is_leader:
+                return None
+
+            started_at = datetime.utcnow()
+            t0 = time.perf_counter()
+            status, rows, error = "success", 0, None
+            try:
+                with self.app.app_context():
+                    rows = func(*args, **kwargs) or 0
+            except Exception as e:
+                status, error = "error", str(e)[:500]
+                logger.error(f"Job {job_id} failed: {error}", exc_info=True)
+
+            duration_ms = (time.perf_counter() - t0) * 1000
+            self.record_run(job_id, status, started_at, duration_ms, rows, error)
+            return rows
+        return job
+
+    def record_missed(self, event):
+        """Listener cho EVENT_JOB_MISSED của APScheduler."""
+        if self.is_leader:
+            logger.warning(f"Job {event.job_id} missed run at {event.scheduled_run_time}")
+            self.record_run(event.job_id, "missed", datetime.utcnow(), 0, 0, None)
+
+    def record_run(self, job_id, status, started_at, duration_ms, rows, error):
+        logger.info(f"Job {job_id}: {status} in {duration_ms:.1f}ms, {rows} rows")
+        try:
+            with self.app.app_context():
+                db.session.add(JobRun(
+                    job_id=job_id,
+                    owner=self.owner,
+                    status=status,
+                    started_at=started_at,
+                    duration_ms=duration_ms,
+                    rows_processed=int(rows) if isinstance(rows, int) else 0,
+                    error=error,
+                ))
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Failed to record job run for {job_id}: {str(e)}")
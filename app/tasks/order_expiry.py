@@ -0,0 +1,179 @@
+# app/tasks/order_expiry.py
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.logger_config import setup_logger
+
+logger = setup_logger(name="scheduler", log_file="app/logs/scheduler.log")
+
+TIMEOUT_SECONDS = 60
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_timestamp(created_at):
+    """created_at lưu dạng naive UTC (datetime.utcnow) -> epoch seconds."""
+    return (created_at - _EPOCH).total_seconds()
+
+
+class OrderExpiryScheduler:
+    """
+    ✅ Timer min-heap cho các order PENDING, thay cho job quét bảng định kỳ.
+
+    - schedule(): O(log n), được OrderFacade.place_order gọi khi tạo order
+    - discard(): xoá lazy khi order đã thanh toán / bị huỷ
+    - Thread nền ngủ đúng tới deadline gần nhất rồi gọi auto_cancel_pending_order
+    - sweep(): job định kỳ của leader, huỷ mọi order PENDING quá hạn trong DB. Heap chỉ
+      chứa order do chính worker tạo -> worker chết / bị recycle thì sweep là lưới an toàn
+    """
+
+    def __init__(self, timeout_seconds=TIMEOUT_SECONDS, on_expire=None):
+        self.timeout_seconds = timeout_seconds
+        self.on_expire = on_expire
+        self.app = None
+
+        self._heap = []        # [(deadline, order_id)]
+        self._deadlines = {}   # order_id -> deadline còn hiệu lực
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def init_app(self, app, timeout_seconds=None):
+        self.app = app
+        if timeout_seconds is not None:
+            self.timeout_seconds = timeout_seconds
+
+    @property
+    def running(self):
+        return self._running
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    # ========================================
+    # ✅ TIMER OPERATIONS
+    # ========================================
+
+    def schedule(self, order_id, created_at=None):
+        """Đăng ký deadline cho order. No-op nếu timer chưa chạy trong process này."""
+        if not self._running:
+            return False
+
+        start = _to_timestamp(created_at) if created_at else time.time()
+        return self.schedule_at(order_id, start + self.timeout_seconds)
+
+    def schedule_at(self, order_id, deadline):
+        with self._cond:
+            self._deadlines[order_id] = deadline
+            heapq.heappush(self._heap, (deadline, order_id))
+            self._compact()
+            # Chỉ đánh thức thread khi deadline mới là deadline sớm nhất
+            if self._heap[0][1] == order_id:
+                self._cond.notify()
+        return True
+
+    def discard(self, order_id):
+        """Bỏ theo dõi order (entry trong heap sẽ bị bỏ qua khi tới hạn)."""
+        with self._cond:
+            self._deadlines.pop(order_id, None)
+
+    def pop_due(self, now=None):
+        """Lấy ra các order_id đã tới hạn (bỏ qua entry cũ đã discard/reschedule)."""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, order_id = heapq.heappop(self._heap)
+                if self._deadlines.get(order_id) == deadline:
+                    del self._deadlines[order_id]
+                    due.append(order_id)
+        return due
+
+    def _compact(self):
+        """Dọn heap khi số entry cũ (lazy delete) vượt quá số entry còn hiệu lực."""
+        if len(self._heap) > 2 * len(self._deadlines) + 1024:
+            self._heap = [(d, oid) for oid, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    # ========================================
+    # ✅ LIFECYCLE
+    # ========================================
+
+    def sweep(self, batch_size=500):
+        """
+        Huỷ các order PENDING đã quá timeout (chạy qua LeaderElector.run_as_leader, trong app context).
+        auto_cancel_pending_order lock row + kiểm tra lại status nên chạy trùng với timer của worker vẫn an toàn.
+        """
+        from app.repositories import OrderRepository
+        from app.services.order_facade import OrderFacade
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.timeout_seconds)
+        overdue = OrderRepository().get_overdue_pending_ids(cutoff, limit=batch_size)
+
+        cancelled = 0
+        for order_id in overdue:
+            self.discard(order_id)
+            result = OrderFacade.auto_cancel_pending_order(order_id, timeout_seconds=self.timeout_seconds)
+            if result.get("success"):
+                cancelled += 1
+
+        if overdue:
+            logger.info(f"Expiry sweep cancelled {cancelled}/{len(overdue)} overdue pending orders")
+        return cancelled
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="order-expiry", daemon=True)
+        self._thread.start()
+        logger.info(f"Order expiry timer started (timeout {self.timeout_seconds}s)")
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                delay = self._heap[0][0] - time.time() if self._heap else None
+                if delay is None or delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+            for order_id in self.pop_due():
+                self._expire(order_id)
+
+    def _expire(self, order_id):
+        try:
+            if self.on_expire:
+                self.on_expire(order_id)
+                return
+
+            from app.services.order_facade import OrderFacade
+
+            with self.app.app_context():
+                result = OrderFacade.auto_cancel_pending_order(order_id, timeout_seconds=self.timeout_seconds)
+
+            if result.get("success"):
+                logger.info(f"Order {order_id} auto-cancelled.")
+            elif result.get("within_window"):
+                # Lệch clock giữa process và DB: thử lại sau 1s
+                self.schedule_at(order_id, time.time() + 1)
+            else:
+                logger.info(f"Order {order_id} not cancelled: {result.get('message') or result.get('error')}")
+        except Exception as e:
+            logger.error(f"Expiry timer error for order {order_id}: {str(e)}", exc_info=True)
+
+
+order_expiry = OrderExpiryScheduler()
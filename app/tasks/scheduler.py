@@ -1,30 +1,83 @@
 TIMEOUT_SECONDS=60
-INTERVAL_SECONDS=60
 # app/tasks/scheduler.py
+import atexit
+from datetime import datetime
+
+from apscheduler.events import EVENT_JOB_MISSED
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.services.order_facade import OrderFacade
-from app.services.order_service import OrderService
+from app.tasks.order_expiry import order_expiry
+from app.tasks.leader_election import LeaderElector
+from app.services.token_blocklist import token_blocklist
+from app.services.dashboard_metrics import reconcile_dashboard_counters
+from app.services.category_stats import reconcile_category_counts
+from app.services.replenishment_service import compute_replenishment_job
+from app.services.recommendation_service import update_related_products_job
 from app.logger_config import setup_logger
 
 logger = setup_logger(name="scheduler", log_file="app/logs/scheduler.log")
 
-def start_scheduler(app, timeout_seconds=TIMEOUT_SECONDS, interval_seconds=INTERVAL_SECONDS):
+def start_scheduler(app, timeout_seconds=TIMEOUT_SECONDS):
+    """
+    Chạy trong mọi worker process. Các job định kỳ được bọc bởi LeaderElector
+    nên chỉ process đang giữ lease mới thực sự chạy chúng.
+    """
     scheduler = BackgroundScheduler()
+    elector = LeaderElector(app)
+
+    # Auto-cancel order PENDING: mỗi worker có timer min-heap cho order do chính nó tạo
+    # (huỷ sát deadline); leader quét định kỳ order quá hạn của mọi worker (kể cả worker đã chết)
+    # và quét ngay khi vừa được bầu (lúc khởi động hoặc khi failover).
+    order_expiry.init_app(app, timeout_seconds=timeout_seconds)
+    order_expiry.start()
+    sweep_expired_orders = elector.run_as_leader('sweep_expired_orders', order_expiry.sweep)
+    elector.on_elected('sweep_expired_orders', order_expiry.sweep)
+
+    scheduler.add_listener(elector.record_missed, EVENT_JOB_MISSED)
+    scheduler.add_job(
+        elector.heartbeat, 'interval',
+        seconds=elector.heartbeat_seconds,
+        id='leader_heartbeat',
+        next_run_time=datetime.now()
+    )
+
+    scheduler.add_job(
+        sweep_expired_orders, 'interval',
+        seconds=app.config.get('ORDER_EXPIRY_SWEEP_SECONDS', 30),
+        id='sweep_expired_orders'
+    )
+    scheduler.add_job(
+        elector.run_as_leader('purge_revoked_tokens', token_blocklist.purge_expired),
+        'interval', hours=1, id='purge_revoked_tokens'
+    )
+    # Dựng / sửa counter dashboard ngay khi có leader (DB mới, vừa migrate) thay vì trong request đầu tiên
+    elector.on_elected('reconcile_dashboard_counters', reconcile_dashboard_counters)
+    scheduler.add_job(
+        elector.run_as_leader('reconcile_dashboard_counters', reconcile_dashboard_counters),
+        'interval', minutes=app.config.get('DASHBOARD_RECONCILE_MINUTES', 15),
+        id='reconcile_dashboard_counters'
+    )
+    scheduler.add_job(
+        elector.run_as_leader('reconcile_category_counts', reconcile_category_counts),
+        'interval', minutes=app.config.get('CATEGORY_COUNTS_RECONCILE_MINUTES', 60),
+        id='reconcile_category_counts'
+    )
+    scheduler.add_job(
+        elector.run_as_leader('compute_replenishment', compute_replenishment_job),
+        'cron', hour=2, minute=30, id='compute_replenishment'
+    )
+    scheduler.add_job(
+        elector.run_as_leader('update_related_products', update_related_products_job),
+        'interval', minutes=app.config.get('RELATED_PRODUCTS_UPDATE_MINUTES', 30),
+        id='update_related_products'
+    )
 
-    def auto_cancel_orders():
-        with app.app_context():
-            try:
-                pending_orders = OrderService().get_pending_orders()
-                logger.info(f"Checking {len(pending_orders)} pending orders...")
-                for order in pending_orders:
-                    result = OrderFacade.auto_cancel_pending_order(order.id, timeout_seconds=timeout_seconds)
-                    if result.get("success"):
-                        logger.info(f"Order {order.id} auto-cancelled.")
-                    else:
-                        logger.info(f"Order {order.id} not cancelled: {result.get('message')}")
-            except Exception as e:
-                logger.error(f"Scheduler error: {str(e)}", exc_info=True)
-
-    scheduler.add_job(auto_cancel_orders, 'interval', seconds=interval_seconds, id='auto_cancel_orders')
     scheduler.start()
-    logger.info(f"Scheduler started: check every {interval_seconds}s with timeout {timeout_seconds}s.")
+    atexit.register(elector.release)
+
+    logger.info(
+        f"Scheduler started on {elector.owner}: pending orders expire after {timeout_seconds}s, "
+        f"leader lease {elector.lease_seconds}s."
+    )
+    app.extensions['scheduler'] = scheduler
+    app.extensions['leader_elector'] = elector
+    return scheduler
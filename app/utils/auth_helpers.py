@@ -1,10 +1,23 @@
+from collections import namedtuple
+from itertools import chain
+
+from flask import g
 from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
 from app.models.user import User
+from app.utils.cache import TTLCache
 
-def get_current_user():
-    """
-    Returns the current logged-in user object or None if not authenticated.
-    """
+# Bản ghi user gọn nhẹ cho các trang chỉ cần id / username / is_admin
+UserPrincipal = namedtuple("UserPrincipal", ["id", "username", "email", "is_admin"])
+
+# Cache dùng chung trong process, key = user id
+_principal_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+def _current_user_id():
     identity = get_jwt_identity()
     if not identity:
         return None
@@ -13,4 +26,78 @@ def get_current_user():
     if isinstance(identity, dict):
         identity = identity.get("id")
 
-    return User.query.get(identity)
+    try:
+        return int(identity)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_current_user():
+    """
+    Returns the current logged-in user object or None if not authenticated.
+    Kết quả được memo trong request (flask.g).
+    """
+    if "current_user" not in g:
+        user_id = _current_user_id()
+        g.current_user = db.session.get(User, user_id) if user_id else None
+    return g.current_user
+
+
+def get_current_principal():
+    """
+    Returns UserPrincipal(id, username, email, is_admin) of the current user or None.
+    Không query DB khi user đã nằm trong cache (request memo -> process cache -> DB).
+    """
+    if "current_principal" in g:
+        return g.current_principal
+
+    user_id = _current_user_id()
+    principal = None
+    if user_id:
+        principal = _principal_cache.get(user_id)
+        if principal is None:
+            row = (
+                db.session.query(User.id, User.username, User.email, User.is_admin)
+                .filter(User.id == user_id)
+                .first()
+            )
+            if row:
+                principal = UserPrincipal(*row)
+                _principal_cache.set(user_id, principal)
+
+    g.current_principal = principal
+    return principal
+
+
+def invalidate_user(user_id):
+    """
+    Xoá user khỏi principal cache. Sửa / xoá qua ORM được tự xoá sau commit;
+    query(User).update() / .delete() hàng loạt không đi qua flush -> caller tự gọi
+    (không gọi thì worker giữ bản cũ tối đa TTL của cache).
+    """
+    _principal_cache.pop(user_id)
+
+
+# ========================================
+# ✅ SESSION EVENTS
+# ========================================
+# Xoá cache sau commit (không phải lúc flush): request khác đọc lại DB trước khi transaction
+# commit sẽ nạp lại bản cũ vào cache; rollback thì không cần xoá gì
+
+@event.listens_for(Session, "after_flush")
+def _track_user_writes(session, flush_context):
+    user_ids = {obj.id for obj in chain(session.dirty, session.deleted) if isinstance(obj, User)}
+    if user_ids:
+        session.info.setdefault("principal_invalidations", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("principal_invalidations", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_invalidations(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("principal_invalidations", None)
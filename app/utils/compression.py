@@ -0,0 +1,82 @@
+# app/utils/compression.py
+import gzip
+
+from flask import request
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Kiểu nội dung đáng nén (ảnh / file đã nén thì bỏ qua)
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/msgpack", "application/x-ndjson", "application/javascript",
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript", "image/svg+xml",
+}
+
+
+def choose_encoding(accept_encodings, brotli_available=brotli is not None):
+    """Theo Accept-Encoding của client: "br" (ưu tiên khi cùng q) | "gzip" | None."""
+    offered = ("br", "gzip") if brotli_available else ("gzip",)
+    best = accept_encodings.best_match(offered)
+    return best if best in offered else None
+
+
+class Compressor:
+    """
+    ✅ Nén response (after_request): brotli nếu đã cài và client chấp nhận, không thì gzip.
+
+    - Chỉ nén body >= min_size, kiểu text / JSON / msgpack, chưa có Content-Encoding
+    - Bỏ qua response stream (export, NDJSON) và 304 / 204
+    - Luôn thêm Vary: Accept-Encoding để cache không trả bản nén cho client không hỗ trợ
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.enabled = False
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        if self.enabled:
+            app.after_request(self.compress_response)
+            logger.info(f"Response compression: {'br, gzip' if brotli is not None else 'gzip (brotli not installed)'}")
+
+    def compress_response(self, response):
+        if (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        if encoding == "br":
+            body = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            body = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # ETag mạnh gắn với từng byte của body -> bản nén là representation khác
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+
+compressor = Compressor()
@@ -0,0 +1,179 @@
+# app/utils/db_routing.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, TimestampSigner
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+from sqlalchemy.sql import Select
+
+from app.utils.cache import TTLCache
+
+REPLICA_BIND = "replica"
+PIN_COOKIE = "rw_pin"
+
+# "replica" | "primary" | None (theo request: g.db_route)
+_route = ContextVar("db_route", default=None)
+
+
+class RoutingSession(Session):
+    """
+    ✅ db.session đọc từ replica khi được phép, còn lại dùng primary.
+
+    Chỉ SELECT (không FOR UPDATE) ngoài flush mới được đưa sang replica, và chỉ khi:
+    - đang trong read_replica (service method) hoặc request đã prefer_replica() (public route)
+    - session này chưa ghi gì (đã ghi -> đọc tiếp từ primary để thấy dữ liệu của chính mình)
+    - client / user không vừa ghi trong READ_YOUR_WRITES_SECONDS (cookie rw_pin hoặc user id)
+    Không cấu hình REPLICA_DATABASE_URL -> mọi thứ đi primary như trước.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not self._can_use_replica(clause):
+            return engine
+        engines = self._db.engines
+        replica = engines.get(REPLICA_BIND)
+        # Model có bind_key riêng giữ nguyên engine của nó
+        if replica is not None and engine is engines.get(None):
+            return replica
+        return engine
+
+    def _can_use_replica(self, clause):
+        return (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+            and not self.info.get("primary_pinned")
+            and replica_preferred()
+        )
+
+
+def replica_preferred():
+    mode = _route.get()
+    if mode is None and has_request_context():
+        mode = g.get("db_route")
+    return mode == "replica" and not recently_wrote()
+
+
+def read_replica(func):
+    """Method chỉ đọc: các query trong lúc chạy được đọc từ replica. Scope ngoài là primary thì giữ primary."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _route.set("replica") if _route.get() is None else None
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if token is not None:
+                _route.reset(token)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Mọi query trong block đi primary (transaction ghi, đọc để quyết định ghi)."""
+    token = _route.set("primary")
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def prefer_replica():
+    """Cho cả request hiện tại (before_request của blueprint chỉ đọc)."""
+    g.db_route = "replica"
+
+
+# ========================================
+# ✅ READ-YOUR-WRITES
+# ========================================
+
+def recently_wrote():
+    if not has_request_context():
+        return False
+    pinned = g.get("db_rw_pinned")
+    if pinned is None:
+        pinned = g.db_rw_pinned = db_router.valid_pin(request.cookies.get(PIN_COOKIE))
+    if pinned:
+        return True
+    identity = _identity()
+    return identity is not None and identity in db_router.recent_writers
+
+
+def _identity():
+    # Chỉ có sau khi route đã verify JWT; chưa verify -> None
+    from flask_jwt_extended import get_jwt_identity
+
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        return None
+    return str(identity) if identity is not None else None
+
+
+class DatabaseRouter:
+    """
+    Đăng ký event cho RoutingSession + ghim đọc về primary sau khi ghi:
+    - session có flush / INSERT / UPDATE / DELETE -> phần còn lại của request đọc primary
+    - request có commit ghi -> cookie ký (rw_pin, hết hạn sau pin_seconds) và user id vào
+      recent_writers (trong process) -> các request sau của client / user đó đọc primary
+    """
+
+    def __init__(self, pin_seconds=5):
+        self.enabled = False
+        self.pin_seconds = pin_seconds
+        self.recent_writers = TTLCache(maxsize=100_000, ttl=pin_seconds)
+        self._signer = None
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+        self.pin_seconds = app.config.get('READ_YOUR_WRITES_SECONDS', self.pin_seconds)
+        self.recent_writers = TTLCache(maxsize=100_000, ttl=self.pin_seconds)
+        self._signer = TimestampSigner(app.config['SECRET_KEY'], salt='read-your-writes')
+        if not self.enabled:
+            return
+        if not event.contains(SASession, "before_flush", _pin_on_flush):
+            event.listen(SASession, "before_flush", _pin_on_flush)
+            event.listen(SASession, "do_orm_execute", _pin_on_dml)
+            event.listen(SASession, "after_commit", _remember_write)
+        app.after_request(self._set_pin)
+
+    def valid_pin(self, value):
+        if not value or self._signer is None:
+            return False
+        try:
+            self._signer.unsign(value, max_age=self.pin_seconds)
+            return True
+        except BadSignature:
+            return False
+
+    def _set_pin(self, response):
+        if g.get("db_wrote"):
+            response.set_cookie(
+                PIN_COOKIE, self._signer.sign(b"1").decode(), max_age=self.pin_seconds,
+                httponly=True, samesite="Lax",
+            )
+            identity = _identity()
+            if identity is not None:
+                self.recent_writers.set(identity, True)
+        return response
+
+
+def _pin_on_flush(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info["primary_pinned"] = True
+
+
+def _pin_on_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["primary_pinned"] = True
+
+
+def _remember_write(session):
+    if session.info.get("primary_pinned") and has_request_context():
+        g.db_wrote = True
+
+
+db_router = DatabaseRouter()
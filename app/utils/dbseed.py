@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 from app import create_app, db
 from app.models import User, Category, Product, Inventory
+from app.repositories import CategoryRepository
 
 fake = Faker()
 Faker.seed(42)  # Đặt seed để dữ liệu nhất quán giữa các lần chạy
@@ -40,14 +41,19 @@ def seed_data():
         # Thêm 20 category thực tế
         for name in REAL_CATEGORIES:
             categories.append(Category(name=name, description=fake.text(max_nb_chars=200)))
-        # Thêm 80 category ngẫu nhiên
+        db.session.add_all(categories)
+        db.session.flush()
+        # Thêm 80 category ngẫu nhiên, làm con của 1 category thực tế
+        roots = list(categories)
         for i in range(20, 100):
             categories.append(Category(
                 name=fake.word().title() + " " + fake.word().title(),
-                description=fake.text(max_nb_chars=200)
+                description=fake.text(max_nb_chars=200),
+                parent_id=random.choice(roots).id
             ))
         db.session.add_all(categories)
         db.session.commit()
+        CategoryRepository().rebuild_closure()
         category_ids = [c.id for c in categories]
 
         # =============== 2. Users ===============
@@ -0,0 +1,191 @@
+# app/utils/rate_limiter.py
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from flask import jsonify, request
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SLOT = struct.Struct("<Qd")  # (key fingerprint, theoretical arrival time) = 16 bytes
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_STRIPES = 64
+
+
+def parse_rate(rate):
+    """'10/minute' | '5/second' | '100/hour' | '20/30s' -> (limit, period_seconds)"""
+    count, _, per = rate.partition("/")
+    per = per.strip().lower()
+    if per in _PERIODS:
+        period = _PERIODS[per]
+    elif per.endswith("s") and per[:-1].isdigit():
+        period = int(per[:-1])
+    else:
+        raise ValueError(f"Invalid rate limit: {rate}")
+    return int(count), period
+
+
+class RateLimiter:
+    """
+    ✅ Rate limiter GCRA (token bucket tương đương) theo IP / user / endpoint.
+
+    Trạng thái mỗi key chỉ là 1 float (TAT) trong bảng slot cố định 16 bytes/slot,
+    bucket 2-way theo fingerprint của key:
+    - O(1) mỗi lần check, bộ nhớ cố định (2^20 slots = 16MB cho ~1M key)
+    - Key hiếm khi bị đè khi bảng đầy -> chỉ làm limiter "quên" key đó (fail-open)
+    - shared_path: mmap file (vd /dev/shm/...) để các worker trên cùng host dùng chung
+    - slots=None: chưa cấp phát bảng, init_app cấp phát theo RATE_LIMIT_SLOTS
+    """
+
+    def __init__(self, slots=None, shared_path=None):
+        self.enabled = True
+        self.rates = {}
+        self.slots = None
+        self.shared_path = None
+        self._fd = None
+        self._buf = None
+        if slots is not None:
+            self._configure_storage(slots, shared_path)
+
+    def _configure_storage(self, slots, shared_path):
+        self.close()  # init_app gọi lại (nhiều app / test) -> không rò mmap / fd của bảng cũ
+        self.slots = 1 << max(1, (slots - 1).bit_length())  # làm tròn lên lũy thừa 2
+        self.shared_path = shared_path
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+        size = self.slots * _SLOT.size
+
+        if shared_path:
+            fd = os.open(shared_path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._buf = mmap.mmap(fd, size)
+        else:
+            self._fd = None
+            self._buf = bytearray(size)
+
+    def close(self):
+        """Giải phóng bảng slot (munmap + đóng fd nếu dùng shared_path)."""
+        buf, fd = self._buf, self._fd
+        self._buf = self._fd = None
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+        if fd is not None:
+            os.close(fd)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.rates = {name: parse_rate(rate) for name, rate in app.config.get('RATE_LIMITS', {}).items()}
+        self._configure_storage(
+            app.config.get('RATE_LIMIT_SLOTS', self.slots or 1 << 20),
+            app.config.get('RATE_LIMIT_SHARED_PATH') or None,
+        )
+
+    # ========================================
+    # ✅ CORE
+    # ========================================
+
+    def hit(self, key, limit, period, now=None):
+        """
+        Ghi nhận 1 request cho key.
+        Return: (allowed: bool, retry_after_seconds: float)
+        """
+        now = time.time() if now is None else now
+        interval = period / limit
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        bucket = (fingerprint & (self.slots - 1)) & ~1  # 2 slot liền nhau
+
+        with self._locks[(bucket >> 1) % _STRIPES]:
+            self._lock_shared(bucket)
+            try:
+                slot, tat = self._find(bucket, fingerprint, now)
+                tat = max(tat, now)
+                allow_at = tat + interval - period
+                if now < allow_at:
+                    return False, allow_at - now
+                _SLOT.pack_into(self._buf, slot * _SLOT.size, fingerprint, tat + interval)
+                return True, 0.0
+            finally:
+                self._unlock_shared(bucket)
+
+    def _find(self, bucket, fingerprint, now):
+        """Tìm slot của key trong bucket; nếu chưa có thì lấy slot có TAT cũ nhất."""
+        victim, victim_tat = bucket, math.inf
+        for slot in (bucket, bucket + 1):
+            fp, tat = _SLOT.unpack_from(self._buf, slot * _SLOT.size)
+            if fp == fingerprint:
+                return slot, tat
+            if tat < victim_tat:
+                victim, victim_tat = slot, tat
+        return victim, now
+
+    def _lock_shared(self, bucket):
+        if self._fd is not None:
+            import fcntl
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 2 * _SLOT.size, bucket * _SLOT.size)
+
+    def _unlock_shared(self, bucket):
+        if self._fd is not None:
+            import fcntl
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 2 * _SLOT.size, bucket * _SLOT.size)
+
+    # ========================================
+    # ✅ FLASK INTEGRATION
+    # ========================================
+
+    def limit_blueprint(self, blueprint, keys=("ip",)):
+        """
+        Áp dụng rate limit cho các endpoint của blueprint.
+        Rate lấy từ config RATE_LIMITS theo tên endpoint (vd "auth.login"),
+        fallback theo tên blueprint. Endpoint không có rate thì không giới hạn.
+        """
+        @blueprint.before_request
+        def _check_rate_limit():
+            if not self.enabled or self._buf is None:  # chưa init_app -> không giới hạn
+                return None
+            rate = self.rates.get(request.endpoint) or self.rates.get(blueprint.name)
+            if not rate:
+                return None
+
+            limit, period = rate
+            for kind in keys:
+                value = _key_value(kind)
+                if value is None:
+                    continue
+                allowed, retry_after = self.hit(f"{request.endpoint}:{kind}:{value}", limit, period)
+                if not allowed:
+                    return _too_many_requests(retry_after)
+            return None
+
+        return blueprint
+
+
+def _key_value(kind):
+    if kind == "ip":
+        return request.remote_addr or "unknown"
+    if kind == "user":
+        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
+    raise ValueError(f"Unknown rate limit key: {kind}")
+
+
+def _too_many_requests(retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    logger.info(f"Rate limited {request.remote_addr} on {request.endpoint}")
+    response = jsonify({"error": "Too many requests", "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,27 @@
+# app/utils/request_params.py
+
+# Số id tối đa trong 1 request bulk (?ids=)
+MAX_BULK_IDS = 100
+
+
+def parse_id_list(raw, limit=MAX_BULK_IDS):
+    """
+    "1,2,3" -> [1, 2, 3] (bỏ trùng, giữ thứ tự); None nếu không truyền.
+    Raise ValueError nếu có id không phải số nguyên dương hoặc vượt quá limit.
+    """
+    if raw is None:
+        return None
+    ids = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit() or int(part) <= 0:
+            raise ValueError(f"Invalid id '{part}'")
+        ids.append(int(part))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids must contain at least one id")
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} ids per request")
+    return ids
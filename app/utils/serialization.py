@@ -0,0 +1,114 @@
+# app/utils/serialization.py
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+_MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+_flask_default = DefaultJSONProvider.default
+
+
+def encode_default(obj):
+    """
+    Kiểu ngoài JSON chuẩn, encode giống các to_dict hiện có: Decimal -> số, datetime / date -> ISO 8601,
+    numpy scalar / array -> số / list. Kiểu khác (UUID, dataclass, ...) theo mặc định của Flask.
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return _flask_default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    ✅ JSON provider của app (jsonify / app.json): orjson nếu đã cài, MessagePack theo Accept.
+
+    - encoder: "auto" (orjson nếu có, không thì json stdlib) | "orjson" | "stdlib"
+    - Decimal / datetime / numpy encode trực tiếp, output giống nhau giữa các encoder
+      -> serializer có thể trả thẳng giá trị từ DB row, không cần float() / isoformat()
+    - Accept: application/msgpack (hoặc x-msgpack) và msgpack đã cài -> body MessagePack cùng nội dung
+    - Không sort key (Flask mặc định sort) để tiết kiệm CPU trên response lớn
+    """
+
+    sort_keys = False
+    default = staticmethod(encode_default)
+
+    def __init__(self, app, encoder="auto", msgpack_enabled=True):
+        super().__init__(app)
+        if encoder == "orjson" and orjson is None:
+            raise RuntimeError("JSON_ENCODER=orjson but the orjson package is not installed")
+        self.use_orjson = orjson is not None and encoder in ("auto", "orjson")
+        self.msgpack_enabled = msgpack_enabled and msgpack is not None
+        logger.info(f"JSON provider: {self.describe()}")
+
+    def describe(self):
+        """Encoder đang dùng, vd "orjson, msgpack on" / "stdlib json (orjson not installed), msgpack off"."""
+        json_part = "orjson" if self.use_orjson else "stdlib json"
+        if not self.use_orjson and orjson is None:
+            json_part += " (orjson not installed)"
+        msgpack_part = "msgpack on" if self.msgpack_enabled else "msgpack off"
+        if not self.msgpack_enabled and msgpack is None:
+            msgpack_part += " (not installed)"
+        return f"{json_part}, {msgpack_part}"
+
+    def _orjson_options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=encode_default, option=self._orjson_options()).decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson and not self.msgpack_enabled:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.msgpack_enabled and wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=encode_default, use_bin_type=True), mimetype=MSGPACK_MIMETYPE
+            )
+        elif self.use_orjson:
+            pretty = (self.compact is None and self._app.debug) or self.compact is False
+            body = orjson.dumps(obj, default=encode_default, option=self._orjson_options(pretty) | orjson.OPT_APPEND_NEWLINE)
+            response = self._app.response_class(body, mimetype=self.mimetype)
+        else:
+            response = super().response(obj)
+        if self.msgpack_enabled:
+            # Cùng URL có 2 representation -> cache (browser / proxy) phải phân biệt theo Accept
+            response.vary.add("Accept")
+        return response
+
+
+def wants_msgpack():
+    if not has_request_context() or not request.accept_mimetypes:
+        return False
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + _MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+    return best in _MSGPACK_MIMETYPES
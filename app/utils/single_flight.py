@@ -0,0 +1,66 @@
+# app/utils/single_flight.py
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    ✅ Gộp các lời gọi giống nhau đang chạy đồng thời trong process (request coalescing).
+
+    - do(key, fn): thread đầu tiên với key chạy fn; thread khác cùng key lúc đó đợi và nhận
+      cùng kết quả (hoặc cùng exception) -> 1 query DB thay vì N khi cùng lúc nhiều request
+    - Không cache: fn xong là key được bỏ, lời gọi sau chạy lại fn
+    - Kết quả được chia sẻ giữa các thread: chỉ trả dữ liệu thuần (dict / tuple), không trả ORM object
+      gắn với session của thread khác; caller không được sửa kết quả
+    - timeout: thread đợi quá lâu (fn treo) thì tự chạy fn
+    """
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0   # số lần fn thực sự chạy
+        self.coalesced = 0  # số lời gọi đợi / dùng chung kết quả của lời gọi khác
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self.coalesced -= 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                self.executed += 1
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,93 @@
+# app/utils/streaming.py
+from flask import current_app, request, stream_with_context
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+_NDJSON_MIMETYPES = (NDJSON_MIMETYPE, "application/jsonl")
+STREAM_MODES = ("ndjson", "json")
+
+# Gom item thành chunk ~64KB trước khi ghi ra socket (tránh 1 write / sản phẩm)
+CHUNK_SIZE = 64 * 1024
+
+
+def stream_mode():
+    """
+    Chọn chế độ stream cho request hiện tại:
+    - ?stream=ndjson | json (json = 1 JSON object, mảng items được ghi dần)
+    - hoặc Accept: application/x-ndjson (application/jsonl)
+    Return: "ndjson" | "json" | None (response thường). Raise ValueError nếu ?stream không hợp lệ.
+    """
+    mode = request.args.get("stream")
+    if mode is not None:
+        mode = mode.strip().lower()
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Invalid stream mode '{mode}'. Allowed: {', '.join(STREAM_MODES)}")
+        return mode
+    if request.accept_mimetypes and request.accept_mimetypes.best_match(
+        ("application/json",) + _NDJSON_MIMETYPES, default="application/json"
+    ) in _NDJSON_MIMETYPES:
+        return "ndjson"
+    return None
+
+
+def iter_ndjson(items, dumps):
+    """Mỗi item 1 dòng JSON."""
+    buffer, size = [], 0
+    for item in items:
+        line = dumps(item) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_json_object(items, dumps, key="products", meta=None):
+    """
+    {...meta, "<key>": [item, ...], "count": N} — cùng shape với response thường.
+    Phần đầu được gửi ngay, không đợi query trả hết.
+    """
+    head = dumps(meta)[:-1] + "," if meta else "{"
+    yield f'{head}{dumps(key)}:['
+    buffer, size, count = [], 0, 0
+    for item in items:
+        chunk = ("," if count else "") + dumps(item)
+        buffer.append(chunk)
+        size += len(chunk)
+        count += 1
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    buffer.append(f'],"count":{count}}}\n')
+    yield "".join(buffer)
+
+
+def stream_response(items, mode, key="products", meta=None):
+    """
+    ✅ Response stream từ iterable (generator yield_per) — bộ nhớ cố định theo kích thước catalog.
+    Generator chạy trong request / app context (stream_with_context) nên session DB còn sống tới khi gửi xong.
+    """
+    dumps = current_app.json.dumps
+    body = iter_ndjson(items, dumps) if mode == "ndjson" else iter_json_object(items, dumps, key, meta)
+
+    def generate():
+        try:
+            yield from body
+        except Exception as e:
+            # Status 200 đã gửi: client nhận body bị cắt (JSON / dòng cuối không hợp lệ)
+            logger.error(f"Streaming response aborted: {str(e)}", exc_info=True)
+            raise
+
+    response = current_app.response_class(
+        stream_with_context(generate()),
+        mimetype=NDJSON_MIMETYPE if mode == "ndjson" else "application/json",
+    )
+    # Không để reverse proxy (nginx) buffer cả response
+    response.headers["X-Accel-Buffering"] = "no"
+    response.vary.add("Accept")
+    return response
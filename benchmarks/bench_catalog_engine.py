@@ -0,0 +1,93 @@
+# benchmarks/bench_catalog_engine.py
+"""
+Benchmark CatalogEngine trên catalog giả lập (không cần DB).
+
+    python benchmarks/bench_catalog_engine.py [--products 1000000] [--categories 200] [--queries 200]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.catalog_engine import CatalogEngine
+
+WORDS = ["Lenovo", "Dell", "Asus", "Apple", "Samsung", "Sony", "Logitech", "Acer", "HP", "Xiaomi"]
+
+
+def timed(label, fn, repeat):
+    fn()  # lần đầu: tính + cache thứ tự sort
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"  {label:<45} {(time.perf_counter() - t0) / repeat * 1e6:9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n = args.products
+    prices = np.round(rng.lognormal(4, 1, n), 2).tolist()
+    categories = rng.integers(1, args.categories + 1, n).tolist()
+    quantity = np.where(rng.random(n) < 0.2, 0, rng.integers(1, 500, n)).tolist()
+    start = datetime(2023, 1, 1)
+
+    rows = (
+        (i + 1, f"{WORDS[i % len(WORDS)]} Product {i * 7919 % n:07d}", prices[i], categories[i],
+         start + timedelta(minutes=i), quantity[i], 0, f"SKU{i + 1:07d}")
+        for i in range(n)
+    )
+    engine = CatalogEngine()
+    t0 = time.perf_counter()
+    engine.load(rows)
+    print(f"load {n:,} products: {time.perf_counter() - t0:.2f}s")
+
+    q = args.queries
+    timed("newest, page 1", lambda: engine.list_product_ids(), q)
+    timed("price asc, page 50", lambda: engine.list_product_ids(page=50, sort="price", desc=False), q)
+    timed("name asc, in stock, page 1", lambda: engine.list_product_ids(sort="name", desc=False, in_stock_only=True), q)
+    timed("category, price desc, in stock, page 3",
+          lambda: engine.list_product_ids(page=3, sort="price", category_id=7, in_stock_only=True), q)
+    timed("stock counts (all)", lambda: engine.stock_counts(), q)
+    timed("stock counts (category)", lambda: engine.stock_counts(category_id=7), q)
+
+    timed("facets: brand + price band, page 1",
+          lambda: engine.search(brand="dell", price_band="50-100", in_stock_only=True), q)
+    timed("facets: counts, no filter", lambda: engine.search(facets=True), q)
+    timed("facets: counts, category + in stock",
+          lambda: engine.search(category_id=7, in_stock_only=True, facets=True), max(q // 10, 1))
+    timed("facets: counts, brand (wide)", lambda: engine.search(brand="dell", facets=True), max(q // 10, 1))
+
+    t0 = time.perf_counter()
+    engine.build_trigrams()
+    print(f"trigram index build: {time.perf_counter() - t0:.2f}s")
+    typos = ["lenvo produc", "samsng", "logitec 00123", "sku0012345", "xiomi prodct 99",
+             "del product", "aple", "asus prodcut 0004", "sny", "acer 12"]
+    for query in typos:
+        engine.fuzzy_search(query, 10)
+    latencies = []
+    for _ in range(max(q // len(typos), 1)):
+        for query in typos:
+            t1 = time.perf_counter()
+            engine.fuzzy_search(query, 10)
+            latencies.append(time.perf_counter() - t1)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"  fuzzy search ({len(latencies)} queries)              p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+
+    t0 = time.perf_counter()
+    for i in range(1000):
+        engine.apply({int(rng.integers(1, n)): {"quantity": i}}, set())
+    print(f"stock update: {(time.perf_counter() - t0) / 1000 * 1e6:.1f} us/update (sort cache kept)")
+
+
+if __name__ == "__main__":
+    main()
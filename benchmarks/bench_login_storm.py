@@ -0,0 +1,69 @@
+# benchmarks/bench_login_storm.py
+"""
+Login storm: N thread liên tục gọi /auth/login trong khi đo latency của 1 endpoint
+không liên quan tới auth. Chạy khi server đang chạy (python run.py / gunicorn).
+
+    python benchmarks/bench_login_storm.py --threads 32 --seconds 20
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+BASE_URL = "http://localhost:5000"
+LOGIN_PAYLOAD = {"email": "admin@smartshop.com", "password": "admin123"}
+PROBE_PATH = "/api/products?per_page=1"
+
+
+def login_worker(stop, stats, lock):
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.post(f"{BASE_URL}/auth/login", json=LOGIN_PAYLOAD)
+        with lock:
+            stats[response.status_code] = stats.get(response.status_code, 0) + 1
+
+
+def probe_worker(stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        session.get(f"{BASE_URL}{PROBE_PATH}")
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=int, default=20)
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    stats, lock, latencies = {}, threading.Lock(), []
+    threads = [threading.Thread(target=login_worker, args=(stop, stats, lock)) for _ in range(args.threads)]
+    threads.append(threading.Thread(target=probe_worker, args=(stop, latencies)))
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    total = sum(stats.values())
+    print(f"login requests: {total} ({total / args.seconds:.1f}/s) by status {stats}")
+    print(f"login success:  {stats.get(200, 0) / args.seconds:.1f}/s")
+    if latencies:
+        print(
+            f"{PROBE_PATH}: n={len(latencies)} p50={statistics.median(latencies):.1f}ms "
+            f"p99={percentile(latencies, 99):.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_order_expiry.py
+"""
+Benchmark expiry timer: bộ nhớ mỗi order được theo dõi và CPU với 1M timer.
+
+    python benchmarks/bench_order_expiry.py [--orders 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.tasks.order_expiry import OrderExpiryScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.orders
+
+    expired = []
+    timer = OrderExpiryScheduler(timeout_seconds=60, on_expire=expired.append)
+    timer.start()
+    now = time.time()
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    for order_id in range(n):
+        # Deadline rải đều trong 1 giờ tới, không timer nào tới hạn khi đang đo
+        timer.schedule_at(order_id, now + 3600 + (order_id % 3600))
+    schedule_time = time.perf_counter() - t0
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for order_id in range(0, n, 2):
+        timer.discard(order_id)
+    discard_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    due = timer.pop_due(now + 7200 + 1)
+    pop_time = time.perf_counter() - t0
+    timer.stop()
+
+    print(f"tracked orders:        {n:,}")
+    print(f"memory per order:      {(used - base) / n:.1f} bytes")
+    print(f"schedule:              {schedule_time:.2f}s ({schedule_time / n * 1e6:.2f} µs/op)")
+    print(f"discard half:          {discard_time:.2f}s ({discard_time / (n // 2) * 1e6:.2f} µs/op)")
+    print(f"pop all due ({len(due):,}):   {pop_time:.2f}s ({pop_time / max(len(due), 1) * 1e6:.2f} µs/op)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# benchmarks/bench_rate_limiter.py
+"""
+Benchmark RateLimiter: thời gian mỗi lần check và bộ nhớ khi theo dõi 1M key.
+
+    python benchmarks/bench_rate_limiter.py [--keys 1000000] [--shared /dev/shm/bench-ratelimit]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.rate_limiter import RateLimiter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--slots", type=int, default=1 << 21)
+    parser.add_argument("--shared", default=None)
+    args = parser.parse_args()
+
+    limiter = RateLimiter(slots=args.slots, shared_path=args.shared)
+    keys = [f"api.api_order.create_order:ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+
+    t0 = time.perf_counter()
+    for key in keys:
+        limiter.hit(key, 30, 60)
+    first_pass = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for key in keys:
+        limiter.hit(key, 30, 60)
+    second_pass = time.perf_counter() - t0
+
+    print(f"keys:          {args.keys:,}")
+    print(f"table memory:  {limiter.slots * 16 / 1024 / 1024:.0f} MB ({limiter.slots:,} slots, {'shared' if args.shared else 'local'})")
+    print(f"insert:        {first_pass / args.keys * 1e6:.2f} µs/check")
+    print(f"existing key:  {second_pass / args.keys * 1e6:.2f} µs/check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_related_products.py
+"""
+Benchmark job "frequently bought together" trên order items giả lập (không cần DB).
+
+    python benchmarks/bench_related_products.py [--items 10000000] [--products 10000] [--batch 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.recommendation_service import basket_pairs, merge_counts, top_k_neighbours
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1_000_000, help="order items mỗi batch")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    # Giỏ hàng 1-8 sản phẩm (trung bình ~3), độ phổ biến sản phẩm theo Zipf
+    sizes = rng.geometric(0.35, size=args.items).clip(1, 8)
+    sizes = sizes[np.cumsum(sizes) <= args.items]
+    order_ids = np.repeat(np.arange(1, len(sizes) + 1), sizes)
+    product_ids = (rng.zipf(1.3, size=len(order_ids)) % args.products) + 1
+    print(f"order items:   {len(order_ids):,} in {len(sizes):,} orders, {args.products:,} products")
+
+    keys = counts = np.empty(0, dtype=np.int64)
+    t0 = time.perf_counter()
+    for start in range(0, len(order_ids), args.batch):
+        # Cắt batch theo ranh giới order (như đọc theo order id từ DB)
+        end = min(start + args.batch, len(order_ids))
+        while end < len(order_ids) and order_ids[end] == order_ids[end - 1]:
+            end += 1
+        batch_keys, batch_counts = basket_pairs(order_ids[start:end], product_ids[start:end])
+        keys, counts = merge_counts(keys, counts, batch_keys, batch_counts)
+    count_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    src, rank, dst, score, pair_count = top_k_neighbours(keys, counts, k=args.k, min_count=2)
+    score_time = time.perf_counter() - t0
+
+    print(f"pair counts:   {len(keys):,} ({keys.nbytes + counts.nbytes:,} bytes)")
+    print(f"co-occurrence: {count_time:.2f}s")
+    print(f"top-{args.k} scoring: {score_time:.2f}s -> {len(src):,} rows for {len(np.unique(src)):,} products")
+
+
+if __name__ == "__main__":
+    main()
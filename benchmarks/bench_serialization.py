@@ -0,0 +1,107 @@
+# benchmarks/bench_serialization.py
+"""
+Benchmark serialize response sản phẩm (không cần DB):
+- encoder: json stdlib (Flask mặc định) vs orjson vs msgpack
+- serializer: Product ORM object + to_dict vs dict dựng thẳng từ row tuple
+
+    python benchmarks/bench_serialization.py [--page 100] [--dump 10000] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.utils.serialization import encode_default, msgpack, orjson
+
+WORDS = ["Lenovo", "Dell", "Asus", "Apple", "Samsung", "Sony", "Logitech", "Acer", "HP", "Xiaomi"]
+
+
+def timed(label, fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - t0) / repeat
+    size = f"{len(result) / 1024:9.1f} KiB" if isinstance(result, (bytes, str)) else ""
+    print(f"  {label:<45} {elapsed * 1e3:9.3f} ms {size}")
+
+
+def make_rows(n):
+    """Row tuple như ProductRepository.get_rows đọc từ DB (Decimal / datetime giữ nguyên kiểu)."""
+    start = datetime(2023, 1, 1)
+    return [
+        (i + 1, f"SKU{i + 1:07d}", f"{WORDS[i % len(WORDS)]} Product {i:07d}",
+         f"Mô tả sản phẩm {i}", Decimal(f"{(i * 7919) % 100000 / 100:.2f}"), i % 200 + 1,
+         start + timedelta(minutes=i), (i * 31) % 500, (i * 31) % 500, 0)
+        for i in range(n)
+    ]
+
+
+def make_products(rows):
+    products = []
+    for pid, sku, name, description, price, category_id, created_at, quantity, _, reserved in rows:
+        product = Product(id=pid, sku=sku, name=name, description=description,
+                          price=price, category_id=category_id, created_at=created_at)
+        product.inventory = Inventory(product_id=pid, quantity=quantity, reserved_quantity=reserved)
+        products.append(product)
+    return products
+
+
+def stdlib_dumps(obj):
+    # = DefaultJSONProvider của Flask (default xử lý Decimal / datetime)
+    return json.dumps(obj, default=encode_default, ensure_ascii=False, sort_keys=True)
+
+
+def bench(label, n, repeat):
+    rows = make_rows(n)
+    products = make_products(rows)
+    fields = Product.FIELDS
+    row_dicts = [dict(zip(fields, row)) for row in rows]
+    orm_dicts = [p.to_dict(include_stock=True) for p in products]
+
+    print(f"{label} ({n:,} products)")
+    timed("serializer: ORM to_dict", lambda: [p.to_dict(include_stock=True) for p in products], repeat)
+    timed("serializer: dict(zip(fields, row))", lambda: [dict(zip(fields, row)) for row in rows], repeat)
+
+    payload = {"total": n, "products": orm_dicts}
+    timed("encode: json stdlib (to_dict output)", lambda: stdlib_dumps(payload), repeat)
+    if orjson is not None:
+        timed("encode: orjson (to_dict output)", lambda: orjson.dumps(payload, default=encode_default), repeat)
+        raw = {"total": n, "products": row_dicts}
+        timed("encode: orjson (row dicts, Decimal/datetime)",
+              lambda: orjson.dumps(raw, default=encode_default), repeat)
+    else:
+        print("  orjson not installed, skipped")
+    if msgpack is not None:
+        timed("encode: msgpack (to_dict output)",
+              lambda: msgpack.packb(payload, default=encode_default, use_bin_type=True), repeat)
+    else:
+        print("  msgpack not installed, skipped")
+    timed("end-to-end: to_dict + json stdlib",
+          lambda: stdlib_dumps({"total": n, "products": [p.to_dict(include_stock=True) for p in products]}), repeat)
+    if orjson is not None:
+        timed("end-to-end: row dicts + orjson",
+              lambda: orjson.dumps({"total": n, "products": [dict(zip(fields, row)) for row in rows]},
+                                   default=encode_default), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--dump", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bench("page", args.page, args.repeat)
+    bench("dump", args.dump, max(args.repeat // 10, 1))
+
+
+if __name__ == "__main__":
+    main()
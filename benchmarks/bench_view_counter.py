@@ -0,0 +1,55 @@
+# benchmarks/bench_view_counter.py
+"""
+Benchmark ViewCounter.increment (không flush / không DB).
+
+    python benchmarks/bench_view_counter.py [--increments 2000000] [--threads 8] [--products 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.view_counter import ViewCounter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--increments", type=int, default=2_000_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--products", type=int, default=10_000)
+    args = parser.parse_args()
+
+    product_ids = [random.randint(1, args.products) for _ in range(100_000)]
+
+    for threads in (1, args.threads):
+        counter = ViewCounter(flush_seconds=3600)
+        per_thread = args.increments // threads
+
+        def work():
+            increment = counter.increment
+            for i in range(per_thread):
+                increment(product_ids[i % 100_000])
+
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - t0
+
+        total = per_thread * threads
+        assert counter.pending() == total
+        print(f"{threads} thread(s): {elapsed / total * 1e9:.0f} ns/increment ({total:,} increments)")
+
+        t0 = time.perf_counter()
+        deltas = counter._drain()
+        print(f"  drain: {(time.perf_counter() - t0) * 1000:.1f} ms for {len(deltas):,} products")
+
+
+if __name__ == "__main__":
+    main()
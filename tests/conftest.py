@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import pytest
+
+# Logger của scheduler / order_expiry gắn FileHandler lúc import: ghi ra thư mục tạm thay vì app/logs
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="smartshop-logs-"))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """create_app() trên 1 file SQLite tạm (đủ bảng), hash password đồng bộ, không rate limit."""
+    from app import create_app, db
+    from app.config import Config
+
+    for key, value in {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "SQLALCHEMY_BINDS": {},
+        "SECRET_KEY": "test-secret",
+        "JWT_SECRET_KEY": "test-jwt-secret-" + "x" * 32,
+        "PASSWORD_HASH_WORKERS": 0,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "RATE_LIMIT_ENABLED": False,
+        "CATALOG_ETAG_ENABLED": False,
+        "COMPRESS_ENABLED": False,
+    }.items():
+        monkeypatch.setattr(Config, key, value, raising=False)
+
+    app = create_app()
+    app.config["TESTING"] = True
+    # Cache trong process giữ theo id: DB của test trước có thể trùng id
+    from app.repositories.base_repository import _count_cache
+    from app.repositories.category_repository import _subtree_cache
+    from app.utils.auth_helpers import _principal_cache
+    for cache in (_count_cache, _subtree_cache, _principal_cache):
+        cache.clear()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def seed(app):
+    """1 category, 2 user (admin a@a / bob b@b, password 'pw'), 3 sản phẩm tồn kho 10."""
+    from app import db
+    from app.models.category import Category
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+    from app.models.user import User
+
+    with app.app_context():
+        category = Category(name="Laptops")
+        admin = User(username="admin", email="a@a", is_admin=True)
+        bob = User(username="bob", email="b@b")
+        for user in (admin, bob):
+            user.set_password("pw")
+        db.session.add_all([category, admin, bob])
+        db.session.flush()
+        products = []
+        for i in range(1, 4):
+            product = Product(sku=f"SKU{i}", name=f"Laptop {i}", price=10 * i, category_id=category.id)
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(Inventory(product_id=product.id, quantity=10, reserved_quantity=0))
+            products.append(product.id)
+        db.session.commit()
+        return {"category_id": category.id, "admin_id": admin.id, "user_id": bob.id, "product_ids": products}
@@ -0,0 +1,75 @@
+import time
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+from app.utils.auth_helpers import UserPrincipal, _principal_cache, get_current_principal, invalidate_user
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_expiry_lru_and_pop():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=None)
+    assert cache.get("a") == 1          # a mới dùng -> b ít dùng nhất
+    cache.set("c", 3)
+    assert "b" not in cache and len(cache) == 2
+
+    time.sleep(0.06)
+    assert cache.get("a") is None and "c" not in cache
+    cache.set("d", 4)
+    assert cache.pop("d") == 4 and cache.pop("d", "gone") == "gone"
+    assert cache.get_or_set("e", lambda: 5) == 5 and cache.get_or_set("e", lambda: 6) == 5
+
+
+def _principal(app, user_id):
+    """get_current_principal() trong 1 request mới (g trống) với JWT của user_id."""
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        verify_jwt_in_request()
+        return get_current_principal()
+
+
+def test_principal_cached_until_commit(app, seed):
+    from app import db
+    from app.models.user import User
+
+    user_id = seed["user_id"]
+    assert _principal(app, user_id) == UserPrincipal(user_id, "bob", "b@b", False)
+    assert user_id in _principal_cache
+
+    with app.app_context():
+        db.session.get(User, user_id).username = "robert"
+        db.session.flush()
+        # Chưa commit: request khác vẫn phải thấy bản đã commit
+        assert user_id in _principal_cache
+        db.session.rollback()
+    assert user_id in _principal_cache
+
+    with app.app_context():
+        db.session.get(User, user_id).username = "robert"
+        db.session.commit()
+    assert user_id not in _principal_cache
+    assert _principal(app, user_id).username == "robert"
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+    assert user_id not in _principal_cache
+    assert _principal(app, user_id) is None
+
+
+def test_bulk_update_needs_explicit_invalidation(app, seed):
+    from app import db
+    from app.models.user import User
+
+    admin_id = seed["admin_id"]
+    assert _principal(app, admin_id).is_admin
+
+    with app.app_context():
+        User.query.filter_by(id=admin_id).update({"is_admin": False})
+        db.session.commit()
+    # query.update không qua flush -> cache giữ bản cũ tới khi gọi invalidate_user
+    assert _principal(app, admin_id).is_admin
+    invalidate_user(admin_id)
+    assert not _principal(app, admin_id).is_admin
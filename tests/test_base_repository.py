@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pytest
+
+from app.repositories.base_repository import _count_cache
+
+
+def _add_product(category_id, sku, price=5):
+    from app import db
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+
+    product = Product(sku=sku, name=f"Mouse {sku}", price=price, category_id=category_id)
+    db.session.add(product)
+    db.session.flush()
+    db.session.add(Inventory(product_id=product.id, quantity=0, reserved_quantity=0))
+    db.session.commit()
+    return product.id
+
+
+def test_paginate_rows_page_and_offset_bounds(app, seed):
+    from app.repositories import ProductRepository
+
+    with app.app_context():
+        repo = ProductRepository()
+        rows, total, pages = repo.get_admin_page(page=0, per_page=2, sort="id", desc=False)
+        assert [r.sku for r in rows] == ["SKU1", "SKU2"] and (total, pages) == (3, 2)
+
+        rows, _, _ = repo.get_admin_page(page=2, per_page=2, sort="id", desc=False)
+        assert [r.sku for r in rows] == ["SKU3"]
+        # Trang quá cuối: rỗng nhưng vẫn trả tổng đúng
+        assert repo.get_admin_page(page=9, per_page=2) == ([], 3, 2)
+        # per_page <= 0 không chia cho 0
+        rows, total, pages = repo.get_admin_page(page=1, per_page=0)
+        assert len(rows) == 1 and (total, pages) == (3, 3)
+
+
+def test_count_cached_per_filter_set(app, seed):
+    from app.repositories import ProductRepository
+
+    with app.app_context():
+        repo = ProductRepository()
+        assert repo.get_admin_page(q="Laptop")[1] == 3
+        assert repo.get_admin_page(stock="in")[1] == 3
+        _add_product(seed["category_id"], "MOU1")
+
+        # Cùng bộ lọc -> số đếm cũ trong cache (TTL ngắn); bộ lọc khác -> đếm lại
+        assert repo.get_admin_page(q="Laptop")[1] == 3
+        assert repo.get_admin_page(stock="in")[1] == 3
+        assert repo.get_admin_page(stock="out")[1] == 1
+        assert repo.get_admin_page(q="Mouse")[1] == 1
+        # Giá trị rỗng / None bị bỏ khỏi key -> chung cache với "không lọc"
+        assert repo.get_admin_page()[1] == 4
+        _add_product(seed["category_id"], "MOU2")
+        assert repo.get_admin_page(q="", category_id=None)[1] == 4
+
+        _count_cache.clear()
+        assert repo.get_admin_page()[1] == 5
+
+
+def test_estimated_count_falls_back_to_count_on_sqlite(app, seed):
+    from app.repositories import ProductRepository, UserRepository
+
+    with app.app_context():
+        assert ProductRepository().session.get_bind().dialect.name == "sqlite"
+        # Không đọc information_schema (không có trên SQLite), COUNT(*) chính xác
+        assert ProductRepository().estimated_count() == 3
+        assert UserRepository().estimated_count() == 2
+
+
+@pytest.mark.parametrize("sort", ["password_hash", "is_admin", "id; drop table users", None])
+def test_user_admin_page_sort_whitelist(app, seed, sort):
+    from app.repositories import UserRepository
+
+    with app.app_context():
+        rows, total, _ = UserRepository().get_admin_page(sort=sort, desc=False)
+        assert [r.id for r in rows] == sorted(r.id for r in rows) and total == 2
+        rows, _, _ = UserRepository().get_admin_page(sort="username", desc=False)
+        assert [r.username for r in rows] == ["admin", "bob"]
+
+
+def test_product_admin_page_sort_whitelist(app, seed):
+    from app.repositories import ProductRepository
+
+    with app.app_context():
+        repo = ProductRepository()
+        rows, _, _ = repo.get_admin_page(sort="price", desc=True)
+        assert [r.price for r in rows] == [Decimal(30), Decimal(20), Decimal(10)]
+        # Cột không nằm trong whitelist (description) -> sort theo id
+        rows, _, _ = repo.get_admin_page(sort="description", desc=False)
+        assert [r.sku for r in rows] == ["SKU1", "SKU2", "SKU3"]
+
+
+def test_order_admin_page_sort_whitelist_and_filters(app, seed):
+    from app import db
+    from app.models.order import Order
+    from app.repositories import OrderRepository
+
+    with app.app_context():
+        db.session.add_all([
+            Order(user_id=seed["user_id"], total_amount=50, status="paid"),
+            Order(user_id=seed["user_id"], total_amount=20, status="pending"),
+            Order(user_id=seed["admin_id"], total_amount=80, status="paid"),
+        ])
+        db.session.commit()
+
+        repo = OrderRepository()
+        rows, total, _ = repo.get_admin_page(sort="total_amount", desc=True)
+        assert [r.total_amount for r in rows] == [Decimal(80), Decimal(50), Decimal(20)] and total == 3
+        assert rows[0].username == "admin"
+
+        rows, _, _ = repo.get_admin_page(sort="user_id", desc=False)  # không trong whitelist -> id
+        assert [r.id for r in rows] == sorted(r.id for r in rows)
+
+        rows, total, _ = repo.get_admin_page(status="paid", user_id=seed["user_id"])
+        assert total == 1 and rows[0].total_amount == Decimal(50)
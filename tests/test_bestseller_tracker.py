@@ -0,0 +1,81 @@
+from app.services.bestseller_tracker import BestsellerTracker
+
+HOUR = 3600
+NOW = 1_700_000_000 // HOUR * HOUR
+
+
+def test_windows_decay_as_buckets_expire():
+    tracker = BestsellerTracker()
+    tracker.load([], now=NOW)
+    tracker.record(1, 5, category_id=10, at=NOW)
+    tracker.record(2, 3, category_id=10, at=NOW + 2 * HOUR)
+
+    assert tracker.top_products("24h", now=NOW + 2 * HOUR) == [(1, 5), (2, 3)]
+
+    # Sau 24h bucket của sản phẩm 1 rơi khỏi cửa sổ 24h nhưng vẫn còn trong 7d
+    later = NOW + 25 * HOUR
+    assert tracker.top_products("24h", now=later) == [(2, 3)]
+    assert tracker.top_products("7d", now=later) == [(1, 5), (2, 3)]
+    assert tracker.top_categories("7d", now=later) == [(10, 8)]
+
+    assert tracker.top_products("30d", now=NOW + 31 * 24 * HOUR) == []
+    assert tracker.top_categories("30d", now=NOW + 31 * 24 * HOUR) == []
+
+
+def test_replace_hours_does_not_double_count_local_records():
+    tracker = BestsellerTracker()
+    tracker.load([], now=NOW)
+    tracker.record(1, 2, category_id=10, at=NOW)
+
+    # DB đã có đơn của worker này (2) và của worker khác (4)
+    from datetime import datetime
+    hour = datetime.utcfromtimestamp(NOW)
+    tracker.replace_hours(NOW // HOUR, [(hour, 1, 10, 6), (hour, 2, 11, 1)], now=NOW)
+
+    assert tracker.top_products("24h", now=NOW) == [(1, 6), (2, 1)]
+    assert tracker.top_products("24h", category_id=11, now=NOW) == [(2, 1)]
+    assert tracker.top_categories("24h", now=NOW) == [(10, 6), (11, 1)]
+
+
+def test_top_n_breaks_ties_by_id_and_reads_after_writes():
+    tracker = BestsellerTracker()
+    tracker.load([], now=NOW)
+    for product_id, units in [(5, 2), (3, 7), (4, 2), (1, 2)]:
+        tracker.record(product_id, units, category_id=10, at=NOW)
+
+    assert tracker.top_products("24h", n=3, now=NOW) == [(3, 7), (1, 2), (4, 2)]
+    assert tracker.top_products("24h", n=None, now=NOW) == [(3, 7), (1, 2), (4, 2), (5, 2)]
+    # Ghi xen giữa 2 lần đọc được thấy ngay
+    tracker.record(5, 10, at=NOW)
+    assert tracker.top_products("24h", n=2, now=NOW) == [(5, 12), (3, 7)]
+    assert tracker.ranked_count("24h", now=NOW) == 4
+
+
+def test_bestselling_in_stock_only_filters_before_paginating(app, seed, monkeypatch):
+    from app import db
+    from app.models.inventory import Inventory
+    from app.routes.api import product as product_routes
+
+    first, second, third = seed["product_ids"]
+    tracker = BestsellerTracker()
+    tracker.load([])
+    tracker._next_refresh = float("inf")  # không đồng bộ lại từ sales_hourly (trống)
+    for product_id, units in [(first, 5), (second, 3), (third, 1)]:
+        tracker.record(product_id, units)
+    monkeypatch.setattr(product_routes, "bestsellers", tracker)
+
+    with app.app_context():
+        Inventory.query.filter_by(product_id=first).one().quantity = 0
+        db.session.commit()
+
+    client = app.test_client()
+    pages = [
+        client.get(f"/api/products?sort=bestselling&in_stock_only=true&per_page=1&page={page}").json
+        for page in (1, 2)
+    ]
+    assert [p["total"] for p in pages] == [2, 2]
+    assert pages[0]["total_pages"] == 2
+    assert [[(p["id"], p["units_sold"]) for p in page["products"]] for page in pages] == [[(second, 3)], [(third, 1)]]
+
+    everything = client.get("/api/products?sort=bestselling&per_page=2").json
+    assert everything["total"] == 3 and [p["id"] for p in everything["products"]] == [first, second]
@@ -0,0 +1,171 @@
+import time
+from datetime import datetime
+
+from app.services.catalog_engine import CatalogEngine
+
+
+def _catalog():
+    engine = CatalogEngine()
+    created = datetime(2024, 1, 1)
+    engine.load([
+        # id, name, price, category_id, created_at, quantity, reserved, sku
+        (1, "Mouse", 20, 1, created, 5, 0, "SKU001"),
+        (2, "Keyboard", 50, 1, created, 0, 0, "SKU002"),
+        (3, "Laptop", 900, 2, created, 3, 1, "SKU003"),
+        (4, "Cable", 5, 1, created, 12, 0, "SKU004"),
+        (5, "Monitor", 300, 2, created, None, None, "SKU005"),
+    ])
+    return engine
+
+
+def test_filter_sort_and_paginate():
+    engine = _catalog()
+
+    assert engine.list_product_ids(per_page=2) == ([5, 4], 5)
+    assert engine.list_product_ids(page=2, per_page=2, sort="price", desc=False) == ([2, 5], 5)
+    assert engine.list_product_ids(sort="name", desc=False, category_id=1) == ([4, 2, 1], 3)
+    assert engine.list_product_ids(sort="price", desc=True, in_stock_only=True) == ([3, 1, 4], 3)
+    assert engine.list_product_ids(page=2, per_page=1, category_id=1, in_stock_only=True, desc=False) == ([4], 2)
+
+
+def test_apply_changes_invalidates_sort_cache():
+    engine = _catalog()
+    assert engine.list_product_ids(sort="price", desc=False, per_page=1) == ([4], 5)
+
+    engine.apply({4: {"price": 1000}, 6: {"name": "Adapter", "price": 1, "category_id": 1, "quantity": 2}}, {2})
+
+    assert engine.list_product_ids(sort="price", desc=False) == ([6, 1, 5, 3, 4], 5)
+    assert engine.list_product_ids(sort="name", desc=False, category_id=1) == ([6, 4, 1], 3)
+
+    # Chỉ đổi tồn kho: không cần sort lại
+    engine.apply({1: {"quantity": 0}}, set())
+    assert engine.list_product_ids(sort="price", desc=False, in_stock_only=True) == ([6, 3, 4], 3)
+
+
+def test_content_tag_changes_with_content():
+    engine, other = _catalog(), _catalog()
+    tag = engine.content_tag
+    assert tag != other.content_tag  # mỗi process / instance có bản riêng
+
+    engine.apply({1: {"quantity": 0}}, set())
+    assert engine.content_tag != tag
+
+
+def test_stock_counts():
+    engine = _catalog()
+
+    assert engine.stock_counts(low_stock_threshold=10) == {
+        "total_products": 5, "in_stock": 3, "out_of_stock": 2, "low_stock": 2,
+    }
+    assert engine.stock_counts(category_id=2)["in_stock"] == 1
+
+
+def test_facet_filters_and_counts():
+    engine = _catalog()
+    engine.apply({6: {"name": "Logitech Mouse", "price": 25, "category_id": 1, "quantity": 4}}, set())
+
+    result = engine.search(sort="price", desc=False, price_band="0-50", facets=True)
+    assert result["product_ids"] == [4, 1, 6] and result["total"] == 3
+
+    facets = result["facets"]
+    assert facets["category"] == [{"value": 1, "count": 3}]
+    # Số đếm price band bỏ qua filter price của chính nó
+    assert facets["price"] == [
+        {"value": "0-50", "count": 3}, {"value": "50-100", "count": 1},
+        {"value": "200-500", "count": 1}, {"value": "500-1000", "count": 1},
+    ]
+    assert facets["in_stock"] == [{"value": True, "count": 3}]
+
+    assert engine.search(brand="logitech")["product_ids"] == [6]
+    assert engine.search(brand="unknown")["total"] == 0
+    assert engine.search(product_ids=[3, 5, 99], in_stock_only=True)["product_ids"] == [3]
+
+    # Ghi sau khi index đã dựng: bitmap được lật tại chỗ
+    engine.apply({6: {"quantity": 0, "price": 120}}, set())
+    result = engine.search(price_band="100-200", facets=True)
+    assert result["product_ids"] == [6]
+    assert {"value": False, "count": 1} in result["facets"]["in_stock"]
+
+
+def test_category_subtree_filters():
+    engine = _catalog()
+    # Category 2 là con của 1: lọc theo cây con = truyền list id
+    assert engine.list_product_ids(desc=False, category_id=[1, 2]) == ([1, 2, 3, 4, 5], 5)
+    assert engine.list_product_ids(desc=False, category_id=[1, 2], in_stock_only=True) == ([1, 3, 4], 3)
+    assert engine.search(desc=False, category_id=[2, 9])["product_ids"] == [3, 5]
+
+    # Đổi tồn kho giữ đúng số đếm còn hàng đã cache theo cây con
+    engine.apply({5: {"quantity": 7}}, set())
+    assert engine.list_product_ids(category_id=[1, 2], in_stock_only=True)[1] == 4
+
+
+def test_fuzzy_search_waits_for_background_index():
+    engine = _catalog()
+    engine.enabled = True
+    # Chưa dựng index: không dựng trong request, caller tự dùng LIKE search
+    assert engine.fuzzy_search("keybord") is None and not engine.trigrams_ready
+
+    tag = engine.content_tag
+    engine.build_trigrams()
+    assert engine.trigrams_ready and engine.content_tag != tag
+    assert engine.fuzzy_search("keybord")[0][0] == 2
+
+    # Ghi sau khi dựng: cập nhật delta, không cần dựng lại
+    engine.apply({6: {"name": "Webcam", "price": 40, "category_id": 1, "sku": "SKU006"}}, {2})
+    assert engine.fuzzy_search("webcm")[0][0] == 6
+    assert all(pid != 2 for pid, _ in engine.fuzzy_search("keybord"))
+
+
+def _wait(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_first_load_builds_trigrams_in_background(app, seed):
+    engine = CatalogEngine()
+    engine.enabled, engine.app = True, app
+    with app.app_context():
+        engine.ensure_fresh()
+    assert engine.ready
+    _wait(lambda: engine.trigrams_ready)
+    assert engine.fuzzy_search("laptp 2")[0][0] == seed["product_ids"][1]
+
+
+def test_fuzzy_route_falls_back_to_like_search_until_index_ready(app, seed, monkeypatch):
+    from app.services import product_service
+
+    engine = CatalogEngine()
+    engine.enabled = True
+    with app.app_context():
+        from app.repositories import ProductRepository
+        engine.load(ProductRepository().iter_catalog_rows())
+    engine._next_reload = float("inf")  # không reload / không dựng index trong test
+    monkeypatch.setattr(product_service, "catalog", engine)
+
+    client = app.test_client()
+    body = client.get("/api/products/search?q=Laptop 3&fuzzy=true").json
+    assert body["fuzzy"] is False
+    assert [(p["sku"], p["similarity"]) for p in body["products"]] == [("SKU3", None)]
+
+    engine.build_trigrams()
+    body = client.get("/api/products/search?q=laptp 3&fuzzy=true").json
+    assert body["fuzzy"] is True and body["products"][0]["sku"] == "SKU3"
+
+
+def test_bulk_delete_products_removes_them_from_catalog(app, seed, monkeypatch):
+    from app.repositories import ProductRepository
+    from app.services import product_service
+    from app.services.product_service import ProductService
+
+    engine = CatalogEngine()
+    engine.enabled = True
+    with app.app_context():
+        engine.load(ProductRepository().iter_catalog_rows())
+        monkeypatch.setattr(product_service, "catalog", engine)
+        first, second, third = seed["product_ids"]
+
+        result = ProductService().bulk_delete_products([first, second])
+    assert result["success"] and result["deleted"] == 2
+    assert engine.list_product_ids() == ([third], 1)
@@ -0,0 +1,104 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services import catalog_export
+from app.services.catalog_export import EXPORT_FIELDS, encode, iter_csv, iter_gzip, parse_since
+
+ROWS = [
+    (i, f"SKU{i:03d}", f"Áo thun, size {i}", 'Mô tả "đặc biệt"\nxuống dòng', Decimal("19.90"), 3, "Thời trang",
+     i * 2, i, datetime(2024, 5, 1, 8, 30), datetime(2024, 6, 1, 9, 0, i))
+    for i in range(1, 8)
+]
+
+
+def dumps(obj):
+    return json.dumps(obj, default=str, ensure_ascii=False)
+
+
+def test_parse_since():
+    assert parse_since(None) is None
+    assert parse_since(" ") is None
+    assert parse_since("2024-05-01") == datetime(2024, 5, 1)
+    assert parse_since("2024-05-01T08:30:00") == datetime(2024, 5, 1, 8, 30)
+    # Có timezone -> đổi về UTC naive như updated_at trong DB
+    assert parse_since("2024-05-01T15:30:00+07:00") == datetime(2024, 5, 1, 8, 30)
+    assert parse_since("2024-05-01T08:30:00Z") == datetime(2024, 5, 1, 8, 30)
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
+
+
+def test_csv_roundtrip_with_quoting(monkeypatch):
+    monkeypatch.setattr(catalog_export, "ROWS_PER_CHUNK", 3)
+    chunks = list(iter_csv(iter(ROWS)))
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO("".join(chunks))))
+    assert parsed[0] == list(EXPORT_FIELDS)
+    assert parsed[1][2] == "Áo thun, size 1"
+    assert parsed[1][3] == 'Mô tả "đặc biệt"\nxuống dòng'
+    assert parsed[1][4] == "19.90"
+    assert parsed[1][-1] == "2024-06-01T09:00:01"
+    assert len(parsed) == len(ROWS) + 1
+
+
+def test_jsonl_one_object_per_product():
+    lines = "".join(encode(iter(ROWS), "jsonl", dumps)).splitlines()
+    first = json.loads(lines[0])
+    assert len(lines) == len(ROWS)
+    assert list(first) == list(EXPORT_FIELDS)
+    assert first["category_name"] == "Thời trang"
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_gzip_stream_matches_plain(fmt):
+    plain = "".join(encode(iter(ROWS), fmt, dumps))
+    compressed = b"".join(encode(iter(ROWS), fmt, dumps, gzip=True))
+    assert gzip.decompress(compressed).decode("utf-8") == plain
+
+
+def test_gzip_empty_input_is_valid_archive():
+    assert gzip.decompress(b"".join(iter_gzip(iter([])))) == b""
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode(iter(ROWS), "xml", dumps)
+
+
+def test_delta_cursor_overlaps_writes_committed_after_export_started(app, seed):
+    from datetime import timedelta
+
+    from app import db
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+    from app.services.catalog_export import CatalogExportService
+
+    with app.app_context():
+        service = CatalogExportService(lookback_seconds=60)
+        old = datetime.utcnow() - timedelta(hours=1)
+        db.session.execute(db.update(Product).values(updated_at=old))
+        db.session.execute(db.update(Inventory).values(updated_at=old))
+        db.session.commit()
+
+        started = service.product_repo.get_db_now()
+        started = datetime.fromisoformat(started) if isinstance(started, str) else started
+        cursor, chunks = service.start("jsonl", dumps=dumps)
+        assert cursor <= started - timedelta(seconds=60)
+        "".join(chunks)
+
+        # UPDATE chạy 10s trước khi export bắt đầu nhưng commit sau snapshot của export
+        late = seed["product_ids"][1]
+        db.session.execute(
+            db.update(Product).where(Product.id == late)
+            .values(name="Late", updated_at=started - timedelta(seconds=10))
+        )
+        db.session.commit()
+
+        _, chunks = service.start("jsonl", since=cursor, dumps=dumps)
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [(r["id"], r["name"]) for r in rows] == [(late, "Late")]
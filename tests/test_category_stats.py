@@ -0,0 +1,147 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.repositories import CategoryRepository, ProductRepository
+from app.services.category_stats import category_stats, count_deltas
+
+
+def test_create_and_delete_products():
+    # (category trước, tồn kho trước, category sau, tồn kho sau)
+    assert count_deltas([
+        (None, None, 1, 5),     # tạo, còn hàng
+        (None, None, 1, 0),     # tạo, hết hàng
+        (2, 3, None, None),     # xoá, đang còn hàng
+    ]) == {1: (2, 1), 2: (-1, -1)}
+
+
+def test_category_change_moves_both_counters():
+    assert count_deltas([(1, 4, 2, 4), (1, 0, 2, 0)]) == {1: (-2, -1), 2: (2, 1)}
+
+
+def test_only_stock_transitions_across_zero_count():
+    assert count_deltas([
+        (1, 5, 1, 0),   # bán hết
+        (1, 0, 1, 7),   # nhập lại
+        (2, 5, 2, 3),   # vẫn còn hàng -> không đổi
+        (3, None, 3, 2),  # inventory mới
+    ]) == {3: (0, 1)}
+
+
+# ========================================
+# Flush hook / bulk delete / reconcile / listing cache (SQLite qua fixture app)
+# ========================================
+
+def _counts(category_id):
+    db.session.expire_all()
+    category = db.session.get(Category, category_id)
+    return category.product_count, category.in_stock_count
+
+
+@pytest.fixture
+def product_selects(app):
+    """Đếm các câu SELECT đọc bảng products."""
+    statements = []
+    with app.app_context():
+        def record(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "products" in statement:
+                statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        yield statements
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_flush_hook_tracks_create_stock_and_category_changes(app, seed):
+    with app.app_context():
+        laptops = seed["category_id"]
+        assert _counts(laptops) == (3, 3)
+
+        phones = Category(name="Phones")
+        db.session.add(phones)
+        db.session.flush()
+        product = Product(sku="P1", name="Phone", price=5, category_id=phones.id)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, quantity=0))
+        db.session.commit()
+        assert _counts(phones.id) == (1, 0)
+
+        inventory = Inventory.query.filter_by(product_id=seed["product_ids"][0]).one()
+        inventory.quantity = 0
+        db.session.commit()
+        assert _counts(laptops) == (3, 2)
+
+        moved = db.session.get(Product, seed["product_ids"][1])
+        moved.category_id = phones.id
+        db.session.commit()
+        assert _counts(laptops) == (2, 1)
+        assert _counts(phones.id) == (2, 1)
+
+        db.session.delete(db.session.get(Product, seed["product_ids"][2]))
+        db.session.commit()
+        assert _counts(laptops) == (1, 0)
+
+
+def test_stock_change_without_zero_crossing_skips_lookup(app, seed, product_selects):
+    with app.app_context():
+        inventory = Inventory.query.filter_by(product_id=seed["product_ids"][0]).one()
+        product_selects.clear()
+        inventory.quantity = 4
+        db.session.commit()
+        assert product_selects == []
+        assert _counts(seed["category_id"]) == (3, 3)
+
+
+def test_bulk_delete_adjusts_counts(app, seed):
+    with app.app_context():
+        inventory = Inventory.query.filter_by(product_id=seed["product_ids"][0]).one()
+        inventory.quantity = 0
+        db.session.commit()
+
+        assert ProductRepository().bulk_delete(seed["product_ids"][:2]) == 2
+        assert _counts(seed["category_id"]) == (1, 1)
+
+
+def test_bulk_delete_refreshes_listing_in_process(app, seed):
+    with app.app_context():
+        category_stats.invalidate()
+        assert category_stats.listing()[0]["product_count"] == 3
+
+        # query.delete không qua flush -> hook do_orm_execute đánh dấu, commit làm mới listing
+        assert ProductRepository().bulk_delete(seed["product_ids"][:1]) == 1
+        assert category_stats.listing()[0]["product_count"] == 2
+
+
+def test_reconcile_fixes_drift_with_deltas(app, seed):
+    with app.app_context():
+        repo = CategoryRepository()
+        repo.adjust_counts({seed["category_id"]: (5, -2)})
+        db.session.commit()
+
+        assert repo.reconcile_counts() == 1
+        assert _counts(seed["category_id"]) == (3, 3)
+        assert repo.reconcile_counts() == 0
+
+
+def test_listing_cache_refreshes_after_commit_in_process(app, seed):
+    with app.app_context():
+        category_stats.invalidate()
+        first = category_stats.listing()
+        assert first[0]["product_count"] == 3
+        assert category_stats.listing() is first  # cache
+
+        # Ghi ngoài ORM (worker khác) -> bản cache giữ tới TTL
+        with db.engine.begin() as connection:
+            connection.execute(db.update(Category).values(product_count=99))
+        assert category_stats.listing() is first
+
+        # Commit trong process có đổi counter -> làm mới ngay
+        inventory = Inventory.query.filter_by(product_id=seed["product_ids"][0]).one()
+        inventory.quantity = 0
+        db.session.commit()
+        refreshed = category_stats.listing()
+        assert refreshed is not first
+        assert refreshed[0]["in_stock_count"] == 2
@@ -0,0 +1,112 @@
+import pytest
+
+from app.services.category_tree import build_tree, closure_rows, move_rows, rollup
+
+
+def test_closure_rows_include_self_and_all_ancestors():
+    # 1 Electronics > 2 Laptops > 3 Gaming; 4 Books
+    rows = set(closure_rows({1: None, 2: 1, 3: 2, 4: None}))
+    assert rows == {
+        (1, 1, 0), (2, 2, 0), (3, 3, 0), (4, 4, 0),
+        (1, 2, 1), (2, 3, 1), (1, 3, 2),
+    }
+
+
+def test_closure_rows_reject_cycles():
+    with pytest.raises(ValueError):
+        closure_rows({1: 2, 2: 1})
+
+
+def test_move_rows_is_cross_product_with_depths():
+    # Gắn cây con 2 > 3 dưới node 5 (con của 4)
+    rows = set(move_rows([(5, 0), (4, 1)], [(2, 0), (3, 1)]))
+    assert rows == {(5, 2, 1), (5, 3, 2), (4, 2, 2), (4, 3, 3)}
+
+    # Sau move, closure khớp với dựng lại từ đầu
+    kept = {(2, 2, 0), (3, 3, 0), (2, 3, 1), (4, 4, 0), (5, 5, 0), (4, 5, 1)}
+    assert kept | rows == set(closure_rows({4: None, 5: 4, 2: 5, 3: 2}))
+
+
+def test_build_tree_nests_children_sorted_by_name():
+    tree = build_tree([
+        {"id": 1, "name": "Electronics", "parent_id": None},
+        {"id": 3, "name": "Phones", "parent_id": 1},
+        {"id": 2, "name": "Laptops", "parent_id": 1},
+        {"id": 4, "name": "Gaming", "parent_id": 2},
+        {"id": 5, "name": "Books", "parent_id": None},
+    ])
+    assert [n["name"] for n in tree] == ["Books", "Electronics"]
+    electronics = tree[1]
+    assert [n["name"] for n in electronics["children"]] == ["Laptops", "Phones"]
+    assert electronics["children"][0]["children"][0]["id"] == 4
+
+
+def test_rollup_sums_counts_over_subtrees():
+    tree = rollup(build_tree([
+        {"id": 1, "name": "Electronics", "parent_id": None, "product_count": 1},
+        {"id": 2, "name": "Laptops", "parent_id": 1, "product_count": 4},
+        {"id": 3, "name": "Gaming", "parent_id": 2, "product_count": 2},
+    ]), ("product_count",))
+    assert tree[0]["total_product_count"] == 7
+    assert tree[0]["children"][0]["total_product_count"] == 6
+
+
+# ========================================
+# CategoryRepository + browse theo category (SQLite qua fixture app)
+# ========================================
+
+def _closure():
+    from app.models.category_closure import CategoryClosure
+
+    return {(r.ancestor_id, r.descendant_id, r.depth) for r in CategoryClosure.query.all()}
+
+
+def test_repository_create_move_delete_keep_closure_consistent(app):
+    from app.models.category import Category
+    from app.repositories import CategoryRepository
+
+    with app.app_context():
+        repo = CategoryRepository()
+        electronics = repo.create_category("Electronics").id
+        laptops = repo.create_category("Laptops", parent_id=electronics).id
+        gaming = repo.create_category("Gaming", parent_id=laptops).id
+        books = repo.create_category("Books").id
+
+        parents = lambda: dict((c.id, c.parent_id) for c in Category.query.all())
+        assert _closure() == set(closure_rows(parents()))
+        assert repo.get_subtree_ids(electronics) == tuple(sorted((electronics, laptops, gaming)))
+        assert [c.id for c in repo.get_ancestors(gaming)] == [electronics, laptops]
+
+        repo.move(laptops, books)
+        assert _closure() == set(closure_rows(parents()))
+        assert repo.get_subtree_ids(electronics) == (electronics,)
+        assert set(repo.get_subtree_ids(books)) == {books, laptops, gaming}
+
+        with pytest.raises(ValueError):
+            repo.move(books, gaming)  # vào chính cây con của nó
+        with pytest.raises(ValueError):
+            repo.delete_category(laptops)  # còn category con
+
+        assert repo.delete_category(gaming)
+        assert _closure() == set(closure_rows(parents()))
+
+
+def test_browse_without_closure_rows_uses_parent_ids(app, seed):
+    from app import db
+    from app.models.category import Category
+    from app.models.product import Product
+    from app.repositories import ProductRepository
+
+    with app.app_context():
+        # Category cũ tạo trước khi có closure table (chưa chạy rebuild-categories)
+        child = Category(name="Gaming", parent_id=seed["category_id"])
+        db.session.add(child)
+        db.session.flush()
+        db.session.add(Product(sku="G1", name="Gaming laptop", price=99, category_id=child.id))
+        db.session.commit()
+
+        repo = ProductRepository()
+        assert len(repo.get_by_category(seed["category_id"])) == 4
+        rows = repo.get_rows(["id"], category_id=seed["category_id"])
+        assert len(rows) == 4
+        assert len(repo.get_by_category(child.id)) == 1
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+from app import db
+from app.models.dashboard_counter import DashboardCounter
+from app.models.order import Order
+from app.repositories.counter_repository import CounterRepository
+from app.services.dashboard_metrics import DashboardMetricsService
+
+
+def test_increments_spread_over_slots_and_sum_on_read(app):
+    with app.app_context():
+        repo = CounterRepository(shards=4)
+        for _ in range(40):
+            repo.increment("orders", 1)
+        repo.increment("revenue:paid", Decimal("12.50"), slot=2)
+        repo.increment("revenue:paid", Decimal("7.50"), slot=2)
+        db.session.commit()
+
+        slots = {slot for (slot,) in db.session.query(DashboardCounter.slot).filter_by(name="orders")}
+        assert len(slots) > 1 and slots <= {0, 1, 2, 3}
+        assert repo.get_values(["orders", "revenue:paid"]) == {"orders": 40, "revenue:paid": Decimal("20")}
+
+
+def test_status_change_moves_count_and_revenue(app):
+    with app.app_context():
+        repo = CounterRepository()
+        repo.record_order_created("pending", Decimal("30"))
+        repo.record_order_status_change("pending", "paid", Decimal("30"))
+        repo.record_order_status_change("paid", "paid", Decimal("30"))  # không đổi -> no-op
+        db.session.commit()
+
+        values = repo.get_values()
+    assert values["orders"] == 1
+    assert values["orders:pending"] == 0 and values["orders:paid"] == 1
+    assert values["revenue:pending"] == 0 and values["revenue:paid"] == 30
+
+
+def _add_orders(seed, *statuses):
+    for status in statuses:
+        db.session.add(Order(user_id=seed["user_id"], total_amount=Decimal("10"), status=status))
+    db.session.commit()
+
+
+def test_summary_does_not_reconcile_inline(app, seed):
+    with app.app_context():
+        _add_orders(seed, "paid")
+        summary = DashboardMetricsService().get_summary()
+        assert summary["total_orders"] == 0
+        assert db.session.query(DashboardCounter).filter_by(name="orders").count() == 0
+
+
+def test_reconcile_applies_drift_as_delta(app, seed):
+    with app.app_context():
+        service = DashboardMetricsService()
+        _add_orders(seed, "paid", "paid", "pending")
+        # Counter lệch: thiếu 1 order paid, thừa 2 order cancelled
+        CounterRepository().increment_many({"orders": 2, "orders:paid": 1, "revenue:paid": 10, "orders:cancelled": 2})
+        db.session.commit()
+
+        assert service.reconcile() > 0
+        summary = service.get_summary()
+        assert summary["total_orders"] == 3
+        assert summary["orders_by_status"]["paid"] == 2
+        assert summary["orders_by_status"]["pending"] == 1
+        assert summary["orders_by_status"]["cancelled"] == 0
+        assert summary["total_revenue"] == 20
+        assert summary["total_users"] == 2 and summary["total_products"] == 3
+
+        # Đã khớp -> lần sau không sửa gì
+        assert service.reconcile() == 0
+
+
+def test_reconcile_keeps_increments_committed_after_it(app, seed):
+    with app.app_context():
+        service = DashboardMetricsService()
+        _add_orders(seed, "paid")
+        service.reconcile()
+
+        # Order mới commit cùng counter của nó sau lần reconcile -> reconcile tiếp không đổi gì
+        _add_orders(seed, "pending")
+        CounterRepository().record_order_created("pending", Decimal("10"))
+        db.session.commit()
+        assert service.reconcile() == 0
+        assert service.get_summary()["total_orders"] == 2
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, text
+
+from app.utils.db_routing import (
+    PIN_COOKIE, RoutingSession, db_router, prefer_replica, read_replica, use_primary,
+)
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+class Item(db.Model):
+    __tablename__ = "routing_items"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50))
+
+
+@read_replica
+def read_name(item_id=1):
+    return db.session.get(Item, item_id).name
+
+
+def make_app(tmp_path, replica=True, pin_seconds=5):
+    """2 file SQLite thay cho primary / replica: cùng id 1, khác name để biết query đi đâu."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY="test",
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={"replica": f"sqlite:///{tmp_path / 'replica.db'}"} if replica else {},
+        READ_YOUR_WRITES_SECONDS=pin_seconds,
+    )
+    db.init_app(app)
+    db_router.init_app(app)
+
+    with app.app_context():
+        for key in ([None, "replica"] if replica else [None]):
+            engine = db.engines[key]
+            Item.__table__.create(engine)
+            with engine.begin() as conn:
+                conn.execute(Item.__table__.insert().values(id=1, name="replica" if key else "primary"))
+
+    @app.get("/items/1")
+    def show():
+        prefer_replica()
+        return jsonify(name=db.session.get(Item, 1).name)
+
+    @app.post("/items")
+    def create():
+        db.session.add(Item(name="new"))
+        db.session.commit()
+        return jsonify(ok=True)
+
+    return app
+
+
+def test_default_reads_primary(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        assert db.session.get(Item, 1).name == "primary"
+
+
+def test_read_replica_and_use_primary(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        assert read_name() == "replica"
+    with app.app_context(), use_primary():
+        # Scope ngoài đã chọn primary -> read_replica không đổi
+        assert read_name() == "primary"
+
+
+def test_writes_pin_session_to_primary(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.session.add(Item(name="new"))
+        db.session.flush()
+        assert read_name() == "primary"
+        db.session.commit()
+        assert read_name() == "primary"
+    with app.app_context():
+        # Session mới (request khác) lại được đọc replica
+        assert read_name() == "replica"
+
+
+def test_select_for_update_goes_to_primary(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        @read_replica
+        def locked():
+            return db.session.execute(select(Item.name).where(Item.id == 1).with_for_update()).scalar()
+
+        assert locked() == "primary"
+
+
+def test_read_your_writes_cookie(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    assert client.get("/items/1").json["name"] == "replica"
+    assert not client.get_cookie(PIN_COOKIE)
+
+    client.post("/items")
+    assert client.get_cookie(PIN_COOKIE)
+    assert client.get("/items/1").json["name"] == "primary"
+
+    # Client khác không bị ghim
+    assert app.test_client().get("/items/1").json["name"] == "replica"
+
+
+def test_pin_expires(tmp_path):
+    app = make_app(tmp_path, pin_seconds=1)
+    client = app.test_client()
+    client.post("/items")
+    cookie = client.get_cookie(PIN_COOKIE).value
+    time.sleep(2.1)
+    client.set_cookie(PIN_COOKIE, cookie)
+    assert client.get("/items/1").json["name"] == "replica"
+
+
+@pytest.mark.parametrize("value", ["1", "1.abc.def"])
+def test_forged_pin_ignored(tmp_path, value):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    client.set_cookie(PIN_COOKIE, value)
+    assert client.get("/items/1").json["name"] == "replica"
+
+
+def test_without_replica_bind_everything_uses_primary(tmp_path):
+    app = make_app(tmp_path, replica=False)
+    with app.app_context():
+        assert read_name() == "primary"
+    response = app.test_client().post("/items")
+    assert PIN_COOKIE not in response.headers.get("Set-Cookie", "")
+    with app.app_context():
+        assert db.session.execute(text("select count(*) from routing_items")).scalar() == 2
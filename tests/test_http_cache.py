@@ -0,0 +1,243 @@
+import gzip
+from datetime import datetime
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.datastructures import Accept
+
+from app.services import catalog_version as catalog_version_module
+from app.services.catalog_version import catalog_version, conditional_catalog_get
+from app.utils.compression import Compressor, brotli, choose_encoding
+
+BIG = {"products": [{"id": i, "name": f"Sản phẩm {i}"} for i in range(200)]}
+
+
+def make_app(min_size=1024):
+    app = Flask(__name__)
+    Compressor(min_size=min_size).init_app(app)
+    calls = []
+
+    @app.route("/big")
+    def big():
+        return jsonify(BIG)
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/catalog/<int:product_id>")
+    @conditional_catalog_get(on_not_modified=lambda product_id: calls.append(("304", product_id)))
+    def product(product_id):
+        calls.append(("view", product_id))
+        if product_id == 404:
+            return jsonify({"error": "not found"}), 404
+        return jsonify({"id": product_id})
+
+    return app, calls
+
+
+@pytest.mark.parametrize("header, brotli_available, expected", [
+    ("gzip, deflate, br", True, "br"),
+    ("gzip, deflate, br", False, "gzip"),
+    ("gzip;q=1.0, br;q=0.5", True, "gzip"),
+    ("deflate", True, None),
+    ("identity", True, None),
+])
+def test_choose_encoding(header, brotli_available, expected):
+    values = [(v.split(";q=")[0].strip(), float(v.split(";q=")[1]) if ";q=" in v else 1) for v in header.split(",")]
+    assert choose_encoding(Accept(values), brotli_available) == expected
+
+
+def test_gzip_large_json_response():
+    app, _ = make_app()
+    response = app.test_client().get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert gzip.decompress(response.data) == app.test_client().get("/big").data
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli not installed")
+def test_brotli_preferred_when_available():
+    app, _ = make_app()
+    response = app.test_client().get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == app.test_client().get("/big").data
+
+
+def test_small_or_unaccepted_responses_untouched():
+    app, _ = make_app()
+    client = app.test_client()
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/big").headers
+
+
+@pytest.fixture
+def version(monkeypatch):
+    state = {"value": (7, datetime(2024, 5, 1, 8, 30))}
+    monkeypatch.setattr(catalog_version, "enabled", True)
+    monkeypatch.setattr(catalog_version, "current", lambda: state["value"])
+    monkeypatch.setattr(catalog_version_module, "_variant", lambda with_engine=True: ("", False))
+    return state
+
+
+def test_etag_and_304_without_running_view(version):
+    app, calls = make_app()
+    client = app.test_client()
+
+    first = client.get("/catalog/1")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag == 'W/"7"'
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/catalog/1", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert calls == [("view", 1), ("304", 1)]
+
+    # Dữ liệu đổi -> version mới -> ETag cũ không còn khớp
+    version["value"] = (8, datetime(2024, 5, 1, 9, 0))
+    changed = client.get("/catalog/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] == 'W/"8"'
+
+
+def test_if_modified_since(version):
+    app, _ = make_app()
+    client = app.test_client()
+    assert client.get("/catalog/1", headers={"If-Modified-Since": "Wed, 01 May 2024 08:30:00 GMT"}).status_code == 304
+    assert client.get("/catalog/1", headers={"If-Modified-Since": "Wed, 01 May 2024 08:29:59 GMT"}).status_code == 200
+
+
+def test_errors_are_not_tagged(version):
+    app, _ = make_app()
+    response = app.test_client().get("/catalog/404")
+    assert response.status_code == 404 and "ETag" not in response.headers
+
+
+def test_disabled_passes_through(monkeypatch):
+    monkeypatch.setattr(catalog_version, "enabled", False)
+    app, calls = make_app()
+    response = app.test_client().get("/catalog/1", headers={"If-None-Match": 'W/"7"'})
+    assert response.status_code == 200 and "ETag" not in response.headers
+
+
+# ========================================
+# Version theo listing / từng sản phẩm (SQLite qua fixture app)
+# ========================================
+
+@pytest.fixture
+def tracked(app, monkeypatch):
+    monkeypatch.setattr(catalog_version, "enabled", True)
+    catalog_version.invalidate()
+    catalog_version._products.clear()
+    hooks = [
+        ("after_flush", catalog_version_module._track_writes),
+        ("after_commit", catalog_version_module._bump_after_commit),
+        ("after_transaction_end", catalog_version_module._discard_flag),
+        ("do_orm_execute", catalog_version_module._track_bulk_writes),
+    ]
+    added = [(name, fn) for name, fn in hooks if not event.contains(Session, name, fn)]
+    for name, fn in added:
+        event.listen(Session, name, fn)
+    yield
+    for name, fn in added:
+        event.remove(Session, name, fn)
+
+
+def _versions(product_id):
+    return catalog_version.current()[0], catalog_version.product(product_id)[0]
+
+
+def test_stock_changes_bump_listing_only_when_crossing_zero(app, seed, tracked):
+    from app import db
+    from app.models.dashboard_counter import DashboardCounter
+    from app.models.inventory import Inventory
+    from app.models.product import Product
+
+    first, other = seed["product_ids"][:2]
+    with app.app_context():
+        inventory = Inventory.query.filter_by(product_id=first).one()
+        listing, tag = _versions(first)
+        other_tag = catalog_version.product(other)[0]
+        assert listing == 0
+
+        inventory.reserved_quantity = 2      # giữ hàng lúc checkout
+        db.session.commit()
+        assert _versions(first)[0] == 0 and _versions(first)[1] != tag
+        tag = _versions(first)[1]
+
+        inventory.quantity -= 5              # thanh toán, vẫn còn hàng
+        db.session.commit()
+        assert _versions(first)[0] == 0 and _versions(first)[1] != tag
+        assert catalog_version.product(other)[0] == other_tag
+        tag = _versions(first)[1]
+
+        inventory.quantity -= 5              # hết hàng -> listing / in_stock_only đổi
+        db.session.commit()
+        assert _versions(first)[0] == 1 and _versions(first)[1] != tag
+
+        db.session.get(Product, other).price = 99
+        db.session.commit()
+        assert _versions(other)[0] == 2 and _versions(other)[1] != other_tag
+
+        # Validator chi tiết không ghi row nào; listing version là các slot của catalog:version
+        assert {row.name for row in DashboardCounter.query.all()} == {"catalog:version"}
+
+
+def test_bulk_writes_bump_listing_through_session_hook(app, seed, tracked):
+    from app.repositories import CategoryRepository, ProductRepository
+
+    first, other = seed["product_ids"][:2]
+    with app.app_context():
+        assert catalog_version.product(first) is not None
+        assert catalog_version.current()[0] == 0
+
+        CategoryRepository().rebuild_closure()
+        assert catalog_version.current()[0] == 1
+
+        # query.delete không qua flush: bump listing + bỏ validator chi tiết đang cache
+        assert ProductRepository().bulk_delete([first]) == 1
+        assert catalog_version.current()[0] == 2
+        assert catalog_version.product(first) is None
+        assert catalog_version.product(other) is not None
+
+
+def test_listing_bumps_spread_over_slots(app, monkeypatch):
+    from app.models.dashboard_counter import DashboardCounter
+
+    monkeypatch.setattr(catalog_version, "shards", 4)
+    with app.app_context():
+        catalog_version.invalidate()
+        for _ in range(40):
+            catalog_version.bump()
+        assert catalog_version.current()[0] == 40
+        rows = DashboardCounter.query.filter_by(name="catalog:version").all()
+        assert 1 < len(rows) <= 4
+
+
+def test_product_detail_etag_ignores_other_products(app, seed, tracked):
+    from app import db
+    from app.models.inventory import Inventory
+    from app.repositories import ProductRepository
+
+    first, other = seed["product_ids"][:2]
+    client = app.test_client()
+    etag = client.get(f"/api/products/{first}").headers["ETag"]
+    assert etag.startswith('W/"p')
+
+    with app.app_context():
+        Inventory.query.filter_by(product_id=other).one().reserved_quantity = 1
+        db.session.commit()
+    assert client.get(f"/api/products/{first}", headers={"If-None-Match": etag}).status_code == 304
+
+    with app.app_context():
+        Inventory.query.filter_by(product_id=first).one().reserved_quantity = 1
+        db.session.commit()
+    response = client.get(f"/api/products/{first}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json["product"]["reserved_stock"] == 1
+
+    with app.app_context():
+        ProductRepository().delete_product(first)
+    response = client.get(f"/api/products/{first}", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 404 and "ETag" not in response.headers
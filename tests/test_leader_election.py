@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.job_run import JobRun
+from app.models.scheduler_lease import SchedulerLease
+from app.tasks.leader_election import DatabaseLease, FileLease, LeaderElector
+
+
+def _lease(app):
+    with app.app_context():
+        lease = db.session.get(SchedulerLease, "scheduler")
+        return (lease.owner, lease.expires_at) if lease else None
+
+
+def _expire_lease(app):
+    with app.app_context():
+        db.session.get(SchedulerLease, "scheduler").expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+
+def test_database_lease_acquire_renew_expire(app):
+    a = DatabaseLease(app, "a", lease_seconds=30)
+    b = DatabaseLease(app, "b", lease_seconds=30)
+
+    assert a.acquire() is True
+    owner, first_expiry = _lease(app)
+    assert owner == "a"
+    assert b.acquire() is False
+
+    # Gia hạn lease của chính mình
+    assert a.acquire() is True
+    assert _lease(app)[1] >= first_expiry
+
+    # Lease hết hạn (a chết, không heartbeat) -> b giành được, a mất quyền
+    _expire_lease(app)
+    assert b.acquire() is True
+    assert _lease(app)[0] == "b"
+    assert a.acquire() is False
+
+
+def test_database_lease_release_hands_over_immediately(app):
+    a = DatabaseLease(app, "a", lease_seconds=30)
+    b = DatabaseLease(app, "b", lease_seconds=30)
+    assert a.acquire()
+    a.release()
+    assert b.acquire() is True
+
+
+def test_file_lease_is_exclusive(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    a, b = FileLease(path), FileLease(path)
+    assert a.acquire() is True
+    assert a.acquire() is True  # đã giữ lock
+    assert b.acquire() is False
+    a.release()
+    assert b.acquire() is True
+    b.release()
+
+
+def test_failover_runs_elected_callbacks_once(app):
+    elected = []
+    a = LeaderElector(app, owner="a", lease_seconds=30)
+    b = LeaderElector(app, owner="b", lease_seconds=30)
+    for elector in (a, b):
+        elector.on_elected("recovery", lambda owner=elector.owner: elected.append(owner))
+
+    assert a.heartbeat() is True and a.is_leader
+    assert a.heartbeat() is True  # gia hạn, không gọi lại callback
+    assert b.heartbeat() is False and not b.is_leader
+    assert elected == ["a"]
+
+    _expire_lease(app)
+    assert b.heartbeat() is True
+    assert a.heartbeat() is False and not a.is_leader
+    assert elected == ["a", "b"]
+
+
+def test_run_as_leader_skips_on_followers_and_records_runs(app):
+    calls = []
+    a = LeaderElector(app, owner="a", lease_seconds=30)
+    b = LeaderElector(app, owner="b", lease_seconds=30)
+    a.heartbeat()
+    b.heartbeat()
+
+    def job():
+        calls.append(1)
+        return 7
+
+    assert b.run_as_leader("job", job)() is None
+    assert calls == []
+
+    assert a.run_as_leader("job", job)() == 7
+    assert calls == [1]
+
+    def broken():
+        raise RuntimeError("boom")
+
+    a.run_as_leader("broken", broken)()
+
+    with app.app_context():
+        runs = {r.job_id: r for r in JobRun.query.all()}
+    assert set(runs) == {"job", "broken"}
+    assert runs["job"].owner == "a" and runs["job"].status == "success" and runs["job"].rows_processed == 7
+    assert runs["broken"].status == "error" and "boom" in runs["broken"].error
+
+
+@pytest.mark.parametrize("backend", ["db", "file"])
+def test_release_clears_leadership(app, tmp_path, backend):
+    app.config["SCHEDULER_LOCK_FILE"] = str(tmp_path / "scheduler.lock")
+    a = LeaderElector(app, backend=backend, owner="a", lease_seconds=30)
+    b = LeaderElector(app, backend=backend, owner="b", lease_seconds=30)
+    assert a.heartbeat()
+    assert not b.heartbeat()
+    a.release()
+    assert not a.is_leader
+    assert b.heartbeat()
+    b.release()
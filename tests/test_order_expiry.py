@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta
+
+from app.tasks.order_expiry import OrderExpiryScheduler
+
+
+def test_pop_due_skips_discarded_and_rescheduled_orders():
+    timer = OrderExpiryScheduler(timeout_seconds=60)
+    timer._running = True  # không start thread, chỉ test heap
+
+    timer.schedule_at(1, 100)
+    timer.schedule_at(2, 110)
+    timer.schedule_at(3, 120)
+    timer.discard(2)
+    timer.schedule_at(3, 500)  # gia hạn deadline
+
+    assert timer.pop_due(now=200) == [1]
+    assert len(timer) == 1
+    assert timer.pop_due(now=500) == [3]
+
+
+def test_expired_orders_are_cancelled_close_to_deadline():
+    expired = []
+    timer = OrderExpiryScheduler(timeout_seconds=1, on_expire=expired.append)
+    timer.start()
+    try:
+        # Order tạo 0.8s trước -> hết hạn sau ~0.2s
+        timer.schedule(42, datetime.utcnow() - timedelta(seconds=0.8))
+        timer.schedule(43)
+        timer.discard(43)
+
+        deadline = time.time() + 2
+        while not expired and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        timer.stop()
+
+    assert expired == [42]
+
+
+def test_schedule_is_noop_when_timer_not_started():
+    timer = OrderExpiryScheduler()
+    assert timer.schedule(1) is False
+    assert len(timer) == 0
+
+
+def _pending_order(seed, age_seconds, quantity=2):
+    from app import db
+    from app.models.inventory import Inventory
+    from app.models.order import Order
+    from app.models.order_item import OrderItem
+
+    product_id = seed["product_ids"][0]
+    order = Order(user_id=seed["user_id"], total_amount=10 * quantity,
+                  created_at=datetime.utcnow() - timedelta(seconds=age_seconds))
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(OrderItem(order_id=order.id, product_id=product_id, unit_price=10, quantity=quantity))
+    Inventory.query.filter_by(product_id=product_id).first().reserved_quantity += quantity
+    db.session.commit()
+    return order.id
+
+
+def test_sweep_cancels_overdue_orders_of_any_worker(app, seed):
+    from app import db
+    from app.models.inventory import Inventory
+    from app.models.order import Order
+
+    timer = OrderExpiryScheduler(timeout_seconds=60)
+    timer.init_app(app)
+    with app.app_context():
+        # Order do worker đã chết tạo: không nằm trong heap của process nào
+        overdue = _pending_order(seed, age_seconds=120)
+        fresh = _pending_order(seed, age_seconds=5)
+
+        assert timer.sweep() == 1
+        db.session.expire_all()
+        assert db.session.get(Order, overdue).status == "cancelled"
+        assert db.session.get(Order, fresh).status == "pending"
+        # Stock reserve của order bị huỷ đã được trả lại
+        assert Inventory.query.filter_by(product_id=seed["product_ids"][0]).first().reserved_quantity == 2
+
+        # Chạy lại: order đã huỷ không bị xử lý lần nữa
+        assert timer.sweep() == 0
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from app.services.password_hasher import HasherBusyError, PasswordHasher, password_hasher
+
+METHOD = "pbkdf2:sha256:1000"
+
+
+@pytest.fixture
+def pooled():
+    hasher = PasswordHasher(workers=1, max_pending=1, method=METHOD, timeout=30)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_pool_hash_and_verify(pooled):
+    hashed = pooled.hash("secret")
+    assert hashed.startswith(METHOD + "$")
+    assert pooled.verify(hashed, "secret")
+    assert not pooled.verify(hashed, "wrong")
+
+
+def test_timed_out_job_keeps_its_slot_until_done(pooled):
+    pooled.hash("warm up")  # spawn process trước để timeout chỉ do job chậm
+    pooled.timeout = 0.05
+    with pytest.raises(HasherBusyError):
+        pooled._submit(time.sleep, 1)
+    # Job vẫn chạy trong pool -> slot chưa được trả, request sau bị từ chối ngay
+    assert not pooled._slots.acquire(blocking=False)
+
+    deadline = time.monotonic() + 10
+    while not pooled._slots.acquire(blocking=False):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    pooled._slots.release()
+    pooled.timeout = 30
+    assert pooled.verify(pooled.hash("pw"), "pw")
+
+
+def test_needs_rehash_uses_prefix_from_init_app(app):
+    assert password_hasher._method_prefix == METHOD
+    assert not password_hasher.needs_rehash(password_hasher.hash("pw"))
+    assert password_hasher.needs_rehash("scrypt:32768:8:1$salt$hash")
+    assert not PasswordHasher(method=METHOD).needs_rehash("scrypt:32768:8:1$salt$hash")
+
+
+def _login(client, password="pw"):
+    return client.post("/auth/login", json={"email": "b@b", "password": password})
+
+
+def test_login_returns_429_with_retry_after_when_saturated(app, seed):
+    password_hasher.configure(0, 0, METHOD, 10, 3)
+    response = _login(app.test_client())
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_login_rehashes_outdated_hash_once(app, seed):
+    from app import db
+    from app.models.user import User
+
+    with app.app_context():
+        old_hash = db.session.get(User, seed["user_id"]).password_hash
+    assert not old_hash.startswith(METHOD + "$")  # seed dùng method mặc định của werkzeug
+
+    client = app.test_client()
+    assert _login(client, "wrong").status_code == 401
+    assert _login(client).status_code == 200
+    with app.app_context():
+        new_hash = db.session.get(User, seed["user_id"]).password_hash
+    assert new_hash.startswith(METHOD + "$")
+
+    assert _login(client).status_code == 200
+    with app.app_context():
+        assert db.session.get(User, seed["user_id"]).password_hash == new_hash
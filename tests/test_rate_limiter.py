@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from app.utils.rate_limiter import RateLimiter, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60)
+    assert parse_rate("20/30s") == (20, 30)
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+
+def test_limit_allows_burst_then_rejects_with_retry_after():
+    limiter = RateLimiter(slots=1024)
+    now = 1000.0
+
+    results = [limiter.hit("login:ip:1.2.3.4", 5, 60, now=now) for _ in range(6)]
+
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False]
+    assert results[-1][1] == pytest.approx(12.0)
+    # Sau 1 emission interval (60/5 = 12s) được thêm 1 request
+    assert limiter.hit("login:ip:1.2.3.4", 5, 60, now=now + 12)[0] is True
+    # Key khác không bị ảnh hưởng
+    assert limiter.hit("login:ip:5.6.7.8", 5, 60, now=now)[0] is True
+
+
+def test_shared_mode_is_visible_across_instances(tmp_path):
+    path = str(tmp_path / "ratelimit")
+    worker_a = RateLimiter(slots=1024, shared_path=path)
+    worker_b = RateLimiter(slots=1024, shared_path=path)
+
+    assert worker_a.hit("order:user:7", 2, 60, now=0)[0] is True
+    assert worker_b.hit("order:user:7", 2, 60, now=0)[0] is True
+    assert worker_a.hit("order:user:7", 2, 60, now=0)[0] is False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="cần /proc để đếm fd đang mở")
+def test_init_app_releases_previous_table(tmp_path):
+    from flask import Flask
+
+    limiter = RateLimiter()
+    assert limiter._buf is None  # singleton chưa init_app -> chưa cấp phát
+
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_SLOTS=1024, RATE_LIMIT_SHARED_PATH=str(tmp_path / "ratelimit"))
+    limiter.init_app(app)
+    old_buf = limiter._buf
+    assert limiter.hit("login:ip:1.2.3.4", 1, 60, now=0)[0] is True
+
+    open_fds = len(os.listdir("/proc/self/fd"))
+    for _ in range(3):
+        limiter.init_app(app)
+    assert old_buf.closed
+    assert len(os.listdir("/proc/self/fd")) == open_fds
+    # File dùng chung vẫn giữ trạng thái qua lần cấu hình lại
+    assert limiter.hit("login:ip:1.2.3.4", 1, 60, now=0)[0] is False
+
+    fd = limiter._fd
+    limiter.close()
+    with pytest.raises(OSError):
+        os.fstat(fd)
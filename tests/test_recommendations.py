@@ -0,0 +1,102 @@
+import numpy as np
+
+from app.services.recommendation_service import basket_pairs, merge_counts, top_k_neighbours
+
+
+def _decode(keys, counts):
+    return {(int(k >> 32), int(k & 0xFFFFFFFF)): int(c) for k, c in zip(keys, counts)}
+
+
+def test_basket_pairs_counts_each_order_once():
+    # order 1: {1, 2, 3} (sản phẩm 2 mua 2 dòng), order 2: {2, 3}, order 3: {3}
+    orders = [1, 1, 1, 1, 2, 2, 3]
+    products = [1, 2, 2, 3, 3, 2, 3]
+
+    counts = _decode(*basket_pairs(orders, products))
+
+    assert counts == {
+        (1, 1): 1, (2, 2): 2, (3, 3): 3,
+        (1, 2): 1, (1, 3): 1, (2, 3): 2,
+    }
+
+
+def test_large_baskets_only_count_support():
+    counts = _decode(*basket_pairs([1, 1, 1], [5, 6, 7], max_basket=2))
+
+    assert counts == {(5, 5): 1, (6, 6): 1, (7, 7): 1}
+
+
+def test_merge_counts_adds_overlapping_keys():
+    keys_a, counts_a = basket_pairs([1, 1], [1, 2])
+    keys_b, counts_b = basket_pairs([2, 2], [1, 2])
+
+    assert _decode(*merge_counts(keys_a, counts_a, keys_b, counts_b)) == {(1, 1): 2, (2, 2): 2, (1, 2): 2}
+
+
+def test_top_k_neighbours_ranks_by_cosine():
+    orders = [1, 1, 2, 2, 3, 3, 4, 4, 5]
+    products = [1, 2, 1, 2, 1, 3, 1, 3, 3]
+    keys, counts = basket_pairs(orders, products)
+
+    src, rank, dst, score, pair_count = top_k_neighbours(keys, counts, k=1, min_count=1)
+
+    assert list(zip(src.tolist(), rank.tolist(), dst.tolist())) == [(1, 0, 2), (2, 0, 1), (3, 0, 1)]
+    assert np.isclose(score[0], 2 / np.sqrt(4 * 2))
+    assert pair_count.tolist() == [2, 2, 2]
+
+
+# ========================================
+# Incremental update (SQLite qua fixture app)
+# ========================================
+
+def _related_rows():
+    from app.models.product_pair import RelatedProduct
+
+    return sorted(
+        (row.product_id, row.rank, row.related_id, round(row.score, 6), row.pair_count)
+        for row in RelatedProduct.query.all()
+    )
+
+
+def test_update_refreshes_partners_of_touched_products(app, seed):
+    from datetime import datetime, timedelta
+
+    from app import db
+    from app.models.order import Order, OrderItem
+    from app.services.recommendation_service import RecommendationService
+
+    a, b, c = seed["product_ids"]
+
+    def paid(products, paid_at):
+        order = Order(user_id=seed["user_id"], total_amount=0, status="paid", paid_at=paid_at)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all(OrderItem(order_id=order.id, product_id=p, unit_price=1, quantity=1) for p in products)
+
+    with app.app_context():
+        old = datetime.utcnow() - timedelta(hours=2)
+        for products in ([a, b], [a, b], [b, c], [b, c]):
+            paid(products, old)
+        db.session.commit()
+        RecommendationService(min_count=1, lag_seconds=3600).rebuild()
+        before = dict((row[0], row[3]) for row in _related_rows() if row[0] == a)
+
+        # Chỉ support của b đổi -> điểm a -> b cũng đổi dù a không có trong batch mới
+        for _ in range(3):
+            paid([b], datetime.utcnow() - timedelta(minutes=30))
+        db.session.commit()
+        assert RecommendationService(min_count=1, lag_seconds=0).update() == 3
+        incremental = _related_rows()
+        assert dict((row[0], row[3]) for row in incremental if row[0] == a) != before
+
+        RecommendationService(min_count=1, lag_seconds=0).rebuild()
+        assert incremental == _related_rows()
+
+
+def test_lift_update_runs_full_rebuild(app, monkeypatch):
+    from app.services.recommendation_service import RecommendationService
+
+    with app.app_context():
+        service = RecommendationService(score='lift')
+        monkeypatch.setattr(service, "rebuild", lambda: "rebuilt")
+        assert service.update() == "rebuilt"
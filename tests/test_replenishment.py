@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.services.replenishment_service import compute_replenishment
+
+
+def test_exponential_smoothing_matches_recursive_definition():
+    rng = np.random.default_rng(7)
+    sales = rng.poisson(3, size=(5, 60)).astype(np.float32)
+    alpha = 0.3
+
+    result = compute_replenishment(sales, np.zeros(5), alpha=alpha)
+
+    for row, forecast in zip(sales, result["forecast"]):
+        level = row[:7].mean()
+        for x in row:
+            level = alpha * x + (1 - alpha) * level
+        assert abs(level - forecast) < 1e-3
+
+
+def test_reorder_point_and_quantity():
+    sales = np.tile(np.float32(2), (1, 30))  # nhu cầu ổn định 2/ngày -> std = 0
+    result = compute_replenishment(sales, np.array([10]), lead_time_days=7, review_days=14)
+
+    assert result["reorder_point"][0] == 14
+    assert result["needs_reorder"][0]
+    assert result["reorder_quantity"][0] == 14 + 28 - 10
+    assert result["days_of_cover"][0] == 5
+
+
+def test_no_demand_never_needs_reorder():
+    result = compute_replenishment(np.zeros((3, 30)), np.array([0, 5, 100]))
+
+    assert not result["needs_reorder"].any()
+    assert result["reorder_quantity"].tolist() == [0, 0, 0]
+    assert np.isnan(result["days_of_cover"]).all()
@@ -0,0 +1,21 @@
+import pytest
+
+from app.models.product import Product
+from app.utils.request_params import parse_id_list
+
+
+def test_parse_id_list_dedupes_and_keeps_order():
+    assert parse_id_list(None) is None
+    assert parse_id_list("3, 1,3,,2") == [3, 1, 2]
+    for raw in ("1,x", "0", "-1", ",", ",".join(str(i) for i in range(1, 102))):
+        with pytest.raises(ValueError):
+            parse_id_list(raw)
+
+
+def test_parse_fields_always_includes_id():
+    assert Product.parse_fields(None) is None
+    assert Product.parse_fields("") is None
+    assert Product.parse_fields("name, price,name") == ("id", "name", "price")
+    assert Product.parse_fields("stock") == ("id", "stock")
+    with pytest.raises(ValueError):
+        Product.parse_fields("name,password_hash")
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func
+
+from app.services.sales_analytics import _moving_average, _resample
+
+
+def test_moving_average_uses_partial_window_at_start():
+    values = np.array([2.0, 4.0, 6.0, 8.0])
+
+    assert _moving_average(values, 2).tolist() == [2.0, 3.0, 5.0, 7.0]
+    assert _moving_average(values, 10).tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_resample_weeks_start_on_monday():
+    axis = np.arange(np.datetime64('2025-01-01'), np.datetime64('2025-01-15'))  # thứ 4 -> thứ 3
+    units = np.ones(len(axis), dtype=np.int64)
+    revenue = np.full(len(axis), 2.5)
+
+    labels, weekly_units, weekly_revenue = _resample(axis, units, revenue, 'week')
+
+    assert [str(label) for label in labels] == ['2024-12-30', '2025-01-06', '2025-01-13']
+    assert weekly_units.tolist() == [5, 7, 2]
+    assert weekly_revenue.tolist() == [12.5, 17.5, 5.0]
+
+
+def test_resample_months():
+    axis = np.arange(np.datetime64('2025-01-30'), np.datetime64('2025-02-03'))
+    labels, units, _ = _resample(axis, np.arange(len(axis)), np.zeros(len(axis)), 'month')
+
+    assert [str(label) for label in labels] == ['2025-01', '2025-02']
+    assert units.tolist() == [0 + 1, 2 + 3]
+
+
+def _rollup_totals():
+    from app import db
+    from app.models.sales_rollup import SalesDaily, SalesHourly
+
+    return [
+        db.session.query(func.coalesce(func.sum(model.units), 0), func.coalesce(func.sum(model.revenue), 0)).one()
+        for model in (SalesDaily, SalesHourly)
+    ]
+
+
+def test_status_transitions_record_and_reverse_rollups(app, seed):
+    from app import db
+    from app.models.order import Order, OrderItem
+    from app.repositories import OrderRepository, SalesRollupRepository
+
+    with app.app_context():
+        order = Order(user_id=seed["user_id"], total_amount=30)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=seed["product_ids"][0], unit_price=10, quantity=3))
+        db.session.commit()
+        repo = OrderRepository()
+
+        repo.update_status(order.id, "paid")
+        db.session.commit()
+        assert [tuple(map(int, t)) for t in _rollup_totals()] == [(3, 30), (3, 30)]
+
+        repo.update_status(order.id, "shipped")  # vẫn là doanh thu -> không đổi
+        db.session.commit()
+        assert [tuple(map(int, t)) for t in _rollup_totals()] == [(3, 30), (3, 30)]
+
+        day = datetime.combine(db.session.get(Order, order.id).paid_at.date(), datetime.min.time())
+        assert SalesRollupRepository().rebuild(day, day + timedelta(days=1)) == 1
+        assert [tuple(map(int, t)) for t in _rollup_totals()] == [(3, 30), (3, 30)]
+
+        repo.update_status(order.id, "cancelled")
+        db.session.commit()
+        assert [tuple(map(int, t)) for t in _rollup_totals()] == [(0, 0), (0, 0)]
+
+        # Backfill cho cùng kết quả với đường incremental
+        assert SalesRollupRepository().rebuild(day, day + timedelta(days=1)) == 0
+        assert [tuple(map(int, t)) for t in _rollup_totals()] == [(0, 0), (0, 0)]
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from app.utils.serialization import FastJSONProvider, encode_default, msgpack, orjson
+
+PAYLOAD = {"id": 1, "price": Decimal("19.90"), "created_at": datetime(2024, 5, 1, 8, 30), "name": "Chuột"}
+EXPECTED = {"id": 1, "price": 19.9, "created_at": "2024-05-01T08:30:00", "name": "Chuột"}
+
+
+def make_app(encoder="auto", msgpack_enabled=True):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, encoder=encoder, msgpack_enabled=msgpack_enabled)
+
+    @app.route("/p")
+    def product():
+        return jsonify(PAYLOAD)
+
+    return app
+
+
+def test_encode_default_matches_to_dict_conventions():
+    assert encode_default(Decimal("10.50")) == 10.5
+    assert encode_default(datetime(2024, 1, 2, 3, 4, 5)) == "2024-01-02T03:04:05"
+    assert sorted(encode_default({2, 1})) == [1, 2]
+    with pytest.raises(TypeError):
+        encode_default(object())
+
+
+@pytest.mark.parametrize("encoder", ["auto", "stdlib"])
+def test_json_output_same_across_encoders(encoder):
+    response = make_app(encoder).test_client().get("/p")
+    assert response.mimetype == "application/json"
+    assert json.loads(response.data) == EXPECTED
+
+
+def test_orjson_without_package_is_config_error(monkeypatch):
+    monkeypatch.setattr("app.utils.serialization.orjson", None)
+    with pytest.raises(RuntimeError):
+        make_app("orjson")
+
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+def test_msgpack_negotiated_by_accept_header():
+    client = make_app().test_client()
+    response = client.get("/p", headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data) == EXPECTED
+    assert "Accept" in response.vary
+
+    # Trình duyệt / client mặc định vẫn nhận JSON
+    assert client.get("/p", headers={"Accept": "*/*"}).mimetype == "application/json"
+
+
+def test_msgpack_disabled_falls_back_to_json():
+    client = make_app(msgpack_enabled=False).test_client()
+    response = client.get("/p", headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/json"
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson not installed")
+def test_dumps_uses_orjson_and_honours_kwargs():
+    app = make_app()
+    assert json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+    assert app.json.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a": 2, "b": 1}'
+
+
+def test_active_encoder_logged_at_startup(caplog, monkeypatch):
+    with caplog.at_level("INFO", logger="app.utils.serialization"):
+        make_app("stdlib", msgpack_enabled=False)
+    assert "JSON provider: stdlib json, msgpack off" in caplog.text
+
+    import app.utils.serialization as serialization
+    monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(serialization, "msgpack", None)
+    assert make_app().json.describe() == "stdlib json (orjson not installed), msgpack off (not installed)"
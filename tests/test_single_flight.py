@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+N = 20
+
+
+def _run_concurrently(flight, key, fn):
+    """N thread cùng gọi do(key, fn)."""
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(N)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results, errors
+
+
+def _blocking(flight, value=None, error=None):
+    """fn của leader chỉ trả khi N - 1 thread còn lại đã vào hàng đợi."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        for _ in range(500):
+            if flight.coalesced >= N - 1:
+                break
+            time.sleep(0.01)
+        if error:
+            raise error
+        return value
+
+    return fn, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    fn, calls = _blocking(flight, value={"id": 1})
+    results, errors = _run_concurrently(flight, ("product", 1), fn)
+
+    assert not errors
+    assert len(results) == N and all(r == {"id": 1} for r in results)
+    assert len(calls) == flight.executed == 1
+    assert flight.coalesced == N - 1
+    assert flight.in_flight() == 0
+
+
+def test_error_propagates_to_all_waiters():
+    flight = SingleFlight()
+    fn, calls = _blocking(flight, error=RuntimeError("db down"))
+    results, errors = _run_concurrently(flight, "k", fn)
+
+    assert not results
+    assert len(errors) == N and all(str(e) == "db down" for e in errors)
+    assert len(calls) == flight.executed == 1
+
+
+def test_no_caching_between_sequential_calls():
+    flight = SingleFlight()
+    counter = iter(range(10))
+    assert flight.do("k", lambda: next(counter)) == 0
+    assert flight.do("k", lambda: next(counter)) == 1
+    assert flight.executed == 2 and flight.coalesced == 0
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    assert flight.do(1, lambda: "a") == "a"
+    assert flight.do(2, lambda: "b") == "b"
+
+
+def test_waiter_times_out_and_runs_itself():
+    flight = SingleFlight(timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return "slow"
+
+    leader = threading.Thread(target=lambda: flight.do("k", slow))
+    leader.start()
+    started.wait(1)
+    try:
+        assert flight.do("k", lambda: "fallback") == "fallback"
+    finally:
+        release.set()
+        leader.join(2)
+
+
+@pytest.mark.parametrize("exc", [ValueError, KeyError])
+def test_leader_exception_is_raised(exc):
+    flight = SingleFlight()
+
+    def fail():
+        raise exc("x")
+
+    with pytest.raises(exc):
+        flight.do("k", fail)
+    assert flight.in_flight() == 0
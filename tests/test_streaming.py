@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from flask import Flask
+
+from app.utils import streaming
+from app.utils.streaming import iter_json_object, iter_ndjson, stream_mode
+
+ITEMS = [{"id": i, "name": f"Sản phẩm {i}"} for i in range(1, 6)]
+
+
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def test_ndjson_one_item_per_line():
+    body = "".join(iter_ndjson(iter(ITEMS), dumps))
+    assert [json.loads(line) for line in body.splitlines()] == ITEMS
+
+
+def test_json_object_same_shape_as_buffered_response():
+    body = "".join(iter_json_object(iter(ITEMS), dumps, meta={"success": True, "threshold": 10}))
+    assert json.loads(body) == {"success": True, "threshold": 10, "products": ITEMS, "count": 5}
+
+
+def test_json_object_empty():
+    assert json.loads("".join(iter_json_object(iter([]), dumps))) == {"products": [], "count": 0}
+
+
+def test_head_sent_before_items_are_consumed():
+    def items():
+        raise AssertionError("query must not run before the first chunk is sent")
+        yield
+
+    assert next(iter_json_object(items(), dumps, key="rows")) == '{"rows":['
+
+
+def test_items_batched_into_chunks(monkeypatch):
+    monkeypatch.setattr(streaming, "CHUNK_SIZE", 40)
+    chunks = list(iter_ndjson(iter(ITEMS), dumps))
+    assert 1 < len(chunks) < len(ITEMS)
+    assert "".join(chunks).count("\n") == len(ITEMS)
+
+
+@pytest.mark.parametrize("query, accept, expected", [
+    ("", None, None),
+    ("?stream=ndjson", None, "ndjson"),
+    ("?stream=JSON", None, "json"),
+    ("", "application/x-ndjson", "ndjson"),
+    ("", "application/json, application/x-ndjson;q=0.5", None),
+    ("?stream=json", "application/x-ndjson", "json"),
+])
+def test_stream_mode(query, accept, expected):
+    headers = {"Accept": accept} if accept else {}
+    with Flask(__name__).test_request_context(f"/p{query}", headers=headers):
+        assert stream_mode() == expected
+
+
+def test_stream_mode_rejects_unknown():
+    with Flask(__name__).test_request_context("/p?stream=csv"):
+        with pytest.raises(ValueError):
+            stream_mode()
@@ -0,0 +1,104 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.services.token_blocklist import BloomFilter, TokenBlocklist
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    jtis = [str(uuid.uuid4()) for _ in range(1000)]
+    for jti in jtis:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in jtis)
+
+
+def test_bloom_filter_false_positive_rate_is_bounded():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for _ in range(1000):
+        bloom.add(str(uuid.uuid4()))
+
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+# ========================================
+# TokenBlocklist (SQLite qua fixture app)
+# ========================================
+
+def _insert(jti, revoked_at=None, expires_in=3600, row_id=None):
+    db.session.add(RevokedToken(
+        id=row_id, jti=jti, token_type="access",
+        revoked_at=revoked_at or datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(seconds=expires_in),
+    ))
+    db.session.commit()
+
+
+def test_revoke_is_visible_locally_and_to_other_workers(app):
+    worker_a, worker_b = TokenBlocklist(refresh_seconds=0), TokenBlocklist(refresh_seconds=0)
+    with app.app_context():
+        worker_b.is_revoked("warm-up")  # load lần đầu
+
+        worker_a.revoke("jti-1", "access", time.time() + 3600, user_id=1)
+        assert worker_a.is_revoked("jti-1")
+        assert worker_b.is_revoked("jti-1")  # đọc từ DB ở lần refresh kế tiếp
+        assert not worker_b.is_revoked("jti-2")
+
+        # Revoke lần 2 cùng jti không lỗi
+        worker_a.revoke("jti-1", "access", time.time() + 3600)
+        assert RevokedToken.query.count() == 1
+
+
+def test_refresh_picks_up_rows_committed_out_of_id_order(app):
+    worker = TokenBlocklist(refresh_seconds=0)
+    with app.app_context():
+        statement_time = datetime.utcnow()
+        _insert("late-high-id", row_id=10)
+        worker.is_revoked("x")
+
+        # id nhỏ hơn, revoked_at gán trước lần refresh, nhưng commit sau lần refresh đó
+        _insert("early-low-id", revoked_at=statement_time, row_id=5)
+        assert worker.is_revoked("late-high-id")
+        assert worker.is_revoked("early-low-id")
+
+
+def test_expired_revocations_are_ignored_and_pruned(app):
+    worker = TokenBlocklist(refresh_seconds=3600)
+    with app.app_context():
+        _insert("expired", expires_in=-10)
+        worker.revoke("live", "access", time.time() + 3600)
+        worker._remember("gone", time.time() - 1)
+
+        assert not worker.is_revoked("expired")
+        assert not worker.is_revoked("gone")
+
+        worker._prune(time.time())
+        assert set(worker._revoked) == {"live"}
+        assert worker.is_revoked("live")
+
+
+def test_purge_expired_deletes_rows(app):
+    worker = TokenBlocklist()
+    with app.app_context():
+        _insert("expired", expires_in=-10)
+        _insert("live")
+        assert worker.purge_expired() == 1
+        assert [r.jti for r in RevokedToken.query.all()] == ["live"]
+
+
+def test_logout_revokes_access_and_refresh_tokens(app, seed):
+    client = app.test_client()
+    tokens = client.post("/auth/login", json={"email": "a@a", "password": "pw"}).get_json()
+    access = {"Authorization": f"Bearer {tokens['access_token']}"}
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+    assert client.get("/api/admin/products", headers=access).status_code == 200
+    response = client.post("/auth/logout", headers=access, json={"refresh_token": tokens["refresh_token"]})
+    assert response.get_json()["revoked_tokens"] == 2
+
+    assert client.get("/api/admin/products", headers=access).status_code == 401
+    assert client.post("/auth/refresh", headers=refresh).status_code == 401
@@ -0,0 +1,42 @@
+from app.services.trigram_index import TrigramIndex, normalize, within_distance
+
+
+def _index():
+    return TrigramIndex(
+        [1, 2, 3, 4],
+        [
+            "Lenovo Laptop ABCD-1234 SKU001",
+            "Dell XPS 13 SKU002",
+            "Asus Zenbook SKU003",
+            "Lenovo ThinkPad T14 SKU004",
+        ],
+    )
+
+
+def test_normalize_and_edit_distance():
+    assert normalize("Điện thoại Lenovo ABCD-1234") == "dien thoai lenovo abcd 1234"
+    assert within_distance("lenvo", "lenovo", 1)
+    assert within_distance("laptp", "laptop", 1)
+    assert within_distance("xsp", "xps", 1)
+    assert not within_distance("lenvo", "dell", 2)
+
+
+def test_typos_are_matched_and_ranked():
+    index = _index()
+
+    assert [pid for pid, _ in index.search("lenvo laptp")] == [1]
+    assert index.search("thinkpd")[0][0] == 4
+    assert index.search("zenbok")[0][0] == 3
+    assert index.search("sku002")[0][0] == 2
+    assert index.search("samsung galaxy") == []
+
+
+def test_updates_after_build():
+    index = _index()
+
+    index.upsert(2, "Dell Latitude 5440 SKU002")
+    assert index.search("latitud")[0][0] == 2
+    assert index.search("xps") == []
+
+    index.remove(1)
+    assert index.search("lenvo laptp") == []
@@ -0,0 +1,72 @@
+import threading
+
+from app.services.view_counter import ViewCounter
+
+
+def test_increments_from_many_threads_are_not_lost():
+    counter = ViewCounter(stripes=4, flush_seconds=3600)
+
+    def work():
+        for i in range(5000):
+            counter.increment(i % 10)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counter.pending() == 40000
+    deltas = counter._drain()
+    assert deltas == {pid: 4000 for pid in range(10)}
+    assert counter.pending() == 0
+
+
+def test_failed_flush_restores_deltas():
+    counter = ViewCounter(flush_seconds=3600)
+    counter.increment(7, 3)
+    counter.increment(9)
+
+    deltas = counter._drain()
+    counter.increment(7)
+    counter._restore(deltas)
+
+    assert dict(counter._drain()) == {7: 4, 9: 1}
+
+
+def test_disabled_counter_ignores_increments():
+    counter = ViewCounter()
+    counter.enabled = False
+    counter.increment(1)
+
+    assert counter.pending() == 0
+    assert counter._thread is None
+
+
+def test_restore_is_bounded():
+    counter = ViewCounter(flush_seconds=3600, max_pending=2)
+    counter.increment(1)
+    counter._restore({2: 1, 3: 1})
+    assert dict(counter._drain()) == {1: 1}
+
+
+def test_flush_skips_deleted_products(app, seed):
+    from app import db
+    from app.models.product_stats import ProductStats
+
+    counter = ViewCounter(flush_seconds=3600)
+    counter.init_app(app)
+    counter._thread = object()  # không start thread flush nền
+    first, second = seed["product_ids"][:2]
+    counter.increment(first, 3)
+    counter.increment(second)
+    counter.increment(999_999)  # sản phẩm đã bị xoá
+
+    assert counter.flush() == 2
+    assert counter.pending() == 0
+    counter.increment(first)
+    assert counter.flush() == 1
+
+    with app.app_context():
+        views = dict(db.session.query(ProductStats.product_id, ProductStats.views))
+    assert views == {first: 4, second: 1}